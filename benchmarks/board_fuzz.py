@@ -0,0 +1,475 @@
+"""Differential fuzzer of the GUI's Board rules against python-chess.
+
+Run from the project root:
+
+    python -m benchmarks.board_fuzz --games 100000 --workers 8 --output fuzz.json
+    python -m benchmarks.board_fuzz --games 2000 --backend builtin --guided 0.5 --nodes 200
+    python -m benchmarks.board_fuzz --replay e2e4,d7d5,e4e5,f7f5
+
+Every game is played in a Board (src/core/board.py) and a chess.Board side
+by side: random legal moves, or engine moves on a --guided share of plies
+when --backend is given, and now and then (--undo-rate) the last move is
+taken back in both. After every move and undo the two are compared:
+
+    position     placement, side to move and castling rights as FEN fields
+    hash         hash_board() against the Polyglot hash of python-chess
+    legal-moves  the (from, to) pairs Board allows against the legal moves
+    make-move    Board.make_move refusing a move python-chess made
+
+A game stops at its first divergence. Divergences are grouped by kind and
+the kind of move behind them (castling, en passant, promotion, ...), and the
+first game of each group is shrunk to a minimal sequence of moves and undos
+that still shows the same divergence. The report gives the groups, with the
+length of each example before and after shrinking, and games and plies per
+second per core. Exit status is 1 if anything diverged.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+
+import chess
+import chess.engine
+
+from src.ai.engine_config import detect_cores
+from src.core.board import Board
+from src.core.game_io import snapshot_to_chess_board, chess_board_to_snapshot
+from src.core.move_codec import position_to_square, square_to_position
+from src.core.zobrist import hash_board, hash_chess_board
+
+# Plies (moves and undos) after which a game without divergence ends
+MAX_PLIES = 200
+
+# Games handed to a worker at a time
+BATCH_GAMES = 50
+
+# Token of an undo in a game's move sequence (the others are UCI moves)
+UNDO = 'undo'
+
+# Positions kept per ply, and plies searched, when shrink() looks for a short
+# game from the start that sets up the same divergence
+SEARCH_BEAM = 64
+SEARCH_MAX_PLIES = 40
+
+# Candidate games the search may replay in Board before giving up
+SEARCH_REPLAYS = 40
+
+# Backend of the current worker process for engine-guided games
+_backend = None
+
+
+def _init_worker(backend_name):
+    global _backend
+    # Board prints debug output for every move
+    sys.stdout = open(os.devnull, 'w')
+    if backend_name:
+        from src.ai.engine_registry import create_backend
+        _backend = create_backend(backend_name).start()
+        Finalize(None, _backend.close, exitpriority=10)
+
+
+def move_kind(reference, move):
+    """Kind of a python-chess move in the position before it, used to group divergences"""
+    if reference.is_castling(move):
+        return 'castling'
+    if reference.is_en_passant(move):
+        return 'en passant'
+    if move.promotion:
+        return 'promotion'
+    if reference.is_capture(move):
+        return 'capture'
+    piece_type = reference.piece_type_at(move.from_square)
+    if piece_type == chess.PAWN and abs(move.to_square - move.from_square) == 16:
+        return 'double push'
+    return f"{chess.piece_name(piece_type)} move"
+
+
+def uci(pair):
+    from_pos, to_pos = pair
+    return chess.square_name(position_to_square(from_pos)) + chess.square_name(position_to_square(to_pos))
+
+
+def board_move_set(board, turn):
+    """(from, to) pairs of every move Board allows for the side to move"""
+    moves = set()
+    for piece in board.pieces:
+        if piece.color == turn:
+            from_pos = piece.position
+            moves.update((from_pos, to_pos) for to_pos in board.get_valid_moves(piece))
+    return moves
+
+
+def compare(board, reference, cause):
+    """First difference between a Board and a chess.Board as a divergence dict, or None"""
+    turn = 'white' if reference.turn == chess.WHITE else 'black'
+    # Snapshots hold exactly the FEN fields Board can represent; FENs are only built for the report
+    snapshot = board.snapshot(turn)
+    if snapshot != chess_board_to_snapshot(reference):
+        actual = ' '.join(snapshot_to_chess_board(snapshot).fen().split()[:3])
+        expected = ' '.join(reference.fen().split()[:3])
+        return {'kind': 'position', 'cause': cause, 'detail': f"board {actual} != {expected}"}
+
+    if hash_board(board, turn) != hash_chess_board(reference):
+        return {'kind': 'hash', 'cause': cause,
+                'detail': f"board {hash_board(board, turn):016x} != {hash_chess_board(reference):016x}"}
+
+    actual = board_move_set(board, turn)
+    legal = {}
+    for move in reference.legal_moves:
+        legal.setdefault((square_to_position(move.from_square), square_to_position(move.to_square)), move)
+    if actual != legal.keys():
+        missing = sorted(legal.keys() - actual)
+        extra = sorted(actual - legal.keys())
+        # Grouped by the kind of the first missing move, else by the piece making an illegal one
+        if missing:
+            cause = f"missing {move_kind(reference, legal[missing[0]])}"
+        else:
+            piece_type = reference.piece_type_at(position_to_square(extra[0][0]))
+            cause = f"illegal {chess.piece_name(piece_type)} move"
+        return {'kind': 'legal-moves', 'cause': cause, 'move': uci(missing[0] if missing else extra[0]),
+                'detail': f"missing {[uci(pair) for pair in missing]} extra {[uci(pair) for pair in extra]}"}
+    return None
+
+
+def step(board, reference, token):
+    """Apply a move or undo to both boards and compare them; returns a divergence or None"""
+    if token == UNDO:
+        move = reference.pop()
+        cause = f"undo {move_kind(reference, move)}"
+        board.undo_move()
+    else:
+        move = chess.Move.from_uci(token)
+        cause = move_kind(reference, move)
+        if not board.make_move(square_to_position(move.from_square), square_to_position(move.to_square)):
+            return {'kind': 'make-move', 'cause': cause, 'detail': f"Board refused {token}"}
+        reference.push(move)
+    return compare(board, reference, cause)
+
+
+def replay(tokens):
+    """First divergence of a move sequence (with its ply), None if there is none or it is not a legal game"""
+    board = Board()
+    reference = chess.Board()
+    divergence = compare(board, reference, 'start')
+    for ply, token in enumerate(tokens, 1):
+        if divergence is not None:
+            break
+        if token == UNDO:
+            if not reference.move_stack:
+                return None
+        elif chess.Move.from_uci(token) not in reference.legal_moves:
+            return None
+        divergence = step(board, reference, token)
+        if divergence is not None:
+            divergence['ply'] = ply
+    if divergence is not None:
+        divergence.setdefault('ply', 0)
+    return divergence
+
+
+def group(divergence):
+    return f"{divergence['kind']}: {divergence['cause']}"
+
+
+def play_game(rng, max_plies, undo_rate, guided, nodes):
+    """Play one random or engine-guided game; returns (move tokens, divergence or None)"""
+    board = Board()
+    reference = chess.Board()
+    tokens = []
+    divergence = compare(board, reference, 'start')
+    limit = chess.engine.Limit(nodes=nodes)
+    while divergence is None and len(tokens) < max_plies and not reference.is_game_over():
+        if reference.move_stack and rng.random() < undo_rate:
+            token = UNDO
+        else:
+            move = None
+            if _backend is not None and rng.random() < guided:
+                move = _backend.search(reference, limit)['move']
+            if move is None:
+                move = rng.choice(list(reference.legal_moves))
+            token = move.uci()
+        tokens.append(token)
+        divergence = step(board, reference, token)
+    if divergence is not None:
+        divergence['ply'] = len(tokens)
+    return tokens, divergence
+
+
+def fuzz_batch(first_game, count, seed, max_plies, undo_rate, guided, nodes):
+    """Play games first_game.. of a batch; returns counts and the first game of each divergence group"""
+    start = time.perf_counter()
+    result = {'games': 0, 'plies': 0, 'groups': {}}
+    for game in range(first_game, first_game + count):
+        tokens, divergence = play_game(random.Random(f"{seed}:{game}"), max_plies, undo_rate, guided, nodes)
+        result['games'] += 1
+        result['plies'] += len(tokens)
+        if divergence is not None:
+            entry = result['groups'].setdefault(group(divergence), {'count': 0, 'game': game, 'tokens': tokens,
+                                                                    'divergence': divergence})
+            entry['count'] += 1
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def is_legal_game(tokens):
+    """Whether a sequence of moves and undos can be played in python-chess (much cheaper than replay)"""
+    reference = chess.Board()
+    for token in tokens:
+        if token == UNDO:
+            if not reference.move_stack:
+                return False
+            reference.pop()
+        else:
+            move = chess.Move.from_uci(token)
+            if not reference.is_legal(move):
+                return False
+            reference.push(move)
+    return True
+
+
+def move_requirements(reference, move):
+    """Contents of the squares that decide whether a move can be played, as {square: requirement}
+
+    A requirement is ('piece', type, color), ('color', color) for any piece
+    but a king of that color, or ('empty',).
+    """
+    piece = reference.piece_at(move.from_square)
+    requirements = {move.from_square: ('piece', piece.piece_type, piece.color)}
+    if reference.is_en_passant(move):
+        requirements[move.to_square] = ('empty',)
+        captured = move.to_square + (-8 if piece.color == chess.WHITE else 8)
+        requirements[captured] = ('piece', chess.PAWN, not piece.color)
+    elif reference.piece_at(move.to_square) is not None and not reference.is_castling(move):
+        requirements[move.to_square] = ('color', not piece.color)
+    else:
+        requirements[move.to_square] = ('empty',)
+    if piece.piece_type == chess.PAWN and abs(move.to_square - move.from_square) == 16:
+        # A double push next to an enemy pawn allows en passant
+        requirements[(move.from_square + move.to_square) // 2] = ('empty',)
+        for file in (chess.square_file(move.to_square) - 1, chess.square_file(move.to_square) + 1):
+            if 0 <= file < 8:
+                square = chess.square(file, chess.square_rank(move.to_square))
+                if reference.piece_at(square) == chess.Piece(chess.PAWN, not piece.color):
+                    requirements[square] = ('piece', chess.PAWN, not piece.color)
+    if reference.is_castling(move):
+        rank = chess.square_rank(move.from_square)
+        rook_file = 7 if move.to_square > move.from_square else 0
+        requirements[chess.square(rook_file, rank)] = ('piece', chess.ROOK, piece.color)
+        for file in range(min(rook_file, chess.square_file(move.from_square)) + 1,
+                          max(rook_file, chess.square_file(move.from_square))):
+            requirements[chess.square(file, rank)] = ('empty',)
+    return requirements
+
+
+def requirement_cost(reference, requirements):
+    """How far a position is from meeting move_requirements(); 0 when it meets them"""
+    cost = 0
+    for square, requirement in requirements.items():
+        piece = reference.piece_at(square)
+        if requirement[0] == 'empty':
+            cost += piece is not None
+        elif requirement[0] == 'color':
+            cost += not (piece and piece.color == requirement[1] and piece.piece_type != chess.KING)
+        elif not (piece and piece.piece_type == requirement[1] and piece.color == requirement[2]):
+            # Distance of the nearest piece that could get there (pawns only go forward)
+            _, piece_type, color = requirement
+            distances = [chess.square_distance(other, square) for other in reference.pieces(piece_type, color)
+                         if piece_type != chess.PAWN or
+                         (chess.square_rank(square) - chess.square_rank(other)) * (1 if color else -1) >= 0]
+            cost += 1 + min(distances, default=8)
+    return cost
+
+
+def search_replacement(tokens, divergence, key):
+    """A short game from the start showing the same divergence, or None if none was found
+
+    Removing plies from a random game almost always leaves an illegal
+    game, so instead a beam search plays towards a position where the
+    squares that decide the divergence (see move_requirements) hold what
+    they held in the original game, then plays the diverging move (and the
+    undo after it, if that showed the divergence) and replays the result.
+    For legal-moves divergences the squares of the differing move are
+    matched in the position after the last ply.
+    """
+    reference = chess.Board()
+    for token in tokens:
+        if token == UNDO:
+            reference.pop()
+        else:
+            reference.push(chess.Move.from_uci(token))
+    if divergence['kind'] == 'legal-moves':
+        suffix = []
+        move = chess.Move.from_uci(divergence['move'])
+    else:
+        suffix = tokens[-2:] if tokens[-1] == UNDO else tokens[-1:]
+        if suffix[0] == UNDO:
+            return None
+        if suffix[-1] == UNDO:
+            reference.pop()
+        move = reference.pop()
+    requirements = move_requirements(reference, move)
+
+    replays = 0
+    seen = set()
+    beam = [(chess.Board(), [])]
+    for _ in range(min(SEARCH_MAX_PLIES, len(tokens) - len(suffix))):
+        children = []
+        for board, moves in beam:
+            for candidate in board.legal_moves:
+                child = board.copy(stack=False)
+                child.push(candidate)
+                position = child.board_fen() + (' w' if child.turn else ' b')
+                if position in seen:
+                    continue
+                seen.add(position)
+                cost = requirement_cost(child, requirements)
+                children.append((cost, len(children), child, moves + [candidate.uci()]))
+        children.sort(key=lambda item: item[:2])
+        beam = [(child, moves) for _, _, child, moves in children[:SEARCH_BEAM]]
+        for cost, _, _, moves in children[:SEARCH_BEAM]:
+            if cost:
+                break
+            candidate = moves + suffix
+            if not is_legal_game(candidate):
+                continue
+            divergence = replay(candidate)
+            if divergence is not None and group(divergence) == key:
+                return candidate[:divergence['ply']]
+            replays += 1
+            if replays >= SEARCH_REPLAYS:
+                return None
+    return None
+
+
+def shrink(tokens, key):
+    """Shortest sequence found whose first divergence is still in group key
+
+    A short game from the start that sets up the same divergence is looked
+    for first (see search_replacement). Then moves and undos are removed:
+    contiguous chunks of halving size, then pairs of plies an odd distance
+    apart, so the moves in between keep their side. Candidates that are
+    not legal games are rejected before replaying Board.
+    """
+    tokens = list(tokens)
+
+    def attempt(candidate):
+        nonlocal tokens
+        if not is_legal_game(candidate):
+            return False
+        divergence = replay(candidate)
+        if divergence is None or group(divergence) != key:
+            return False
+        tokens = candidate[:divergence['ply']]
+        return True
+
+    divergence = replay(tokens)
+    if divergence is not None and group(divergence) == key:
+        tokens = tokens[:divergence['ply']]
+        replacement = search_replacement(tokens, divergence, key)
+        if replacement is not None and len(replacement) < len(tokens):
+            tokens = replacement
+
+    chunk = len(tokens) // 2
+    while chunk >= 1:
+        start = 0
+        while start < len(tokens):
+            if not attempt(tokens[:start] + tokens[start + chunk:]):
+                start += chunk
+        chunk //= 2
+
+    shrunk = True
+    while shrunk:
+        shrunk = any(attempt(tokens[:first] + tokens[first + 1:second] + tokens[second + 1:])
+                     for first in range(len(tokens)) for second in range(first + 1, len(tokens), 2))
+    return tokens
+
+
+def run(games, workers, seed, max_plies, undo_rate, backend_name, guided, nodes, batch=BATCH_GAMES):
+    """Fuzz games 0..games-1 on a process pool, then shrink one example per divergence group"""
+    totals = {'games': 0, 'plies': 0, 'time': 0.0, 'groups': {}}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backend_name,)) as executor:
+        futures = [executor.submit(fuzz_batch, first, min(batch, games - first), seed, max_plies, undo_rate,
+                                   guided, nodes)
+                   for first in range(0, games, batch)]
+        for future in as_completed(futures):
+            result = future.result()
+            for name in ('games', 'plies', 'time'):
+                totals[name] += result[name]
+            for key, entry in result['groups'].items():
+                known = totals['groups'].get(key)
+                if known is None or entry['game'] < known['game']:
+                    totals['groups'][key] = dict(entry, count=entry['count'] + (known['count'] if known else 0))
+                else:
+                    known['count'] += entry['count']
+            print(f"{totals['games']}/{games} games, {len(totals['groups'])} divergence groups", file=sys.stderr)
+        totals['wall_time'] = time.perf_counter() - start
+
+        shrinks = {key: executor.submit(shrink, entry['tokens'], key) for key, entry in totals['groups'].items()}
+        for key, future in shrinks.items():
+            entry = totals['groups'][key]
+            entry['original_plies'] = entry['divergence']['ply']
+            entry['minimal'] = future.result()
+            entry['minimal_plies'] = len(entry['minimal'])
+            entry['divergence'] = replay_quietly(entry['minimal'])
+            del entry['tokens']
+    return totals
+
+
+def replay_quietly(tokens):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return replay(tokens)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Board with python-chess on random games")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-plies', type=int, default=MAX_PLIES)
+    parser.add_argument('--undo-rate', type=float, default=0.05, help="chance of an undo instead of a move")
+    parser.add_argument('--backend', default=None, help="engine backend choosing --guided of the moves")
+    parser.add_argument('--guided', type=float, default=0.5, help="share of moves chosen by --backend")
+    parser.add_argument('--nodes', type=int, default=200, help="engine nodes per guided move")
+    parser.add_argument('--replay', help="comma-separated UCI moves and 'undo's to check instead of fuzzing")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        tokens = args.replay.split(',')
+        divergence = replay_quietly(tokens)
+        if divergence is None:
+            print(f"No divergence in {len(tokens)} plies (or not a legal game)")
+            return 0
+        print(f"Ply {divergence['ply']}: {group(divergence)}\n  {divergence['detail']}")
+        return 1
+
+    workers = args.workers or detect_cores()
+    totals = run(args.games, workers, args.seed, args.max_plies, args.undo_rate, args.backend, args.guided,
+                 args.nodes)
+    per_core = {'games_per_second': totals['games'] / totals['time'] if totals['time'] else 0.0,
+                'plies_per_second': totals['plies'] / totals['time'] if totals['time'] else 0.0}
+    print(f"{totals['games']} games, {totals['plies']} plies in {totals['wall_time']:.1f}s on {workers} workers: "
+          f"{per_core['games_per_second']:.1f} games/s, {per_core['plies_per_second']:,.0f} plies/s per core")
+    for key, entry in sorted(totals['groups'].items(), key=lambda item: -item[1]['count']):
+        print(f"{entry['count']:7} {key} (shrunk from {entry['original_plies']} to {entry['minimal_plies']} plies)\n"
+              f"        {','.join(entry['minimal'])}\n        "
+              f"{entry['divergence']['detail'] if entry['divergence'] else '(not reproduced)'}")
+
+    if args.output:
+        results = {'games': totals['games'], 'plies': totals['plies'], 'wall_time': totals['wall_time'],
+                   'workers': workers, 'seed': args.seed, 'backend': args.backend, 'per_core': per_core,
+                   'divergences': totals['groups']}
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    return 1 if totals['groups'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
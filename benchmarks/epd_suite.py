@@ -0,0 +1,205 @@
+"""EPD test-suite runner: how many positions an AI backend solves, and how fast.
+
+Run from the project root with any backend registered in src/ai/engine_registry.py:
+
+    python -m benchmarks.epd_suite wac.epd --backend stockfish --nodes 200000 --output wac-sf.json
+    python -m benchmarks.epd_suite wac.epd --backend builtin --time 1 --compare wac-builtin.json
+
+A position is solved when the final move is one of its "bm" moves (or, for
+positions with only "am", none of them). Time-to-solution is the wall time
+at which the backend started reporting a solving move and never changed its
+mind. Positions run in parallel, one backend per worker process; UCI
+engines get their share of the cores through Threads/Hash.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+import chess
+import chess.engine
+
+from src.ai.engine_config import allocate, detect_cores
+from src.ai.engine_registry import create_backend, UciBackend
+
+# Backend of the current worker process, created by _init_worker
+_backend = None
+
+
+def load_suite(path):
+    """Read an EPD file into position dicts (id, fen, bm and am as UCI lists)
+
+    Lines that cannot be parsed are reported with their line number and skipped.
+    """
+    positions = []
+    with open(path) as handle:
+        for number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            # A bad FEN or an illegal bm/am move skips the line, not the run
+            try:
+                board, operations = chess.Board.from_epd(line)
+            except ValueError as e:
+                print(f"Skipping {path}:{number}: {str(e)}")
+                continue
+            bm = [move.uci() for move in operations.get('bm', [])]
+            am = [move.uci() for move in operations.get('am', [])]
+            if not bm and not am:
+                continue
+            positions.append({
+                'id': operations.get('id') or f"{os.path.basename(path)}:{number}",
+                'fen': board.fen(),
+                'bm': bm,
+                'am': am
+            })
+    return positions
+
+
+def is_solution(position, move):
+    if move is None:
+        return False
+    if position['bm']:
+        return move in position['bm']
+    return move not in position['am']
+
+
+def _init_worker(backend_name, workers):
+    global _backend
+    _backend = create_backend(backend_name)
+    if isinstance(_backend, UciBackend):
+        # Each concurrently running engine gets its share of cores and memory
+        engine_path = _backend.command if isinstance(_backend.command, str) else None
+        _backend.options = {**_backend.options, **allocate(workers, engine_path)}
+    _backend.start()
+    # Worker processes skip atexit handlers, but run multiprocessing finalizers
+    Finalize(None, _backend.close, exitpriority=10)
+
+
+def solve(position, limit):
+    """Search one position on this worker's backend and score the answer"""
+    updates = []
+    start = time.perf_counter()
+
+    def on_info(result):
+        if result['move'] is not None:
+            updates.append((time.perf_counter() - start, result['move'].uci()))
+
+    result = _backend.search(chess.Board(position['fen']), limit, info_callback=on_info)
+    elapsed = time.perf_counter() - start
+    move = result['move'].uci() if result['move'] is not None else None
+    solved = is_solution(position, move)
+
+    # The solution counts from the first report of the final streak of solving moves
+    time_to_solution = None
+    if solved:
+        time_to_solution = elapsed
+        for seen, reported in reversed(updates):
+            if not is_solution(position, reported):
+                break
+            time_to_solution = seen
+    return {
+        **position,
+        'move': move,
+        'solved': solved,
+        'time': elapsed,
+        'time_to_solution': time_to_solution,
+        'depth': result['depth'],
+        'nodes': result['nodes'],
+        'nps': result['nodes'] / elapsed if elapsed else 0.0
+    }
+
+
+def run_suite(positions, backend_name, limit, workers):
+    """Solve all positions on a pool of worker processes"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backend_name, workers)) as executor:
+        futures = [executor.submit(solve, position, limit) for position in positions]
+        results = []
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            print(f"{result['id']:24} {'ok ' if result['solved'] else 'NO '} {str(result['move']):6} "
+                  f"depth {result['depth']:3} {result['nodes']:10} nodes {result['time']:6.2f}s")
+    return results
+
+
+def summarize(results):
+    solved = [result for result in results if result['solved']]
+    total_nodes = sum(result['nodes'] for result in results)
+    total_time = sum(result['time'] for result in results)
+    return {
+        'positions': len(results),
+        'solved': len(solved),
+        'solve_rate': len(solved) / len(results) if results else 0.0,
+        'mean_time_to_solution': (sum(result['time_to_solution'] for result in solved) / len(solved)
+                                  if solved else None),
+        'total_time': total_time,
+        'nodes': total_nodes,
+        'nps': total_nodes / total_time if total_time else 0.0
+    }
+
+
+def compare(previous, current):
+    """Print what changed between two result files"""
+    before = {result['id']: result for result in previous['results']}
+    for result in current['results']:
+        old = before.get(result['id'])
+        if old is None:
+            continue
+        if result['solved'] and not old['solved']:
+            print(f"  newly solved: {result['id']} ({result['move']})")
+        elif old['solved'] and not result['solved']:
+            print(f"  no longer solved: {result['id']} ({result['move']}, was {old['move']})")
+    for key in ('solved', 'solve_rate', 'mean_time_to_solution', 'nps'):
+        old, new = previous['summary'][key], current['summary'][key]
+        if old is not None and new is not None:
+            print(f"  {key:22} {old:12.4g} -> {new:12.4g} ({new - old:+.4g})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run EPD test suites through an AI backend")
+    parser.add_argument('suites', nargs='+', help="EPD files with bm/am operations")
+    parser.add_argument('--backend', default='stockfish')
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument('--nodes', type=int, help="node budget per position")
+    budget.add_argument('--time', type=float, help="seconds per position")
+    parser.add_argument('--workers', type=int, default=None, help="positions searched at once (default: cores)")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="a previous --output file to diff against")
+    args = parser.parse_args(argv)
+
+    limit = chess.engine.Limit(nodes=args.nodes) if args.nodes else chess.engine.Limit(time=args.time or 1.0)
+    workers = args.workers or detect_cores()
+    positions = [position for path in args.suites for position in load_suite(path)]
+
+    results = run_suite(positions, args.backend, limit, workers)
+    summary = summarize(results)
+    report = {
+        'backend': args.backend,
+        'suites': args.suites,
+        'limit': {'nodes': limit.nodes, 'time': limit.time},
+        'workers': workers,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'summary': summary,
+        'results': sorted(results, key=lambda result: result['id'])
+    }
+
+    tts = summary['mean_time_to_solution']
+    print(f"Solved {summary['solved']}/{summary['positions']} ({summary['solve_rate']:.1%}), "
+          f"mean time to solution {f'{tts:.3f}s' if tts is not None else '-'}, {summary['nps']:,.0f} nps")
+    if args.compare:
+        with open(args.compare) as handle:
+            print(f"Compared with {args.compare}:")
+            compare(json.load(handle), report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
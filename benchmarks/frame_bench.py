@@ -0,0 +1,313 @@
+"""Frame-time benchmark: replay recorded input through the real game loop.
+
+Run from the project root:
+
+    python -m benchmarks.frame_bench --loops 5 --output frames.json
+    python -m benchmarks.frame_bench --compare frames.json --tolerance 0.15
+    python -m benchmarks.frame_bench --record clicks.json     # play in a real window, then
+    python -m benchmarks.frame_bench --script clicks.json     # replay what was recorded
+
+The GameController and UIManager run under SDL's dummy video driver with a
+stand-in engine that answers instantly with a fixed move, so the numbers
+measure only event handling, game state updates and rendering. Frames run
+back to back without the 60 fps cap.
+
+Without --script a built-in scenario is replayed: drags for a few opening
+moves, the Undo button, the navigation keys and the New Game button. The
+script is replayed twice: once for frame times and CPU time, and once under
+tracemalloc for memory allocated per frame (peak above the frame's start)
+and blocks still held at the end of each frame.
+
+--compare exits with status 1 when p50, p90, p99 or CPU time per frame got
+worse than the baseline by more than --tolerance, for use as a regression gate.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import wait
+
+# Must be set before pygame or the game modules are imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('CHESS_AI_CACHE_DIR', tempfile.mkdtemp())
+os.environ.setdefault('CHESS_AI_SAVE_DIR', tempfile.mkdtemp())
+
+import pygame
+
+from src.utils.stats import percentiles
+
+# Event types that are recorded and replayed, by the name used in script files
+EVENT_TYPES = {
+    'MOUSEBUTTONDOWN': pygame.MOUSEBUTTONDOWN,
+    'MOUSEBUTTONUP': pygame.MOUSEBUTTONUP,
+    'MOUSEMOTION': pygame.MOUSEMOTION,
+    'KEYDOWN': pygame.KEYDOWN,
+    'KEYUP': pygame.KEYUP
+}
+
+# Event attributes kept in script files
+EVENT_FIELDS = ('pos', 'rel', 'button', 'buttons', 'key', 'mod', 'unicode')
+
+# Idle frames rendered before measuring (asset loading, first flips)
+DEFAULT_WARMUP_FRAMES = 30
+
+# Frames waited after each move of the built-in scenario
+SETTLE_FRAMES = 10
+
+# White moves of the built-in scenario (coordinates as (row, col), row 0 = rank 8)
+SCENARIO_MOVES = [((6, 4), (4, 4)), ((7, 6), (5, 5)), ((7, 5), (4, 2)), ((6, 3), (5, 3)), ((7, 4), (7, 6))]
+
+# Keys pressed after the moves: three plies back, two forward, then the end of the line
+SCENARIO_KEYS = [pygame.K_LEFT] * 3 + [pygame.K_RIGHT] * 2 + [pygame.K_END]
+
+
+class StandInEngine:
+    """Engine replacement that answers at once with the first legal move in UCI order"""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.ready.set()
+        self.moves = 0
+
+    def get_best_move(self, board, time_limit=1.0):
+        self.moves += 1
+        moves = sorted(board.legal_moves, key=lambda move: move.uci())
+        return moves[0] if moves else None
+
+    def cleanup(self):
+        pass
+
+
+def square_center(game, square):
+    row, col = square
+    size = game.ui_manager.square_size
+    return (col * size + size // 2, row * size + size // 2)
+
+
+def drag(frame, start, end, steps=4):
+    """Events of a left-button drag spread over a few frames"""
+    events = [{'frame': frame, 'type': 'MOUSEBUTTONDOWN', 'pos': list(start), 'button': 1}]
+    for step in range(1, steps + 1):
+        pos = [start[0] + (end[0] - start[0]) * step // steps, start[1] + (end[1] - start[1]) * step // steps]
+        events.append({'frame': frame + step, 'type': 'MOUSEMOTION', 'pos': pos, 'rel': [0, 0],
+                       'buttons': [1, 0, 0]})
+    events.append({'frame': frame + steps + 1, 'type': 'MOUSEBUTTONUP', 'pos': list(end), 'button': 1})
+    return events
+
+
+def click(frame, pos):
+    return [{'frame': frame, 'type': 'MOUSEBUTTONDOWN', 'pos': list(pos), 'button': 1},
+            {'frame': frame + 1, 'type': 'MOUSEBUTTONUP', 'pos': list(pos), 'button': 1}]
+
+
+def key(frame, code):
+    return [{'frame': frame, 'type': 'KEYDOWN', 'key': code, 'mod': 0, 'unicode': ''},
+            {'frame': frame + 1, 'type': 'KEYUP', 'key': code, 'mod': 0, 'unicode': ''}]
+
+
+def builtin_script(game, loops):
+    """The default scenario: moves, undo, navigation and a new game, repeated"""
+    buttons = game.ui_manager.buttons
+    events = []
+    frame = 0
+    for _ in range(loops):
+        for start, end in SCENARIO_MOVES:
+            events += drag(frame, square_center(game, start), square_center(game, end))
+            frame += SETTLE_FRAMES
+        events += click(frame, buttons['undo']['rect'].center)
+        frame += SETTLE_FRAMES
+        for code in SCENARIO_KEYS:
+            events += key(frame, code)
+            frame += 3
+        events += click(frame, buttons['new_game']['rect'].center)
+        frame += SETTLE_FRAMES
+    return {'frames': frame, 'events': events}
+
+
+def encode_event(frame, event):
+    """Script entry for a pygame event, or None for event types that are not replayed"""
+    names = {value: name for name, value in EVENT_TYPES.items()}
+    if event.type not in names:
+        return None
+    entry = {'frame': frame, 'type': names[event.type]}
+    for field in EVENT_FIELDS:
+        if hasattr(event, field):
+            value = getattr(event, field)
+            entry[field] = list(value) if isinstance(value, tuple) else value
+    return entry
+
+
+def decode_event(entry):
+    fields = {field: tuple(value) if isinstance(value, list) else value
+              for field, value in entry.items() if field in EVENT_FIELDS}
+    return pygame.event.Event(EVENT_TYPES[entry['type']], fields)
+
+
+def record(game, path):
+    """Play in a real window and save the input as a script when it is closed"""
+    entries = []
+    game.event_handler.event_log = []
+    frame = 0
+    while game.running:
+        game.run_frame()
+        for event in game.event_handler.event_log:
+            entry = encode_event(frame, event)
+            if entry:
+                entries.append(entry)
+        game.event_handler.event_log.clear()
+        game.clock.tick(60)
+        frame += 1
+    with open(path, 'w') as handle:
+        json.dump({'frames': frame, 'events': entries}, handle)
+    print(f"Recorded {len(entries)} events over {frame} frames to {path}")
+
+
+def replay(game, script, trace_memory=False):
+    """Run the script's frames and return per-frame measurements"""
+    game.reset_game()
+    pygame.event.clear()
+    by_frame = {}
+    for entry in script['events']:
+        by_frame.setdefault(entry['frame'], []).append(decode_event(entry))
+
+    frame_times = []
+    allocated = []
+    retained = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for frame in range(script['frames']):
+        # Let the AI move land on the next frame every run, however the thread is scheduled
+        if game.ai_future is not None:
+            wait([game.ai_future])
+        for event in by_frame.get(frame, ()):
+            pygame.event.post(event)
+
+        if trace_memory:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            start_blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        game.run_frame()
+        frame_times.append(time.perf_counter() - start)
+        if trace_memory:
+            allocated.append(tracemalloc.get_traced_memory()[1] - start_bytes)
+            retained.append(sys.getallocatedblocks() - start_blocks)
+
+    return {
+        'frame_times': frame_times,
+        'allocated': allocated,
+        'retained': retained,
+        'cpu': time.process_time() - cpu_start,
+        'wall': time.perf_counter() - wall_start
+    }
+
+
+def summarize(timing, memory):
+    frames = len(timing['frame_times'])
+    frame_ms = [value * 1000 for value in timing['frame_times']]
+    allocated_kb = [value / 1024 for value in memory['allocated']]
+    return {
+        'frames': frames,
+        'frame_ms': {**percentiles(frame_ms), 'mean': sum(frame_ms) / frames, 'max': max(frame_ms)},
+        'allocated_kb_per_frame': {**percentiles(allocated_kb), 'mean': sum(allocated_kb) / frames},
+        'retained_blocks': sum(memory['retained']),
+        'cpu_seconds': timing['cpu'],
+        'cpu_ms_per_frame': timing['cpu'] * 1000 / frames,
+        'wall_seconds': timing['wall']
+    }
+
+
+def compare(previous, current, tolerance):
+    """Print the change against a baseline; returns the names of metrics that regressed"""
+    metrics = [('p50', previous['frame_ms']['p50'], current['frame_ms']['p50']),
+               ('p90', previous['frame_ms']['p90'], current['frame_ms']['p90']),
+               ('p99', previous['frame_ms']['p99'], current['frame_ms']['p99']),
+               ('cpu/frame', previous['cpu_ms_per_frame'], current['cpu_ms_per_frame'])]
+    regressed = []
+    for name, old, new in metrics:
+        change = (new - old) / old if old else 0.0
+        flag = ''
+        if change > tolerance:
+            regressed.append(name)
+            flag = '  REGRESSION'
+        print(f"  {name:10} {old:8.3f}ms -> {new:8.3f}ms ({change:+.1%}){flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure frame times of the game loop on recorded input")
+    parser.add_argument('--script', help="event script to replay (default: the built-in scenario)")
+    parser.add_argument('--loops', type=int, default=5, help="repetitions of the built-in scenario")
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP_FRAMES, help="idle frames before measuring")
+    parser.add_argument('--record', help="play in a window and save the input as a script to this file")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="a previous --output file to gate against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed slowdown for --compare")
+    args = parser.parse_args(argv)
+
+    if args.record and os.environ['SDL_VIDEODRIVER'] == 'dummy':
+        # Recording needs a real window
+        del os.environ['SDL_VIDEODRIVER']
+
+    from src.core.game_controller import GameController
+    engine = StandInEngine()
+    game = GameController(engine=engine)
+    try:
+        if args.record:
+            record(game, args.record)
+            return 0
+
+        if args.script:
+            with open(args.script) as handle:
+                script = json.load(handle)
+        else:
+            script = builtin_script(game, args.loops)
+
+        replay(game, {'frames': args.warmup, 'events': []})
+        timing = replay(game, script)
+        tracemalloc.start()
+        memory = replay(game, script, trace_memory=True)
+        tracemalloc.stop()
+    finally:
+        # GameController.cleanup exits the process, so release its resources here
+        game.ai_executor.shutdown(wait=True)
+        game.recorder.close()
+        pygame.quit()
+
+    summary = summarize(timing, memory)
+    frame_ms = summary['frame_ms']
+    allocated_kb = summary['allocated_kb_per_frame']
+    print(f"{summary['frames']} frames, {len(script['events'])} events, {engine.moves // 2} AI moves per run")
+    print(f"frame      p50 {frame_ms['p50']:.3f}ms  p90 {frame_ms['p90']:.3f}ms  p99 {frame_ms['p99']:.3f}ms  "
+          f"max {frame_ms['max']:.3f}ms")
+    print(f"allocated  p50 {allocated_kb['p50']:.1f}KB  p99 {allocated_kb['p99']:.1f}KB  "
+          f"mean {allocated_kb['mean']:.1f}KB per frame, {summary['retained_blocks']} blocks retained")
+    print(f"cpu        {summary['cpu_seconds']:.3f}s ({summary['cpu_ms_per_frame']:.3f}ms per frame), "
+          f"wall {summary['wall_seconds']:.3f}s")
+
+    report = {
+        'script': args.script or f"builtin x{args.loops}",
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'pygame': pygame.version.ver,
+        'summary': summary
+    }
+    status = 0
+    if args.compare:
+        with open(args.compare) as handle:
+            print(f"Compared with {args.compare}:")
+            if compare(json.load(handle)['summary'], summary, args.tolerance):
+                status = 1
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""NNUE evaluation benchmark: incremental accumulator updates against full recomputation.
+
+Run from the project root:
+
+    python -m benchmarks.nnue_bench --depth 3 --output nnue.json
+    python -m benchmarks.nnue_bench --net data/nnue.npz --search 2
+
+Every node of a full-width tree walk below each bench position is made with
+push/pop and evaluated three ways: with NnueEvaluator updating its first
+layer in make/unmake, with the first layer recomputed from the board at every
+node, and with MaterialEvaluator for reference. Every walk is repeated
+(--repeat) and the fastest run kept; the time of the bare tree walk is
+subtracted, leaving evaluation cost per node (at least zero: for cheap
+evaluators the difference is within timing noise, so the raw walk times
+are reported too). Incremental and full
+scores are compared at every node. --search also reports search NPS of the
+builtin engine with each evaluator.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import chess
+
+from src.ai.builtin_engine import BuiltinEngine, MaterialEvaluator
+from src.ai.engine_config import BENCH_POSITIONS
+from src.ai.nnue import Network, NnueEvaluator, material_network
+from src.utils.constants import NNUE_PATH
+
+
+def walk(board, depth, make, score, unmake):
+    """Make every move down to depth plies, calling the hooks around each push and pop"""
+    nodes = 0
+    for move in list(board.legal_moves):
+        make(board, move)
+        board.push(move)
+        score(board)
+        nodes += 1
+        if depth > 1:
+            nodes += walk(board, depth - 1, make, score, unmake)
+        board.pop()
+        unmake()
+    return nodes
+
+
+def time_walk(positions, depth, evaluator=None, mode='bare'):
+    """Seconds, nodes and scores of walking the trees of all positions in one evaluation mode"""
+    scores = []
+
+    def nothing(*args):
+        pass
+
+    def evaluate(board):
+        scores.append(evaluator.evaluate(board))
+
+    def recompute(board):
+        evaluator.refresh(board)
+        scores.append(evaluator.evaluate(board))
+
+    hooks = {
+        'bare': (nothing, nothing, nothing),
+        'incremental': (evaluator and evaluator.push, evaluate, evaluator and evaluator.pop),
+        'full': (nothing, recompute, nothing)
+    }[mode]
+    nodes = 0
+    start = time.perf_counter()
+    for fen in positions:
+        board = chess.Board(fen)
+        if evaluator is not None:
+            evaluator.reset(board)
+        nodes += walk(board, depth, *hooks)
+    return time.perf_counter() - start, nodes, scores
+
+
+def fastest_walk(positions, depth, repeat, evaluator=None, mode='bare'):
+    """time_walk() repeated, keeping the fastest run"""
+    runs = [time_walk(positions, depth, evaluator, mode) for _ in range(repeat)]
+    return min(runs, key=lambda run: run[0])
+
+
+def search_nps(positions, evaluator, seconds):
+    engine = BuiltinEngine(evaluator=evaluator)
+    nodes = 0
+    elapsed = 0.0
+    for fen in positions:
+        result = engine.search(chess.Board(fen), time_limit=seconds)
+        nodes += result['nodes']
+        elapsed += result['time']
+        engine.table.clear()
+    return nodes / elapsed if elapsed else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure NNUE evaluation cost per node")
+    parser.add_argument('--net', default=None, help="network file (default: NNUE_PATH, else a material network)")
+    parser.add_argument('--depth', type=int, default=3, help="plies walked below each position")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of every walk, the fastest is kept")
+    parser.add_argument('--search', type=float, default=0.0, help="also measure search NPS for this many seconds")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    path = args.net or (NNUE_PATH if os.path.exists(NNUE_PATH) else None)
+    network = Network.load(path) if path else material_network()
+    print(f"Network: {path or 'material (built in)'}, {network.hidden} hidden units")
+
+    bare_time, nodes, _ = fastest_walk(BENCH_POSITIONS, args.depth, args.repeat, mode='bare')
+    results = {'network': path, 'hidden': network.hidden, 'depth': args.depth, 'nodes': nodes,
+               'repeat': args.repeat, 'walk_seconds': {'bare': bare_time}, 'per_node_us': {}}
+    print(f"{'bare':12} {'':8}{'':12}(walk {bare_time:.2f}s)")
+    scores = {}
+    for name, evaluator, mode in (('incremental', NnueEvaluator(network), 'incremental'),
+                                  ('full', NnueEvaluator(network), 'full'),
+                                  ('material', MaterialEvaluator(), 'incremental')):
+        elapsed, _, scores[name] = fastest_walk(BENCH_POSITIONS, args.depth, args.repeat, evaluator, mode)
+        results['walk_seconds'][name] = elapsed
+        results['per_node_us'][name] = max(0.0, elapsed - bare_time) / nodes * 1e6
+        print(f"{name:12} {results['per_node_us'][name]:8.2f}us per node (walk {elapsed:.2f}s)")
+
+    incremental = results['per_node_us']['incremental']
+    results['speedup'] = results['per_node_us']['full'] / incremental if incremental else None
+    results['mismatches'] = sum(1 for a, b in zip(scores['incremental'], scores['full']) if a != b)
+    speedup = f"{results['speedup']:.2f}x" if results['speedup'] is not None else "(too fast to tell)"
+    print(f"{nodes} nodes, incremental is {speedup} faster than full recomputation, "
+          f"{results['mismatches']} score mismatches")
+
+    if args.search:
+        results['search_nps'] = {
+            'nnue': search_nps(BENCH_POSITIONS, NnueEvaluator(network), args.search),
+            'material': search_nps(BENCH_POSITIONS, MaterialEvaluator(), args.search)
+        }
+        print(f"search       nnue {results['search_nps']['nnue']:,.0f} nps, "
+              f"material {results['search_nps']['material']:,.0f} nps")
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    return 1 if results['mismatches'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
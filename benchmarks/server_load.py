@@ -0,0 +1,192 @@
+"""Load generator for the multi-game server (src/server/game_server.py).
+
+Run from the project root; --spawn starts a server with the random-move
+test engine so no Stockfish is needed:
+
+    python -m benchmarks.server_load --spawn --engines 4 --connections 50 --games 20 --duration 30
+
+Every connection plays several games at once with random legal moves and
+records the round-trip time of each move (including the AI reply). The
+report gives latency percentiles, throughput and the server's own stats.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import chess
+
+from src.server.game_server import DEFAULT_HOST, DEFAULT_PORT
+from src.utils.stats import percentiles
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Plies after which a game is abandoned and a new one started
+DEFAULT_MAX_PLIES = 60
+
+
+class Connection:
+    """One client connection with responses matched to requests by id"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.request_ids = itertools.count(1)
+        self.pending = {}
+        self.receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port, limit=1024 * 1024)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.pending.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("server closed the connection"))
+
+    async def request(self, op, **fields):
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(json.dumps({'id': request_id, 'op': op, **fields}).encode() + b'\n')
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self.receiver.cancel()
+
+
+def pick_move(fen):
+    """A random legal move the server's Board also supports (no promotion or en passant)"""
+    board = chess.Board(fen)
+    moves = [move for move in board.legal_moves if not move.promotion and not board.is_en_passant(move)]
+    return random.choice(moves).uci() if moves else None
+
+
+async def play_games(connection, deadline, max_plies, totals):
+    """Play games one after another on a connection until the deadline"""
+    while time.perf_counter() < deadline:
+        response = await connection.request('new', color='white')
+        if not response['ok']:
+            totals['errors'][response['error']] = totals['errors'].get(response['error'], 0) + 1
+            await asyncio.sleep(0.05)
+            continue
+        game = response['game']
+        totals['games'] += 1
+        for _ in range(max_plies):
+            if response['state'] != 'playing' or time.perf_counter() >= deadline:
+                break
+            move = pick_move(response['fen'])
+            if move is None:
+                break
+            start = time.perf_counter()
+            reply = await connection.request('move', game=game, move=move)
+            if not reply['ok']:
+                totals['errors'][reply['error']] = totals['errors'].get(reply['error'], 0) + 1
+                if reply['error'] == 'busy':
+                    await asyncio.sleep(0.05)
+                    continue
+                break
+            totals['latencies'].append(time.perf_counter() - start)
+            response = reply
+        await connection.request('close', game=game)
+
+
+async def run_load(host, port, connections, games, duration, max_plies):
+    totals = {'games': 0, 'latencies': [], 'errors': {}}
+    opened = [await Connection.open(host, port) for _ in range(connections)]
+    start = time.perf_counter()
+    deadline = start + duration
+    try:
+        await asyncio.gather(*(play_games(connection, deadline, max_plies, totals)
+                               for connection in opened for _ in range(games)))
+        elapsed = time.perf_counter() - start
+        server_stats = (await opened[0].request('stats'))
+    finally:
+        for connection in opened:
+            await connection.close()
+
+    latencies = totals['latencies']
+    return {
+        'connections': connections,
+        'concurrent_games': connections * games,
+        'duration': elapsed,
+        'games': totals['games'],
+        'moves': len(latencies),
+        'moves_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'latency': {**percentiles(latencies), 'max': max(latencies) if latencies else None},
+        'errors': totals['errors'],
+        'server': server_stats
+    }
+
+
+def spawn_server(port, engines, movetime):
+    """Start a server with the fake engine and wait until it accepts connections"""
+    command = [sys.executable, '-m', 'src.server.game_server', '--engine', 'fake', '--quiet',
+               '--port', str(port), '--engines', str(engines), '--movetime', str(movetime)]
+    process = subprocess.Popen(command, cwd=PROJECT_ROOT, stderr=subprocess.PIPE, text=True)
+    process.stderr.readline()   # "Serving games on ..."
+    if process.poll() is not None:
+        raise SystemExit("The server failed to start")
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure latency and throughput of the game server")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--connections', type=int, default=20)
+    parser.add_argument('--games', type=int, default=10, help="concurrent games per connection")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds to generate load")
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument('--spawn', action='store_true', help="start a server with the fake engine")
+    parser.add_argument('--engines', type=int, default=4, help="engine pool size of a spawned server")
+    parser.add_argument('--movetime', type=float, default=0.01, help="AI seconds per move of a spawned server")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    server = spawn_server(args.port, args.engines, args.movetime) if args.spawn else None
+    try:
+        results = asyncio.run(run_load(args.host, args.port, args.connections, args.games, args.duration,
+                                       args.max_plies))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latency = results['latency']
+    print(f"{results['concurrent_games']} concurrent games over {results['connections']} connections, "
+          f"{results['duration']:.1f}s")
+    print(f"moves      {results['moves']} ({results['moves_per_second']:.1f}/s), games {results['games']}")
+    if results['moves']:
+        print(f"latency    p50 {latency['p50'] * 1000:.1f}ms  p90 {latency['p90'] * 1000:.1f}ms  "
+              f"p99 {latency['p99'] * 1000:.1f}ms  max {latency['max'] * 1000:.1f}ms")
+    if results['errors']:
+        print(f"errors     {results['errors']}")
+    if results['server'].get('ok'):
+        print(f"server     queue wait p99 {results['server']['queue_wait']['p99']}, "
+              f"engine stats {results['server']['engine']}")
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Lazy SMP benchmark: NPS and time-to-depth against single-process search.
+
+Run from the project root:
+
+    python -m benchmarks.smp_bench --depth 5 --seconds 2 --output smp.json
+
+The baseline is BuiltinEngine in this process with its dictionary table;
+every other row is LazySmpEngine with that many worker processes. Speedups
+are relative to the baseline, so on N free cores the NPS column should
+approach N.
+"""
+import argparse
+import json
+import sys
+
+import chess
+
+from src.ai.builtin_engine import BuiltinEngine
+from src.ai.engine_config import BENCH_POSITIONS, detect_cores
+from src.ai.lazy_smp import LazySmpEngine, DEFAULT_HASH_MB
+
+
+def measure(search, depth, seconds, positions=BENCH_POSITIONS):
+    """Total time to reach a depth and NPS under a time limit over the positions"""
+    time_to_depth = 0.0
+    nodes = 0
+    elapsed = 0.0
+    for fen in positions:
+        result = search(chess.Board(fen), depth=depth)
+        time_to_depth += result['time']
+        result = search(chess.Board(fen), time_limit=seconds)
+        nodes += result['nodes']
+        elapsed += result['time']
+    return {'time_to_depth': time_to_depth, 'nps': nodes / elapsed if elapsed else 0.0}
+
+
+def single_process_search(board, depth=None, time_limit=None):
+    # A fresh engine per search so no run benefits from an earlier one's table
+    return BuiltinEngine().search(board, time_limit=time_limit, depth=depth)
+
+
+def lazy_smp_search(workers, hash_mb):
+    engine = LazySmpEngine(workers, hash_mb).start()
+
+    def search(board, depth=None, time_limit=None):
+        engine.clear()
+        return engine.search(board, time_limit=time_limit, depth=depth)
+    return engine, search
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Lazy SMP with single-process search")
+    parser.add_argument('--depth', type=int, default=5, help="depth for the time-to-depth measurement")
+    parser.add_argument('--seconds', type=float, default=2.0, help="search time per position for NPS")
+    parser.add_argument('--max-workers', type=int, default=None, help="defaults to the number of cores")
+    parser.add_argument('--hash', type=int, default=DEFAULT_HASH_MB, help="shared table size in MB")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    max_workers = args.max_workers or detect_cores()
+    worker_counts = []
+    workers = 1
+    while workers < max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    worker_counts.append(max_workers)
+
+    baseline = measure(single_process_search, args.depth, args.seconds)
+    results = {'single': baseline}
+    print(f"{'single':>8}: {baseline['nps']:10,.0f} nps  depth {args.depth} in {baseline['time_to_depth']:7.2f}s")
+    for workers in worker_counts:
+        engine, search = lazy_smp_search(workers, args.hash)
+        try:
+            result = measure(search, args.depth, args.seconds)
+        finally:
+            engine.close()
+        result['nps_speedup'] = result['nps'] / baseline['nps'] if baseline['nps'] else 0.0
+        result['depth_speedup'] = baseline['time_to_depth'] / result['time_to_depth'] if result['time_to_depth'] else 0.0
+        results[workers] = result
+        print(f"{workers:>8}: {result['nps']:10,.0f} nps ({result['nps_speedup']:4.2f}x)  "
+              f"depth {args.depth} in {result['time_to_depth']:7.2f}s ({result['depth_speedup']:4.2f}x)")
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
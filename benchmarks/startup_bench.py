@@ -0,0 +1,85 @@
+"""Startup benchmark: time from process launch to the first rendered frame.
+
+Run from the project root:
+
+    python -m benchmarks.startup_bench --runs 10 --output startup.json
+
+Each run starts a fresh interpreter under SDL's dummy video driver, so the
+numbers include interpreter start-up and imports, exactly as a user sees them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(wait_engine):
+    """Build the game, render one frame and report timestamps as JSON"""
+    marks = {'start': time.time()}
+    from src.core.game_controller import GameController
+    marks['imported'] = time.time()
+
+    game = GameController()
+    marks['constructed'] = time.time()
+    game.run_frame()
+    marks['first_frame'] = time.time()
+
+    if wait_engine:
+        game.engine.ready.wait(60)
+        marks['engine_ready'] = time.time()
+    game.engine.cleanup()
+    print(json.dumps(marks))
+
+
+def run_once(cache_dir, wait_engine):
+    """Launch one child process and return its phase timings in milliseconds"""
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy',
+               CHESS_AI_CACHE_DIR=cache_dir, CHESS_AI_SAVE_DIR=tempfile.mkdtemp())
+    command = [sys.executable, '-m', 'benchmarks.startup_bench', '--child']
+    if wait_engine:
+        command.append('--wait-engine')
+
+    launch = time.time()
+    output = subprocess.run(command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {name: (stamp - launch) * 1000 for name, stamp in marks.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time to first frame")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--cold', action='store_true', help="use an empty cache directory for every run")
+    parser.add_argument('--wait-engine', action='store_true', help="also measure time until the engine is ready")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.wait_engine)
+        return 0
+
+    shared_cache = tempfile.mkdtemp()
+    runs = [run_once(tempfile.mkdtemp() if args.cold else shared_cache, args.wait_engine)
+            for _ in range(args.runs)]
+
+    summary = {}
+    for phase in runs[0]:
+        values = [run[phase] for run in runs]
+        summary[phase] = {'min': min(values), 'median': statistics.median(values), 'max': max(values)}
+        print(f"{phase:12} min {min(values):8.1f}ms  median {statistics.median(values):8.1f}ms  "
+              f"max {max(values):8.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'runs': runs, 'summary': summary}, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
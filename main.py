@@ -1,6 +1,7 @@
-from src.core.game_controller import GameController
-
 def main():
+    # Imported on demand so importing this module stays cheap
+    from src.core.game_controller import GameController
+    
     # Create and run the game
     game = GameController()
     game.run()
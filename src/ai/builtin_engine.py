@@ -0,0 +1,306 @@
+import time
+import chess
+import chess.polyglot
+from ..utils.constants import PIECE_VALUES
+
+MATE_SCORE = 100000
+MAX_PLY = 64
+INFINITY = 10 ** 9
+
+# Transposition table entry bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Centipawn values from PIECE_VALUES, indexed by python-chess piece type
+PIECE_CENTIPAWNS = [0] + [100 * PIECE_VALUES[name] for name in chess.PIECE_NAMES[1:]]
+
+# Nodes searched between checks of the clock and the stop flag
+CHECK_INTERVAL = 1024
+
+
+def score_to_table(score, ply):
+    """Mate scores count plies from the root; the table stores them counted from the node"""
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -(MATE_SCORE - MAX_PLY):
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """Turn a stored mate score back into plies from the current root"""
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -(MATE_SCORE - MAX_PLY):
+        return score + ply
+    return score
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when the deadline passes or a stop is requested"""
+
+
+class MaterialEvaluator:
+    """Material balance from PIECE_VALUES, updated incrementally in make/unmake"""
+
+    def __init__(self):
+        self.material = 0
+        self.stack = []
+
+    def reset(self, board):
+        """Compute the balance (white minus black) of a root position"""
+        self.material = 0
+        self.stack = []
+        for piece in board.piece_map().values():
+            value = PIECE_CENTIPAWNS[piece.piece_type]
+            self.material += value if piece.color == chess.WHITE else -value
+
+    def push(self, board, move):
+        """Update the balance for a move about to be made on board"""
+        self.stack.append(self.material)
+        sign = 1 if board.turn == chess.WHITE else -1
+        if board.is_en_passant(move):
+            self.material += sign * PIECE_CENTIPAWNS[chess.PAWN]
+        else:
+            captured = board.piece_type_at(move.to_square)
+            if captured:
+                self.material += sign * PIECE_CENTIPAWNS[captured]
+        if move.promotion:
+            self.material += sign * (PIECE_CENTIPAWNS[move.promotion] - PIECE_CENTIPAWNS[chess.PAWN])
+
+    def pop(self):
+        """Restore the balance after a move was taken back"""
+        self.material = self.stack.pop()
+
+    def evaluate(self, board):
+        """Score of the position for the side to move, in centipawns"""
+        return self.material if board.turn == chess.WHITE else -self.material
+
+
+class TranspositionTable:
+    """Dictionary-backed transposition table"""
+
+    def __init__(self, max_entries=1 << 20):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def probe(self, key):
+        """Get (depth, score, bound, move) for a position hash, or None"""
+        return self.entries.get(key)
+
+    def store(self, key, depth, score, bound, move):
+        """Store a search result, preferring deeper entries"""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > depth:
+            return
+        if entry is None and len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = (depth, score, bound, move)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class BuiltinEngine:
+    """Iterative-deepening alpha-beta search running in-process on python-chess boards"""
+
+    def __init__(self, evaluator=None, table=None):
+        self.evaluator = evaluator or MaterialEvaluator()
+        self.table = table if table is not None else TranspositionTable()
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.stop_event = None
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+
+    def search(self, board, time_limit=None, depth=None, nodes=None, stop_event=None, start_depth=1,
+               info_callback=None):
+        """Search a position and return a result dict (move, score, depth, nodes, time, pv)"""
+        board = board.copy(stack=False)
+        start_time = time.perf_counter()
+        self.deadline = start_time + time_limit if time_limit else None
+        self.node_limit = nodes
+        self.stop_event = stop_event
+        self.nodes = 0
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.evaluator.reset(board)
+
+        legal_moves = list(board.legal_moves)
+        result = {'move': legal_moves[0] if legal_moves else None, 'score': 0, 'depth': 0,
+                  'nodes': 0, 'time': 0.0, 'pv': []}
+        if len(legal_moves) <= 1:
+            return result
+
+        max_depth = min(depth or MAX_PLY - 1, MAX_PLY - 1)
+        for current_depth in range(max(1, start_depth), max_depth + 1):
+            try:
+                score, move = self._root(board, current_depth, legal_moves)
+            except SearchStopped:
+                break
+            elapsed = time.perf_counter() - start_time
+            result = {'move': move, 'score': score, 'depth': current_depth, 'nodes': self.nodes,
+                      'time': elapsed, 'pv': self._principal_variation(board, current_depth)}
+            if info_callback:
+                info_callback(result)
+            if abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+
+        result['nodes'] = self.nodes
+        result['time'] = time.perf_counter() - start_time
+        return result
+
+    def _root(self, board, depth, legal_moves):
+        """Search every root move at a fixed depth"""
+        alpha, beta = -INFINITY, INFINITY
+        best_move = None
+        entry = self.table.probe(chess.polyglot.zobrist_hash(board))
+        ordered = self._order_moves(board, legal_moves, entry[3] if entry else None, 0)
+        for move in ordered:
+            self.evaluator.push(board, move)
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            finally:
+                board.pop()
+                self.evaluator.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        self.table.store(chess.polyglot.zobrist_hash(board), depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _check_limits(self):
+        if self.deadline and time.perf_counter() >= self.deadline:
+            raise SearchStopped()
+        if self.node_limit and self.nodes >= self.node_limit:
+            raise SearchStopped()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchStopped()
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        """Alpha-beta search returning a score for the side to move"""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        if board.is_repetition(2) or board.halfmove_clock >= 100:
+            return 0
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiescence(board, alpha, beta, ply)
+
+        key = chess.polyglot.zobrist_hash(board)
+        entry = self.table.probe(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, bound, tt_move = entry
+            entry_score = score_from_table(entry_score, ply)
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return entry_score
+                if bound == LOWER and entry_score >= beta:
+                    return entry_score
+                if bound == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        moves = list(board.legal_moves)
+        if not moves:
+            return -(MATE_SCORE - ply) if board.is_check() else 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        for move in self._order_moves(board, moves, tt_move, ply):
+            self.evaluator.push(board, move)
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+                self.evaluator.pop()
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not board.is_capture(move):
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, depth, score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply):
+        """Search captures until the position is quiet; in check, every evasion"""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        if ply >= MAX_PLY - 1:
+            return self.evaluator.evaluate(board)
+        if board.is_check():
+            # Standing pat is not an option when the king has to be saved
+            moves = list(board.legal_moves)
+            if not moves:
+                return -(MATE_SCORE - ply)
+        else:
+            stand_pat = self.evaluator.evaluate(board)
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves = list(board.generate_legal_captures())
+
+        for move in self._order_moves(board, moves, None, ply):
+            self.evaluator.push(board, move)
+            board.push(move)
+            try:
+                score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+                self.evaluator.pop()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _order_moves(self, board, moves, tt_move, ply):
+        """Order moves: hash move, captures by MVV-LVA, promotions, killers, the rest"""
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+
+        def priority(move):
+            if move == tt_move:
+                return 1000000
+            score = 0
+            if board.is_capture(move):
+                victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+                attacker = board.piece_type_at(move.from_square)
+                score += 10000 + 10 * PIECE_CENTIPAWNS[victim] - PIECE_CENTIPAWNS[attacker] // 10
+            elif move in killers:
+                score += 5000
+            if move.promotion:
+                score += 9000 + PIECE_CENTIPAWNS[move.promotion]
+            return score
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _principal_variation(self, board, depth):
+        """Follow hash moves from the root to build the principal variation"""
+        pv = []
+        board = board.copy(stack=False)
+        for _ in range(depth):
+            entry = self.table.probe(chess.polyglot.zobrist_hash(board))
+            if not entry or entry[3] is None or entry[3] not in board.legal_moves:
+                break
+            pv.append(entry[3])
+            board.push(entry[3])
+        return pv
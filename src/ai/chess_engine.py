@@ -1,99 +1,122 @@
-import chess
-import chess.engine
-import random
+import json
 import os
-from ..utils.constants import STOCKFISH_PATHS, STOCKFISH_SKILL_LEVEL
+import shutil
+import threading
+from .engine_supervisor import EngineSupervisor
+from ..utils.constants import PROJECT_ROOT, CACHE_DIR, STOCKFISH_PATHS, STOCKFISH_SKILL_LEVEL, ENGINE_START_TIMEOUT
+
+# Discovered engine paths, keyed by engine name
+ENGINE_CACHE_PATH = os.path.join(CACHE_DIR, "engines.json")
+
+STOCKFISH_CANDIDATES = [
+    os.path.join(PROJECT_ROOT, "engines", "stockfish.exe"),  # Windows
+    os.path.join(PROJECT_ROOT, "engines", "stockfish"),      # Linux/Mac
+    os.path.join(PROJECT_ROOT, "stockfish.exe"),            # Project root
+    os.path.join(PROJECT_ROOT, "stockfish")                 # Project root
+] + STOCKFISH_PATHS
+
+
+def _load_engine_cache():
+    """Load the cache of discovered engine paths"""
+    try:
+        with open(ENGINE_CACHE_PATH) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def find_engine(name, candidates):
+    """Find an engine executable, reusing the path found on a previous run"""
+    cache = _load_engine_cache()
+    cached = cache.get(name)
+    if cached and os.path.isfile(cached):
+        return cached
+
+    for path in candidates:
+        resolved = path if os.path.isfile(path) else shutil.which(path)
+        if resolved:
+            cache[name] = os.path.abspath(resolved)
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with open(ENGINE_CACHE_PATH, 'w') as handle:
+                    json.dump(cache, handle, indent=2)
+            except OSError as e:
+                print(f"Could not write engine cache: {str(e)}")
+            return cache[name]
+    return None
+
 
 class ChessEngine:
-    def __init__(self):
-        self.engine = None
-        self.initialize_engine()
-        
+    def __init__(self, background=True, supervisor=None):
+        # A supervisor passed in is shared with other users and not closed here
+        self.supervisor = supervisor
+        self.owns_supervisor = supervisor is None
+        self.ready = threading.Event()
+        if supervisor:
+            self.ready.set()
+        elif background:
+            # Launch and warm up the engine while the human plays the first move
+            threading.Thread(target=self.initialize_engine, name="engine-start", daemon=True).start()
+        else:
+            self.initialize_engine()
+
     def initialize_engine(self):
-        """Initialize the chess engine"""
+        """Find Stockfish and start a supervised engine process"""
+        self.ready.clear()
         try:
-            # Get the absolute path to the project root
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
-            print(f"Project root: {project_root}")  # Debug print
-            
-            # Try to find Stockfish
-            stockfish_paths = [
-                os.path.join(project_root, "engines", "stockfish.exe"),  # Windows
-                os.path.join(project_root, "engines", "stockfish"),      # Linux/Mac
-                os.path.join(project_root, "stockfish.exe"),            # Current directory
-                os.path.join(project_root, "stockfish")                 # Current directory
-            ]
-            
-            engine_found = False
-            for path in stockfish_paths:
-                print(f"Trying to load Stockfish from: {path}")
-                if os.path.exists(path):
-                    print(f"File exists at: {path}")
-                    try:
-                        self.engine = chess.engine.SimpleEngine.popen_uci(path)
-                        engine_found = True
-                        print(f"Successfully loaded Stockfish from: {path}")
-                        break
-                    except Exception as e:
-                        print(f"Failed to load Stockfish from {path}: {str(e)}")
-                        continue
-                else:
-                    print(f"File does not exist at: {path}")
-            
-            if not engine_found:
+            path = find_engine("stockfish", STOCKFISH_CANDIDATES)
+            if not path:
                 print("\nCould not find Stockfish engine. Please ensure it is installed in one of these locations:")
-                for path in stockfish_paths:
-                    print(f"- {path}")
+                for candidate in STOCKFISH_CANDIDATES:
+                    print(f"- {candidate}")
                 print("\nTo fix this:")
                 print("1. Download Stockfish from https://stockfishchess.org/download/")
                 print("2. Extract the executable")
                 print("3. Place it in the 'engines' folder in your project root")
                 print("4. Make sure it's named 'stockfish.exe' (Windows) or 'stockfish' (Linux/Mac)")
-                print(f"\nCurrent working directory: {os.getcwd()}")
                 return
-                
-            # Configure engine
-            self.engine.configure({"Threads": 4, "Hash": 128})
-            
+
+            # The supervisor configures the engine for this host, waits for
+            # it to allocate its hash table and restarts it if it dies
+            self.supervisor = EngineSupervisor(path, size=1).start(wait=True, timeout=ENGINE_START_TIMEOUT)
+            print(f"Successfully loaded Stockfish from: {path}")
+
         except Exception as e:
             print(f"Error initializing engine: {str(e)}")
-            self.engine = None
-            
+            self.supervisor = None
+        finally:
+            self.ready.set()
+
     def get_best_move(self, board, time_limit=1.0):
         """Get the best move from the engine"""
         try:
-            if not self.engine:
-                print("No engine available, initializing...")
-                self.initialize_engine()
-                if not self.engine:
-                    print("Failed to initialize engine")
-                    return None
-                    
-            # Get the best move
-            result = self.engine.play(board, chess.engine.Limit(time=time_limit))
+            import chess.engine
+
+            # Wait for the background start if it is still running
+            self.ready.wait(ENGINE_START_TIMEOUT)
+            if not self.supervisor:
+                print("No engine available")
+                return None
+
+            # A failed or hung engine is replaced in the background by the
+            # supervisor; this move is simply skipped
+            result = self.supervisor.play(board, chess.engine.Limit(time=time_limit))
             return result.move
-            
+
         except Exception as e:
             print(f"Error getting best move: {str(e)}")
-            # Try to restart the engine
-            self.cleanup()
-            self.initialize_engine()
             return None
-            
+
     def cleanup(self):
         """Clean up the engine"""
         try:
-            if self.engine:
-                try:
-                    self.engine.quit()
-                except Exception as e:
-                    print(f"Error during engine quit: {str(e)}")
-                finally:
-                    self.engine = None
+            if self.supervisor and self.owns_supervisor:
+                self.supervisor.close()
         except Exception as e:
             print(f"Error cleaning up engine: {str(e)}")
-            self.engine = None
-            
+        finally:
+            self.supervisor = None
+
     def __del__(self):
         """Destructor to ensure engine is cleaned up"""
-        self.cleanup() 
\ No newline at end of file
+        self.cleanup()
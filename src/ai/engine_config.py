@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import sys
+import time
+from ..utils.constants import CACHE_DIR, ENGINE_INSTANCES, STOCKFISH_PATHS
+
+# Best thread counts measured by the bench command, keyed by engine path
+TUNING_CACHE_PATH = os.path.join(CACHE_DIR, "engine_tuning.json")
+
+# Share of available memory given to engine hash tables, and hash limits in MB
+HASH_MEMORY_FRACTION = 0.5
+MIN_HASH_MB = 16
+MAX_HASH_MB = 4096
+DEFAULT_MEMORY_MB = 1024
+
+# A thread count within this fraction of the best NPS is preferred if smaller,
+# leaving cores free for other work when extra threads barely help
+NPS_TOLERANCE = 0.05
+
+BENCH_POSITIONS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+]
+
+
+def detect_cores():
+    """Number of cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def detect_available_memory_mb():
+    """Available physical memory in MB, or None if it cannot be determined"""
+    try:
+        with open('/proc/meminfo') as handle:
+            for line in handle:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _round_down_power_of_two(value):
+    """Largest power of two not greater than value (at least 1)"""
+    return 1 << max(0, int(value).bit_length() - 1)
+
+
+def _load_tuning():
+    """Load saved bench results"""
+    try:
+        with open(TUNING_CACHE_PATH) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _tuning_key(engine_path, cores):
+    return f"{os.path.abspath(engine_path)}|{cores}"
+
+
+def allocate(instances=ENGINE_INSTANCES, engine_path=None, cores=None, memory_mb=None):
+    """Split cores and memory between concurrently running engine instances"""
+    instances = max(1, instances)
+    cores = cores or detect_cores()
+    memory_mb = memory_mb or detect_available_memory_mb() or DEFAULT_MEMORY_MB
+
+    threads = max(1, cores // instances)
+    if engine_path:
+        tuned = _load_tuning().get(_tuning_key(engine_path, cores))
+        if tuned:
+            threads = max(1, min(threads, tuned['threads']))
+
+    hash_mb = _round_down_power_of_two(memory_mb * HASH_MEMORY_FRACTION / instances)
+    hash_mb = max(MIN_HASH_MB, min(MAX_HASH_MB, hash_mb))
+    return {"Threads": threads, "Hash": hash_mb}
+
+
+def configure_engine(engine, engine_path=None, instances=ENGINE_INSTANCES, extra=None):
+    """Apply the allocated Threads/Hash (and any extra options) the engine supports"""
+    options = allocate(instances, engine_path)
+    options.update(extra or {})
+    supported = {name: value for name, value in options.items() if name in engine.options}
+    engine.configure(supported)
+    return supported
+
+
+def measure_nps(engine, threads, seconds, positions=BENCH_POSITIONS):
+    """Average nodes per second over the bench positions at a thread count"""
+    import chess
+    import chess.engine
+
+    if 'Threads' in engine.options:
+        engine.configure({"Threads": threads})
+    engine.ping()
+
+    nodes = 0
+    elapsed = 0.0
+    for fen in positions:
+        start = time.perf_counter()
+        info = engine.analyse(chess.Board(fen), chess.engine.Limit(time=seconds))
+        duration = time.perf_counter() - start
+        if 'nps' in info and 'time' in info:
+            nodes += info['nps'] * info['time']
+            elapsed += info['time']
+        elif 'nodes' in info:
+            nodes += info['nodes']
+            elapsed += duration
+    return nodes / elapsed if elapsed else 0.0
+
+
+def bench(engine_path, seconds=1.0, max_threads=None, save=True):
+    """Measure NPS at doubling thread counts and save the best one"""
+    import chess.engine
+
+    cores = detect_cores()
+    max_threads = max_threads or cores
+    thread_counts = []
+    threads = 1
+    while threads < max_threads:
+        thread_counts.append(threads)
+        threads *= 2
+    thread_counts.append(max_threads)
+
+    results = {}
+    engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    try:
+        engine.configure({name: value for name, value in allocate(1, None, cores).items()
+                          if name in engine.options and name != 'Threads'})
+        for threads in thread_counts:
+            results[threads] = measure_nps(engine, threads, seconds)
+            print(f"Threads {threads:3}: {results[threads]:14,.0f} nps")
+    finally:
+        engine.quit()
+
+    best_nps = max(results.values())
+    best_threads = min(threads for threads, nps in results.items() if nps >= best_nps * (1 - NPS_TOLERANCE))
+    print(f"Best: {best_threads} threads ({results[best_threads]:,.0f} nps)")
+
+    if save:
+        tuning = _load_tuning()
+        tuning[_tuning_key(engine_path, cores)] = {
+            'threads': best_threads,
+            'nps': {str(threads): nps for threads, nps in results.items()},
+            'measured': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(TUNING_CACHE_PATH, 'w') as handle:
+            json.dump(tuning, handle, indent=2)
+    return best_threads, results
+
+
+def main(argv=None):
+    from .chess_engine import find_engine, STOCKFISH_CANDIDATES
+
+    parser = argparse.ArgumentParser(description="Engine Threads/Hash configuration")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    show_parser = subparsers.add_parser('show', help="Show the options allocated per engine instance")
+    show_parser.add_argument('--instances', type=int, default=ENGINE_INSTANCES)
+    show_parser.add_argument('--engine', default=None)
+
+    bench_parser = subparsers.add_parser('bench', help="Measure NPS per thread count and save the best")
+    bench_parser.add_argument('--engine', default=None)
+    bench_parser.add_argument('--seconds', type=float, default=1.0, help="search time per bench position")
+    bench_parser.add_argument('--max-threads', type=int, default=None)
+    bench_parser.add_argument('--no-save', action='store_true')
+
+    args = parser.parse_args(argv)
+    engine_path = args.engine or find_engine("stockfish", STOCKFISH_CANDIDATES)
+
+    if args.command == 'show':
+        print(f"Cores: {detect_cores()}, available memory: {detect_available_memory_mb()} MB")
+        print(f"Per instance ({args.instances} instances): {allocate(args.instances, engine_path)}")
+        return 0
+
+    if not engine_path:
+        print("No engine found; pass --engine")
+        return 1
+    bench(engine_path, args.seconds, args.max_threads, save=not args.no_save)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
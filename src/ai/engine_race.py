@@ -0,0 +1,138 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .engine_registry import create_backend, ENGINE_BACKENDS
+from ..utils.constants import AI_BACKENDS, AI_RACE_POLICY, ENGINE_START_TIMEOUT
+
+# How a race picks its winner:
+#   first      the first backend to return a move
+#   deepest    the result searched to the greatest depth (ties: more nodes)
+#   confident  the result whose predicted outcome is most certain (mates
+#              first, then the largest win/draw/loss probability)
+RACE_POLICIES = ('first', 'deepest', 'confident')
+
+# Seconds a race waits past its deadline for backends to report
+RACE_GRACE = 0.5
+
+
+def confidence(result):
+    """How certain a result is about the outcome, from 0 to 1"""
+    if result['mate'] is not None:
+        return 1.0
+    if result['wdl'] is not None:
+        return max(result['wdl']) / 1000
+    if result['score'] is None:
+        return 0.0
+    import chess.engine
+    wdl = chess.engine.Cp(int(result['score'])).wdl(model='sf', ply=30)
+    return max(wdl.wins, wdl.draws, wdl.losses) / 1000
+
+
+def pick_winner(results, policy):
+    """Choose one result from a finished race"""
+    results = [result for result in results if result['move'] is not None]
+    if not results:
+        return None
+    if policy == 'deepest':
+        return max(results, key=lambda result: (result['depth'], result['nodes']))
+    if policy == 'confident':
+        return max(results, key=lambda result: (confidence(result), result['depth']))
+    return results[0]
+
+
+def race(backends, board, time_limit, policy=AI_RACE_POLICY, executor=None):
+    """Search a position on several backends at once and return (winner, all results)"""
+    import chess.engine
+
+    if policy not in RACE_POLICIES:
+        raise ValueError(f"Unknown race policy '{policy}' (expected one of {', '.join(RACE_POLICIES)})")
+
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=len(backends), thread_name_prefix="engine-race")
+    limit = chess.engine.Limit(time=time_limit)
+    deadline = time.monotonic() + time_limit + RACE_GRACE
+    pending = {executor.submit(backend.search, board.copy(), limit): backend for backend in backends}
+    results = []
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Engine backend {backend.name} failed: {str(e)}")
+            if policy == 'first' and any(result['move'] is not None for result in results):
+                break
+    finally:
+        # Backends still running are told to stop; they are bounded by the
+        # same time limit either way
+        for backend in pending.values():
+            backend.stop()
+        if own_executor:
+            executor.shutdown(wait=False)
+    return pick_winner(results, policy), results
+
+
+class RacingEngine:
+    """ChessEngine-compatible AI that races the configured backends"""
+
+    def __init__(self, names=AI_BACKENDS, policy=AI_RACE_POLICY, background=True):
+        self.names = list(names)
+        self.policy = policy
+        self.backends = []
+        self.executor = None
+        self.ready = threading.Event()
+        if background:
+            threading.Thread(target=self.initialize_engine, name="engine-start", daemon=True).start()
+        else:
+            self.initialize_engine()
+
+    def initialize_engine(self):
+        """Start every configured backend that is available"""
+        try:
+            for name in self.names:
+                if name not in ENGINE_BACKENDS or not ENGINE_BACKENDS[name].is_available():
+                    print(f"Engine backend '{name}' is not available, skipping")
+                    continue
+                try:
+                    self.backends.append(create_backend(name).start())
+                except Exception as e:
+                    print(f"Failed to start engine backend '{name}': {str(e)}")
+            if self.backends:
+                self.executor = ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix="engine-race")
+                print(f"Racing engine backends: {', '.join(backend.name for backend in self.backends)} "
+                      f"(policy: {self.policy})")
+        finally:
+            self.ready.set()
+
+    def get_best_move(self, board, time_limit=1.0):
+        """Get the best move from the race"""
+        try:
+            self.ready.wait(ENGINE_START_TIMEOUT)
+            if not self.backends:
+                print("No engine backend available")
+                return None
+            winner, _ = race(self.backends, board, time_limit, self.policy, self.executor)
+            if winner is None:
+                return None
+            print(f"Race won by {winner['backend']} (depth {winner['depth']})")
+            return winner['move']
+        except Exception as e:
+            print(f"Error getting best move: {str(e)}")
+            return None
+
+    def cleanup(self):
+        """Stop all backends"""
+        for backend in self.backends:
+            try:
+                backend.stop()
+                backend.close()
+            except Exception as e:
+                print(f"Error closing engine backend {backend.name}: {str(e)}")
+        self.backends = []
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
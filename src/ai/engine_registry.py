@@ -0,0 +1,234 @@
+import os
+import threading
+from .builtin_engine import BuiltinEngine, MATE_SCORE
+from .chess_engine import find_engine, STOCKFISH_CANDIDATES
+from .engine_supervisor import get_shared_supervisor
+from .fake_engine import FAKE_ENGINE_COMMAND
+from .lazy_smp import LazySmpEngine
+from ..utils.constants import LCO_PATHS, ENGINE_START_TIMEOUT, NNUE_PATH
+
+# Registered backend classes, keyed by name
+ENGINE_BACKENDS = {}
+
+
+def register_backend(name):
+    """Class decorator adding an EngineBackend subclass to the registry"""
+    def decorator(cls):
+        cls.name = name
+        ENGINE_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def create_backend(name, **kwargs):
+    """Create a registered backend by name"""
+    if name not in ENGINE_BACKENDS:
+        raise ValueError(f"Unknown engine backend '{name}' (available: {', '.join(ENGINE_BACKENDS)})")
+    return ENGINE_BACKENDS[name](**kwargs)
+
+
+def available_backends():
+    """Names of the registered backends that can run on this machine"""
+    return [name for name, cls in ENGINE_BACKENDS.items() if cls.is_available()]
+
+
+def make_result(backend, move, score=None, depth=0, nodes=0, time=0.0, pv=None, mate=None, wdl=None):
+    """Build the search result dict shared by all backends"""
+    return {
+        'backend': backend,
+        'move': move,
+        'score': score,     # centipawns for the side to move (mates as +/- MATE_SCORE - plies)
+        'mate': mate,       # moves to mate for the side to move, if any
+        'depth': depth,
+        'nodes': nodes,
+        'time': time,
+        'pv': pv or [],
+        'wdl': wdl          # (wins, draws, losses) per mille, if the engine reported it
+    }
+
+
+class EngineBackend:
+    """Common interface for every AI backend"""
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def start(self):
+        """Prepare the backend (start processes, load weights); returns self"""
+        return self
+
+    def search(self, board, limit, info_callback=None):
+        """Search a python-chess board under a chess.engine.Limit and return a result dict
+
+        info_callback, if given, is called with a result dict for every
+        intermediate result the backend reports while searching.
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """Ask a running search to return as soon as possible"""
+
+    def close(self):
+        """Release the backend's resources"""
+
+
+class UciBackend(EngineBackend):
+    """Backend driving an external UCI engine through a shared supervised pool"""
+    candidates = []
+    options = {}
+
+    def __init__(self, command=None, pool_size=1):
+        self.command = command or find_engine(self.name, self.candidates)
+        self.pool_size = pool_size
+        self.supervisor = None
+        # Handle of the running analysis, so stop() can end it early
+        self.analysis = None
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def is_available(cls):
+        return find_engine(cls.name, cls.candidates) is not None
+
+    def start(self):
+        if not self.command:
+            raise RuntimeError(f"No {self.name} executable found")
+        self.supervisor = get_shared_supervisor(self.command, self.pool_size, self.options)
+        self.supervisor.ready.wait(ENGINE_START_TIMEOUT)
+        return self
+
+    def search(self, board, limit, info_callback=None):
+        self.stopped.clear()
+
+        def stream(engine, board, limit):
+            with engine.analysis(board, limit) as analysis:
+                with self.lock:
+                    self.analysis = analysis
+                # A stop() that came before the analysis started still applies
+                if self.stopped.is_set():
+                    analysis.stop()
+                try:
+                    for info in analysis:
+                        if info_callback is not None and info.get('pv'):
+                            info_callback(self._result(info))
+                    analysis.wait()
+                finally:
+                    with self.lock:
+                        self.analysis = None
+                return analysis.info
+        return self._result(self.supervisor.request(stream, board, limit))
+
+    def stop(self):
+        self.stopped.set()
+        with self.lock:
+            if self.analysis is not None:
+                self.analysis.stop()
+
+    def _result(self, info):
+        """Convert a python-chess info dict into a result dict"""
+        pv = info.get('pv') or []
+        score = info.get('score')
+        relative = score.relative if score is not None else None
+        wdl = info.get('wdl')
+        return make_result(
+            self.name,
+            pv[0] if pv else None,
+            relative.score(mate_score=MATE_SCORE) if relative is not None else None,
+            info.get('depth', 0),
+            info.get('nodes', 0),
+            info.get('time', 0.0),
+            pv,
+            relative.mate() if relative is not None else None,
+            tuple(wdl.relative) if wdl is not None else None
+        )
+
+
+@register_backend('stockfish')
+class StockfishBackend(UciBackend):
+    candidates = STOCKFISH_CANDIDATES
+
+
+@register_backend('lc0')
+class Lc0Backend(UciBackend):
+    candidates = LCO_PATHS
+    options = {'UCI_ShowWDL': True}
+
+
+@register_backend('fake')
+class FakeBackend(UciBackend):
+    """Random-move test engine (src/ai/fake_engine.py)"""
+
+    def __init__(self, command=None, pool_size=1):
+        super().__init__(command or FAKE_ENGINE_COMMAND, pool_size)
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+
+@register_backend('builtin')
+class BuiltinBackend(EngineBackend):
+    """In-process alpha-beta search (src/ai/builtin_engine.py)"""
+
+    def __init__(self, engine=None):
+        self.engine = engine or BuiltinEngine()
+        self.stop_event = threading.Event()
+
+    def search(self, board, limit, info_callback=None):
+        self.stop_event.clear()
+        kwargs = {}
+        if info_callback is not None:
+            kwargs['info_callback'] = lambda result: info_callback(self._result(result))
+        result = self.engine.search(board, time_limit=limit.time, depth=limit.depth, nodes=limit.nodes,
+                                    stop_event=self.stop_event, **kwargs)
+        return self._result(result)
+
+    def _result(self, result):
+        """Convert a BuiltinEngine result into a result dict"""
+        score = result['score']
+        mate = None
+        if abs(score) >= MATE_SCORE - 64:
+            plies = MATE_SCORE - abs(score)
+            mate = (plies + 1) // 2 if score > 0 else -(plies // 2)
+        return make_result(self.name, result['move'], score, result['depth'], result['nodes'],
+                           result['time'], result['pv'], mate)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+@register_backend('nnue')
+class NnueBackend(BuiltinBackend):
+    """Builtin search scored by a quantised network (src/ai/nnue.py)"""
+
+    def __init__(self, engine=None, path=None):
+        super().__init__(engine)
+        self.path = path or NNUE_PATH
+
+    @classmethod
+    def is_available(cls):
+        return os.path.exists(NNUE_PATH)
+
+    def start(self):
+        from .nnue import Network, NnueEvaluator
+        if not os.path.exists(self.path):
+            raise RuntimeError(f"No network at {self.path} (train one with python -m src.ai.nnue_train)")
+        self.engine.evaluator = NnueEvaluator(Network.load(self.path))
+        return self
+
+
+@register_backend('lazy_smp')
+class LazySmpBackend(BuiltinBackend):
+    """Builtin search on one process per core sharing a table (src/ai/lazy_smp.py)"""
+
+    def __init__(self, engine=None):
+        super().__init__(engine or LazySmpEngine())
+
+    def start(self):
+        self.engine.start()
+        return self
+
+    def close(self):
+        self.engine.close()
@@ -0,0 +1,272 @@
+import atexit
+import functools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from .engine_config import configure_engine
+from ..utils.constants import ENGINE_INSTANCES
+
+# Seconds allowed on top of a request's search time before the engine is
+# considered hung, and the deadline for requests without a time limit
+REQUEST_MARGIN = 2.0
+DEFAULT_REQUEST_DEADLINE = 30.0
+
+# Seconds allowed for a process to start and answer isready
+START_TIMEOUT = 10.0
+
+# Seconds between health checks of idle engines
+HEALTH_INTERVAL = 5.0
+
+# Restart backoff after failed starts, doubling up to the maximum
+BACKOFF_START = 0.5
+BACKOFF_MAX = 30.0
+
+
+class EngineUnavailable(Exception):
+    """No healthy engine could be handed out in time"""
+
+
+class EngineTimeout(Exception):
+    """An engine missed its request deadline and was killed"""
+
+
+class EngineSupervisor:
+    """Pool of pre-started UCI processes that are health-checked and replaced in the background"""
+
+    def __init__(self, command, size=1, options=None, instances=None):
+        self.command = command
+        self.size = size
+        self.options = options or {}
+        self.instances = instances or size
+
+        self.ready = threading.Event()
+        self.stats = {
+            'started': 0,
+            'failed_starts': 0,
+            'crashes': 0,
+            'timeouts': 0,
+            'requests': 0
+        }
+
+        self._idle = queue.Queue()
+        self._replacements = queue.Queue()
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._engines = set()
+        self._failures = 0
+        self._threads = []
+        # Requests run on their own threads so a hung engine can be timed out
+        self._executor = ThreadPoolExecutor(max_workers=2 * size, thread_name_prefix="engine-request")
+
+    def start(self, wait=False, timeout=START_TIMEOUT):
+        """Start the pool; with wait=True block until one engine is ready"""
+        for _ in range(self.size):
+            self._replacements.put(None)
+        for index in range(min(self.size, os.cpu_count() or 1)):
+            self._spawn_thread(self._replace_loop, f"engine-replace-{index}")
+        self._spawn_thread(self._health_loop, "engine-health")
+        if wait:
+            self.ready.wait(timeout)
+        return self
+
+    def _spawn_thread(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _start_engine(self):
+        """Launch one engine process, configure it and wait for readyok"""
+        import chess.engine
+
+        engine = chess.engine.SimpleEngine.popen_uci(self.command, timeout=START_TIMEOUT)
+        try:
+            engine_path = self.command if isinstance(self.command, str) else None
+            configure_engine(engine, engine_path, self.instances, self.options)
+            engine.ping()
+        except Exception:
+            self._kill(engine)
+            raise
+        return engine
+
+    def _replace_loop(self):
+        """Start engines for every free slot, backing off while starts keep failing"""
+        while not self._closed.is_set():
+            try:
+                self._replacements.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                engine = self._start_engine()
+            except Exception as e:
+                with self._lock:
+                    self._failures += 1
+                    delay = min(BACKOFF_MAX, BACKOFF_START * 2 ** (self._failures - 1))
+                self._count('failed_starts')
+                print(f"Engine start failed ({str(e)}), retrying in {delay:.1f}s")
+                self._closed.wait(delay)
+                self._replacements.put(None)
+                continue
+
+            with self._lock:
+                self._failures = 0
+                if self._closed.is_set():
+                    self._kill(engine)
+                    return
+                self._engines.add(engine)
+            self._count('started')
+            self._idle.put(engine)
+            self.ready.set()
+
+    def _health_loop(self):
+        """Periodically ping idle engines and replace the ones that do not answer"""
+        while not self._closed.wait(HEALTH_INTERVAL):
+            for _ in range(self._idle.qsize()):
+                try:
+                    engine = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._is_healthy(engine):
+                    self._idle.put(engine)
+                else:
+                    self._count('crashes')
+                    self._discard(engine)
+
+    def _is_healthy(self, engine, timeout=START_TIMEOUT):
+        """Check that the process is alive and answers isready"""
+        if engine.returncode.done():
+            return False
+        try:
+            self._executor.submit(engine.ping).result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def _kill(self, engine):
+        """Stop an engine process without waiting for it to cooperate"""
+        try:
+            engine.close()
+        except Exception as e:
+            print(f"Error closing engine: {str(e)}")
+
+    def _discard(self, engine, pending=None):
+        """Kill an engine and schedule a replacement"""
+        with self._lock:
+            self._engines.discard(engine)
+        if pending is not None:
+            # Kill the process first so the pending request fails cleanly
+            # before the engine's event loop is shut down
+            try:
+                engine.protocol.loop.call_soon_threadsafe(engine.transport.kill)
+                pending.exception(timeout=START_TIMEOUT)
+            except Exception:
+                pass
+        self._kill(engine)
+        if not self._closed.is_set():
+            self._replacements.put(None)
+
+    def acquire(self, timeout=None):
+        """Take a ready engine out of the pool"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                engine = self._idle.get(timeout=remaining)
+            except queue.Empty:
+                raise EngineUnavailable(f"No engine became available within {timeout}s")
+            # A process that died while idle is replaced rather than handed out
+            if engine.returncode.done():
+                self._count('crashes')
+                self._discard(engine)
+                continue
+            return engine
+
+    def release(self, engine):
+        """Return a healthy engine to the pool"""
+        if self._closed.is_set():
+            self._kill(engine)
+        else:
+            self._idle.put(engine)
+
+    def request(self, method, board, limit, deadline=None, acquire_timeout=None, **kwargs):
+        """Run engine.play/engine.analyse on a pooled engine under a deadline
+
+        method is the name of an engine method, or a function called as
+        method(engine, board, limit, **kwargs). The deadline covers waiting
+        for an engine as well as the search; acquire_timeout can limit the
+        wait further.
+        """
+        if deadline is None:
+            deadline = limit.time + REQUEST_MARGIN if limit.time is not None else DEFAULT_REQUEST_DEADLINE
+        self._count('requests')
+
+        started = time.monotonic()
+        engine = self.acquire(deadline if acquire_timeout is None else min(acquire_timeout, deadline))
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            self.release(engine)
+            raise EngineUnavailable(f"No engine became available within {deadline:.1f}s")
+        call = getattr(engine, method) if isinstance(method, str) else functools.partial(method, engine)
+        future = self._executor.submit(call, board, limit, **kwargs)
+        try:
+            result = future.result(timeout=remaining)
+        except FutureTimeout:
+            self._count('timeouts')
+            self._discard(engine, future)
+            raise EngineTimeout(f"Engine did not answer within {deadline:.1f}s")
+        except Exception:
+            self._count('crashes')
+            self._discard(engine)
+            raise
+        self.release(engine)
+        return result
+
+    def play(self, board, limit, deadline=None, **kwargs):
+        """Get a move from a pooled engine"""
+        return self.request('play', board, limit, deadline, **kwargs)
+
+    def analyse(self, board, limit, deadline=None, **kwargs):
+        """Analyse a position on a pooled engine"""
+        return self.request('analyse', board, limit, deadline, **kwargs)
+
+    def close(self):
+        """Stop all engines and background threads"""
+        self._closed.set()
+        with self._lock:
+            engines = list(self._engines)
+            self._engines.clear()
+        for engine in engines:
+            self._kill(engine)
+        self._executor.shutdown(wait=False)
+
+
+_shared_supervisors = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_supervisor(command, size=ENGINE_INSTANCES, options=None):
+    """Get the process-wide pool for an engine command, starting it on first use"""
+    key = (command if isinstance(command, str) else tuple(command), tuple(sorted((options or {}).items())))
+    with _shared_lock:
+        supervisor = _shared_supervisors.get(key)
+        if supervisor is None or supervisor._closed.is_set():
+            supervisor = EngineSupervisor(command, size, options).start()
+            _shared_supervisors[key] = supervisor
+        return supervisor
+
+
+def close_shared_supervisors():
+    """Stop every shared pool"""
+    with _shared_lock:
+        for supervisor in _shared_supervisors.values():
+            supervisor.close()
+        _shared_supervisors.clear()
+
+
+atexit.register(close_shared_supervisors)
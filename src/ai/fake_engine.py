@@ -0,0 +1,96 @@
+"""Minimal UCI engine that plays random legal moves and can misbehave on purpose.
+
+Used to exercise the engine supervisor without a real engine:
+
+    python src/ai/fake_engine.py --crash-after 3      # exit on the 3rd "go"
+    python src/ai/fake_engine.py --hang-after 2       # stop answering on the 2nd "go"
+    python src/ai/fake_engine.py --crash-on-start     # exit before "uciok"
+
+This file only depends on python-chess so it can be launched as a plain script.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import chess
+
+# Command line that launches this engine, for popen_uci() and the supervisor
+FAKE_ENGINE_COMMAND = [sys.executable, os.path.abspath(__file__)]
+
+
+def fake_engine_command(*args):
+    """Command line for the fake engine with extra arguments"""
+    return FAKE_ENGINE_COMMAND + [str(arg) for arg in args]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random-move UCI engine for testing")
+    parser.add_argument('--crash-on-start', action='store_true')
+    parser.add_argument('--crash-after', type=int, default=0, help="exit on the Nth go command")
+    parser.add_argument('--hang-after', type=int, default=0, help="stop responding on the Nth go command")
+    parser.add_argument('--think', type=float, default=0.01, help="seconds to think per move")
+    parser.add_argument('--nps', type=int, default=100000, help="nodes per second to report per thread")
+    args = parser.parse_args(argv)
+
+    if args.crash_on_start:
+        return 3
+
+    board = chess.Board()
+    threads = 1
+    searches = 0
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+        command = tokens[0]
+
+        if command == 'uci':
+            print("id name FakeEngine")
+            print("id author python-chess-ai")
+            print("option name Threads type spin default 1 min 1 max 512")
+            print("option name Hash type spin default 16 min 1 max 33554432")
+            print("uciok", flush=True)
+        elif command == 'isready':
+            print("readyok", flush=True)
+        elif command == 'setoption' and len(tokens) >= 5 and tokens[2] == 'Threads':
+            threads = int(tokens[4])
+        elif command == 'ucinewgame':
+            board = chess.Board()
+        elif command == 'position':
+            if tokens[1] == 'startpos':
+                board = chess.Board()
+                rest = tokens[2:]
+            else:
+                board = chess.Board(' '.join(tokens[2:8]))
+                rest = tokens[8:]
+            if rest and rest[0] == 'moves':
+                for uci in rest[1:]:
+                    board.push_uci(uci)
+        elif command == 'go':
+            searches += 1
+            if args.crash_after and searches >= args.crash_after:
+                return 1
+            if args.hang_after and searches >= args.hang_after:
+                while True:
+                    time.sleep(3600)
+
+            moves = list(board.legal_moves)
+            time.sleep(args.think)
+            nps = args.nps * threads
+            elapsed_ms = max(1, int(args.think * 1000))
+            if moves:
+                move = random.choice(moves)
+                print(f"info depth 1 score cp 0 nodes {nps * elapsed_ms // 1000} nps {nps} "
+                      f"time {elapsed_ms} pv {move.uci()}")
+                print(f"bestmove {move.uci()}", flush=True)
+            else:
+                print("bestmove 0000", flush=True)
+        elif command == 'quit':
+            break
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
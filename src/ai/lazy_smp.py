@@ -0,0 +1,254 @@
+import multiprocessing
+import queue
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+import chess
+from .builtin_engine import BuiltinEngine
+from .engine_config import detect_cores
+from ..core.move_codec import encode_chess_move, decode_chess_move
+
+# Shared table size in MB when none is given
+DEFAULT_HASH_MB = 64
+
+# Each entry is two 64-bit words: key XOR data, then data. A reader that
+# sees half of a concurrent write gets a mismatching key and treats the
+# entry as empty, so no locks are needed
+ENTRY_BYTES = 16
+
+# Packed entry data:
+#   bits 0-15   move (src/core/move_codec.py layout, 0 = none)
+#   bits 16-17  bound
+#   bits 18-25  depth
+#   bits 26-57  score + SCORE_OFFSET
+BOUND_SHIFT = 16
+DEPTH_SHIFT = 18
+SCORE_SHIFT = 26
+SCORE_OFFSET = 1 << 31
+
+# Seconds between checks of the caller's stop flag while waiting for workers
+POLL_INTERVAL = 0.05
+
+# Seconds workers get to report after being told to stop
+STOP_GRACE = 2.0
+
+# Workers are never forked from the caller: the GUI runs threads (AI moves,
+# engine supervisors) whose locks a forked child could inherit held
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class SharedTranspositionTable:
+    """Lockless transposition table in shared memory, usable from several processes
+
+    Has the same probe/store/clear interface as builtin_engine.TranspositionTable.
+    """
+
+    def __init__(self, size_mb=DEFAULT_HASH_MB, name=None):
+        self.size_mb = size_mb
+        # Power-of-two entry count so the slot is a mask of the key
+        self.entries = 1 << max(0, (size_mb * 1024 * 1024 // ENTRY_BYTES).bit_length() - 1)
+        self.mask = self.entries - 1
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.entries * ENTRY_BYTES)
+        elif sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Attach without registering the block with the resource tracker
+            # (track=False from Python 3.13): only the creator may unlink it.
+            # The tracker is shared with the creating process, so a worker's
+            # unregister would also drop the creator's registration
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                self.shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        self.words = self.shm.buf[:self.entries * ENTRY_BYTES].cast('Q')
+        if self.owner:
+            self.clear()
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __reduce__(self):
+        # Worker processes attach to the same block by name
+        return (self.__class__, (self.size_mb, self.name))
+
+    def probe(self, key):
+        """Get (depth, score, bound, move) for a position hash, or None"""
+        index = (key & self.mask) << 1
+        data = self.words[index + 1]
+        if not data or self.words[index] ^ data != key:
+            return None
+        return (
+            (data >> DEPTH_SHIFT) & 0xFF,
+            (data >> SCORE_SHIFT) - SCORE_OFFSET,
+            (data >> BOUND_SHIFT) & 0x3,
+            decode_chess_move(data & 0xFFFF) if data & 0xFFFF else None
+        )
+
+    def store(self, key, depth, score, bound, move):
+        """Store a search result, keeping a deeper entry for the same position"""
+        index = (key & self.mask) << 1
+        old = self.words[index + 1]
+        if old and self.words[index] ^ old == key and (old >> DEPTH_SHIFT) & 0xFF > depth:
+            return
+        data = (
+            (encode_chess_move(move) if move else 0)
+            | bound << BOUND_SHIFT
+            | min(depth, 0xFF) << DEPTH_SHIFT
+            | (score + SCORE_OFFSET) << SCORE_SHIFT
+        )
+        self.words[index] = key ^ data
+        self.words[index + 1] = data
+
+    def clear(self):
+        self.shm.buf[:self.entries * ENTRY_BYTES] = bytes(self.entries * ENTRY_BYTES)
+
+    def close(self):
+        """Detach from the shared block, removing it if this table created it"""
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker(index, table, jobs, results, stop_event):
+    """Search every job from the queue on the shared table until told to exit"""
+    engine = BuiltinEngine(table=table)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, fen, time_limit, depth, nodes = job
+
+        def report(result):
+            results.put((job_id, index, result, False))
+
+        # Helpers with odd indexes start one ply deeper, so the workers are
+        # spread over two depths and fill the table for each other
+        try:
+            result = engine.search(chess.Board(fen), time_limit, depth, nodes, stop_event,
+                                   start_depth=1 + index % 2, info_callback=report)
+        except Exception as e:
+            print(f"Search worker {index} failed: {str(e)}")
+            result = None
+        results.put((job_id, index, result, True))
+
+
+class LazySmpEngine:
+    """Lazy SMP: the builtin search run on several processes sharing one table
+
+    Every worker searches the whole root position; they only cooperate
+    through the shared transposition table. The deepest completed result
+    is returned when the time runs out.
+    """
+
+    def __init__(self, workers=None, hash_mb=DEFAULT_HASH_MB):
+        self.workers = workers or detect_cores()
+        self.hash_mb = hash_mb
+        self.table = None
+        self.processes = []
+        self.job_queues = []
+        self.results = None
+        self.stop_event = None
+        self.job_id = 0
+
+    def start(self):
+        """Create the shared table and start the worker processes"""
+        context = multiprocessing.get_context(START_METHOD)
+        self.table = SharedTranspositionTable(self.hash_mb)
+        self.results = context.Queue()
+        self.stop_event = context.Event()
+        for index in range(self.workers):
+            jobs = context.Queue()
+            process = context.Process(target=_worker, name=f"lazy-smp-{index}", daemon=True,
+                                      args=(index, self.table, jobs, self.results, self.stop_event))
+            process.start()
+            self.job_queues.append(jobs)
+            self.processes.append(process)
+        return self
+
+    def search(self, board, time_limit=None, depth=None, nodes=None, stop_event=None, info_callback=None):
+        """Search a position on all workers and return the deepest result
+
+        The result dict matches BuiltinEngine.search, with nodes summed
+        over all workers. info_callback is called whenever the best result
+        improves.
+        """
+        if not self.processes:
+            self.start()
+        self.job_id += 1
+        self.stop_event.clear()
+        start_time = time.perf_counter()
+        deadline = start_time + time_limit if time_limit else None
+        worker_nodes = nodes // self.workers if nodes else None
+        for jobs in self.job_queues:
+            jobs.put((self.job_id, board.fen(), time_limit, depth, worker_nodes))
+
+        best = None
+        nodes_by_worker = {}
+        finished = set()
+        stop_time = None
+        while len(finished) < self.workers:
+            now = time.perf_counter()
+            stop_requested = stop_event is not None and stop_event.is_set()
+            if stop_time is None and ((deadline and now >= deadline) or stop_requested):
+                self.stop_event.set()
+                stop_time = now
+            if stop_time is not None and now - stop_time > STOP_GRACE:
+                print(f"Search workers did not stop within {STOP_GRACE}s")
+                break
+            try:
+                job_id, index, result, done = self.results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if job_id != self.job_id:
+                continue
+            if done:
+                finished.add(index)
+            if result is None:
+                continue
+            nodes_by_worker[index] = result['nodes']
+            if result['move'] is not None and (best is None or result['depth'] > best['depth']
+                                               or (result['depth'] == best['depth'] and result['score'] > best['score'])):
+                best = result
+                if info_callback:
+                    info_callback(dict(best, nodes=sum(nodes_by_worker.values()),
+                                       time=time.perf_counter() - start_time))
+            # Time-to-depth: the first worker to finish the target depth ends the search
+            if depth and result['depth'] >= depth and stop_time is None:
+                self.stop_event.set()
+                stop_time = time.perf_counter()
+
+        if best is None:
+            legal_moves = list(board.legal_moves)
+            best = {'move': legal_moves[0] if legal_moves else None, 'score': 0, 'depth': 0,
+                    'nodes': 0, 'time': 0.0, 'pv': []}
+        best = dict(best)
+        best['nodes'] = sum(nodes_by_worker.values())
+        best['time'] = time.perf_counter() - start_time
+        return best
+
+    def clear(self):
+        """Forget everything in the shared table (e.g. for a new game)"""
+        if self.table is not None:
+            self.table.clear()
+
+    def close(self):
+        """Stop the workers and release the shared table"""
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for jobs in self.job_queues:
+            jobs.put(None)
+        for process in self.processes:
+            process.join(STOP_GRACE)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.job_queues = []
+        if self.table is not None:
+            self.table.close()
+            self.table = None
@@ -0,0 +1,215 @@
+import chess
+import numpy as np
+from ..utils.constants import PIECE_VALUES
+
+# Input features: one per (color relative to the perspective, piece type, square)
+FEATURES = 2 * 6 * 64
+
+# Default layer sizes: FEATURES -> HIDDEN per perspective -> L1 -> 1
+DEFAULT_HIDDEN = 128
+DEFAULT_L1 = 32
+
+# Quantisation: activations are clipped to [0, QA] (1.0 in the float network),
+# hidden-layer weights are scaled by QB
+QA = 255
+QB = 64
+
+# Centipawns per unit of float network output for freshly trained networks
+DEFAULT_OUTPUT_SCALE = 400
+
+# Largest float weight of the dense layers that still fits in int16 after
+# quantisation without overflowing the int32 sums
+DENSE_WEIGHT_LIMIT = 127 / QB
+
+# Material network (see material_network): accumulator units per piece, so ten
+# pieces of a type still fit below QA, and output weight per pawn of value,
+# so a queen stays below the dense weight limit
+MATERIAL_COUNT_STEP = 25
+MATERIAL_VALUE_STEP = 12
+
+
+def _feature_table():
+    """Feature indices per [color][piece type][square] as (white view, black view)"""
+    table = [[[None] * 64 for _ in range(7)] for _ in range(2)]
+    for color in (chess.WHITE, chess.BLACK):
+        for piece_type in chess.PIECE_TYPES:
+            for square in chess.SQUARES:
+                white_view = ((0 if color == chess.WHITE else 1) * 6 + piece_type - 1) * 64 + square
+                black_view = ((0 if color == chess.BLACK else 1) * 6 + piece_type - 1) * 64 + (square ^ 56)
+                table[color][piece_type][square] = (white_view, black_view)
+    return table
+
+
+# Feature indices of a piece for both perspectives, see _feature_table
+FEATURE_INDEX = _feature_table()
+
+
+def board_features(board):
+    """Active feature indices of a python-chess board as (white view, black view) lists"""
+    white, black = [], []
+    for square, piece in board.piece_map().items():
+        white_view, black_view = FEATURE_INDEX[piece.color][piece.piece_type][square]
+        white.append(white_view)
+        black.append(black_view)
+    return white, black
+
+
+def move_features(board, move):
+    """Features removed and added by a move about to be made, as (piece type, color, square) lists"""
+    color = board.turn
+    piece_type = board.piece_type_at(move.from_square)
+    removed = [(piece_type, color, move.from_square)]
+    added = [(move.promotion or piece_type, color, move.to_square)]
+    if board.is_castling(move):
+        rank = chess.square_rank(move.from_square)
+        if board.is_kingside_castling(move):
+            rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+        else:
+            rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+        removed.append((chess.ROOK, color, rook_from))
+        added.append((chess.ROOK, color, rook_to))
+    elif board.is_en_passant(move):
+        removed.append((chess.PAWN, not color, move.to_square + (-8 if color == chess.WHITE else 8)))
+    else:
+        captured = board.piece_type_at(move.to_square)
+        if captured:
+            removed.append((captured, not color, move.to_square))
+    return removed, added
+
+
+class Network:
+    """Quantised evaluation network loaded from a .npz file
+
+    The first layer maps the active piece-square features of each
+    perspective to an accumulator; the two accumulators (side to move
+    first) feed a clipped-ReLU hidden layer and a linear output.
+    """
+    ARRAYS = ('ft_weights', 'ft_bias', 'l1_weights', 'l1_bias', 'out_weights', 'out_bias', 'scale')
+
+    def __init__(self, ft_weights, ft_bias, l1_weights, l1_bias, out_weights, out_bias, scale):
+        self.ft_weights = np.asarray(ft_weights, dtype=np.int16)     # (FEATURES, hidden)
+        self.ft_bias = np.asarray(ft_bias, dtype=np.int16)           # (hidden,)
+        self.l1_weights = np.asarray(l1_weights, dtype=np.int16)     # (2 * hidden, l1)
+        self.l1_bias = np.asarray(l1_bias, dtype=np.int32)           # (l1,)
+        self.out_weights = np.asarray(out_weights, dtype=np.int16)   # (l1,)
+        self.out_bias = int(out_bias)
+        self.scale = int(scale)     # centipawns = output * scale / (QA * QB)
+
+        hidden = self.ft_weights.shape[1]
+        if self.ft_weights.shape != (FEATURES, hidden) or self.ft_bias.shape != (hidden,):
+            raise ValueError(f"Bad feature transformer shape {self.ft_weights.shape}")
+        if self.l1_weights.shape[0] != 2 * hidden or self.l1_bias.shape != self.l1_weights.shape[1:]:
+            raise ValueError(f"Bad hidden layer shape {self.l1_weights.shape}")
+        if self.out_weights.shape != self.l1_bias.shape:
+            raise ValueError(f"Bad output layer shape {self.out_weights.shape}")
+
+        # Sums and products run in int32; converted once here rather than
+        # on every update and evaluation
+        self.ft_weights32 = self.ft_weights.astype(np.int32)
+        self.l1_weights32 = self.l1_weights.astype(np.int32)
+        self.out_weights32 = self.out_weights.astype(np.int32)
+
+    @property
+    def hidden(self):
+        return self.ft_weights.shape[1]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(*(arrays[name] for name in cls.ARRAYS))
+
+    def save(self, path):
+        np.savez(path, **{name: np.asarray(getattr(self, name)) for name in self.ARRAYS})
+
+    def accumulator(self, board):
+        """First-layer accumulators of a position computed from scratch, shape (2, hidden)"""
+        white, black = board_features(board)
+        accumulator = np.empty((2, self.hidden), dtype=np.int32)
+        accumulator[0] = self.ft_bias + self.ft_weights32.take(white, axis=0).sum(axis=0)
+        accumulator[1] = self.ft_bias + self.ft_weights32.take(black, axis=0).sum(axis=0)
+        return accumulator
+
+    def forward(self, accumulator, turn):
+        """Centipawn score for the side to move from the accumulators"""
+        # np.minimum/np.maximum rather than np.clip, which is several times slower on small arrays
+        active = np.maximum(accumulator if turn == chess.WHITE else accumulator[::-1], 0)
+        np.minimum(active, QA, out=active)
+        hidden = np.maximum((active.reshape(-1) @ self.l1_weights32 + self.l1_bias) // QB, 0)
+        np.minimum(hidden, QA, out=hidden)
+        output = int(hidden @ self.out_weights32) + self.out_bias
+        return output * self.scale // (QA * QB)
+
+
+def material_network(hidden=DEFAULT_HIDDEN, l1=DEFAULT_L1):
+    """A network that reproduces the PIECE_VALUES material balance exactly
+
+    Accumulator unit k counts one piece type of one side (MATERIAL_COUNT_STEP
+    per piece); the hidden layer passes the counts through and the output
+    weighs them by piece value. All weights stay inside the ranges the
+    trainer keeps, so it is a usable starting point for training, and it
+    checks the incremental updates against MaterialEvaluator.
+    """
+    counted = [piece_type for piece_type in chess.PIECE_TYPES if piece_type != chess.KING]
+    if hidden < 2 * len(counted) or l1 < 2 * len(counted):
+        raise ValueError("The material network needs at least 10 hidden and l1 units")
+    ft_weights = np.zeros((FEATURES, hidden), dtype=np.int16)
+    l1_weights = np.zeros((2 * hidden, l1), dtype=np.int16)
+    out_weights = np.zeros(l1, dtype=np.int16)
+    for unit, piece_type in enumerate(counted):
+        for relative in (0, 1):
+            start = (relative * 6 + piece_type - 1) * 64
+            ft_weights[start:start + 64, unit + relative * len(counted)] = MATERIAL_COUNT_STEP
+        # Own pieces come from the side to move's accumulator, the opponent's
+        # from the same units of the other accumulator (where they count as own)
+        l1_weights[unit, unit] = QB
+        l1_weights[hidden + unit, len(counted) + unit] = QB
+        out_weights[unit] = MATERIAL_VALUE_STEP * PIECE_VALUES[chess.piece_name(piece_type)]
+        out_weights[len(counted) + unit] = -out_weights[unit]
+    # One pawn (MATERIAL_COUNT_STEP * MATERIAL_VALUE_STEP in the output) is 100 centipawns
+    scale = 100 * QA * QB // (MATERIAL_COUNT_STEP * MATERIAL_VALUE_STEP)
+    return Network(ft_weights, np.zeros(hidden, dtype=np.int16), l1_weights, np.zeros(l1, dtype=np.int32),
+                   out_weights, 0, scale)
+
+
+class NnueEvaluator:
+    """Network evaluation with the first layer updated incrementally in make/unmake
+
+    Drop-in replacement for MaterialEvaluator: push adds and removes the
+    piece-square features changed by a move, so only the small dense layers
+    run per evaluated node.
+    """
+
+    def __init__(self, network):
+        self.network = network
+        self.accumulator = None
+        self.stack = []
+
+    def reset(self, board):
+        """Compute the accumulators of a root position"""
+        self.accumulator = self.network.accumulator(board)
+        self.stack = []
+
+    def refresh(self, board):
+        """Recompute the accumulators from scratch (what push saves doing at every node)"""
+        self.accumulator = self.network.accumulator(board)
+
+    def push(self, board, move):
+        """Update the accumulators for a move about to be made on board"""
+        self.stack.append(self.accumulator)
+        removed, added = move_features(board, move)
+        # take() of a feature's (white view, black view) rows gives the change of both accumulators
+        weights = self.network.ft_weights32
+        accumulator = self.accumulator.copy()
+        for piece_type, color, square in added:
+            accumulator += weights.take(FEATURE_INDEX[color][piece_type][square], axis=0)
+        for piece_type, color, square in removed:
+            accumulator -= weights.take(FEATURE_INDEX[color][piece_type][square], axis=0)
+        self.accumulator = accumulator
+
+    def pop(self):
+        """Restore the accumulators after a move was taken back"""
+        self.accumulator = self.stack.pop()
+
+    def evaluate(self, board):
+        """Score of the position for the side to move, in centipawns"""
+        return self.network.forward(self.accumulator, board.turn)
@@ -0,0 +1,361 @@
+"""Train the nnue backend's network on CPU from local self-play games.
+
+Run from the project root:
+
+    python -m src.ai.nnue_train convert data/nnue.npz                  # material-only starting network
+    python -m src.ai.nnue_train selfplay data/selfplay.txt --games 200 --nodes 3000
+    python -m src.ai.nnue_train train data/selfplay.txt --init data/nnue.npz --output data/nnue.npz
+
+Self-play games are searched by the builtin engine (scored by material, or
+by an existing network with --net). Each quiet position is written as a line
+"fen;score;result" with the search score in centipawns and the game result
+(1, 0.5 or 0), both from white's side. Training fits a float copy of the
+network with NumPy to a blend of the score and the result, then quantises
+it to the int16 format read by src/ai/nnue.py.
+
+train also reads directories written by the sharded generator in
+src/ai/selfplay.py, which is the way to produce large training sets.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import chess
+import numpy as np
+
+from .builtin_engine import BuiltinEngine, MATE_SCORE, MAX_PLY
+from .nnue import (Network, NnueEvaluator, FEATURES, DEFAULT_HIDDEN, DEFAULT_L1, DEFAULT_OUTPUT_SCALE,
+                   DENSE_WEIGHT_LIMIT, QA, QB, board_features, material_network)
+
+# Games longer than this are scored as draws
+MAX_GAME_PLIES = 300
+
+# Most pieces a position can have; feature lists are padded to this length
+MAX_PIECES = 32
+
+# Centipawns of a 50% win chance difference in the training target
+WDL_SCALE = 400
+
+# Adam optimiser constants
+ADAM_BETA1 = 0.9
+ADAM_BETA2 = 0.999
+ADAM_EPSILON = 1e-8
+
+
+def play_game(engine, rng, nodes, random_plies):
+    """Play one self-play game; returns (fen, white-relative score) records and the result for white"""
+    board = chess.Board()
+    for _ in range(random_plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        board.push(rng.choice(moves))
+
+    records = []
+    while not board.is_game_over(claim_draw=True) and board.ply() < MAX_GAME_PLIES:
+        result = engine.search(board, nodes=nodes)
+        move = result['move']
+        if move is None:
+            break
+        # Keep quiet positions with a real score; tactics are left to the search
+        score = result['score']
+        if not board.is_check() and not board.is_capture(move) and abs(score) < MATE_SCORE - MAX_PLY:
+            records.append((board.fen(), score if board.turn == chess.WHITE else -score))
+        board.push(move)
+
+    outcome = board.outcome(claim_draw=True)
+    if outcome is None or outcome.winner is None:
+        return records, 0.5
+    return records, 1.0 if outcome.winner == chess.WHITE else 0.0
+
+
+def selfplay(path, games, nodes, random_plies, seed=None, network=None):
+    """Append self-play positions to a data file; returns the number written"""
+    rng = random.Random(seed)
+    engine = BuiltinEngine(evaluator=NnueEvaluator(network) if network else None)
+    written = 0
+    start = time.perf_counter()
+    with open(path, 'a') as handle:
+        for game in range(games):
+            records, result = play_game(engine, rng, nodes, random_plies)
+            for fen, score in records:
+                handle.write(f"{fen};{score};{result}\n")
+            written += len(records)
+            engine.table.clear()
+            print(f"game {game + 1}/{games}: {len(records)} positions, result {result}, "
+                  f"{time.perf_counter() - start:.0f}s")
+    return written
+
+
+def shard_features(records):
+    """Feature index arrays of selfplay records, decoded from their snapshots without python-chess"""
+    snapshots = np.asarray(records['snapshot'])
+    codes = np.empty((len(snapshots), 64), dtype=np.int32)
+    codes[:, 0::2] = snapshots[:, :32] >> 4
+    codes[:, 1::2] = snapshots[:, :32] & 0x0F
+    # Occupied snapshot indexes first; snapshot index i is chess square i ^ 56
+    indexes = np.argsort(codes == 0, axis=1, kind='stable')[:, :MAX_PIECES]
+    pieces = np.take_along_axis(codes, indexes, axis=1)
+    occupied = pieces > 0
+    piece_type = (pieces & 7) - 1
+    black = (pieces & 8) > 0
+    white_view = ((black * 6 + piece_type) * 64 + (indexes ^ 56))
+    black_view = ((~black * 6 + piece_type) * 64 + indexes)
+    return (np.where(occupied, white_view, FEATURES).astype(np.int16),
+            np.where(occupied, black_view, FEATURES).astype(np.int16),
+            (snapshots[:, 32] & 0x01) > 0)
+
+
+def load_shards(directory):
+    """Read a directory written by src/ai/selfplay.py into the load_data format"""
+    from .selfplay import read_shards
+    parts = []
+    for records in read_shards(directory):
+        white, black, white_to_move = shard_features(records)
+        parts.append({
+            'white': white,
+            'black': black,
+            'white_to_move': white_to_move,
+            'score': records['score'].astype(np.float32),
+            'result': (records['result'].astype(np.float32) + 1) / 2
+        })
+    return parts
+
+
+def load_data(paths):
+    """Read data files (or selfplay shard directories) into feature index arrays and white-relative targets"""
+    white, black, turns, scores, results = [], [], [], [], []
+    parts = []
+    for path in paths:
+        if os.path.isdir(path):
+            parts += load_shards(path)
+            continue
+        with open(path) as handle:
+            for line in handle:
+                fen, score, result = line.strip().split(';')
+                board = chess.Board(fen)
+                white_view, black_view = board_features(board)
+                white.append(white_view + [FEATURES] * (MAX_PIECES - len(white_view)))
+                black.append(black_view + [FEATURES] * (MAX_PIECES - len(black_view)))
+                turns.append(board.turn == chess.WHITE)
+                scores.append(float(score))
+                results.append(float(result))
+    parts.append({
+        'white': np.array(white, dtype=np.int16).reshape(-1, MAX_PIECES),
+        'black': np.array(black, dtype=np.int16).reshape(-1, MAX_PIECES),
+        'white_to_move': np.array(turns, dtype=bool),
+        'score': np.array(scores, dtype=np.float32),
+        'result': np.array(results, dtype=np.float32)
+    })
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def sigmoid(values):
+    return 1.0 / (1.0 + np.exp(-values))
+
+
+class FloatNetwork:
+    """Float32 copy of a Network with forward and backward passes for training
+
+    Activations are clipped to [0, 1] where the quantised network clips to
+    [0, QA]; the output times scale is the score in centipawns.
+    """
+
+    def __init__(self, params, scale):
+        self.params = params
+        self.scale = scale
+
+    @classmethod
+    def random(cls, hidden=DEFAULT_HIDDEN, l1=DEFAULT_L1, seed=None):
+        rng = np.random.default_rng(seed)
+        return cls({
+            'ft_weights': rng.normal(0, 0.1, (FEATURES, hidden)).astype(np.float32),
+            'ft_bias': np.zeros(hidden, dtype=np.float32),
+            'l1_weights': rng.normal(0, 1 / np.sqrt(2 * hidden), (2 * hidden, l1)).astype(np.float32),
+            'l1_bias': np.zeros(l1, dtype=np.float32),
+            'out_weights': rng.normal(0, 1 / np.sqrt(l1), l1).astype(np.float32),
+            'out_bias': np.zeros(1, dtype=np.float32)
+        }, DEFAULT_OUTPUT_SCALE)
+
+    @classmethod
+    def from_network(cls, network):
+        return cls({
+            'ft_weights': network.ft_weights.astype(np.float32) / QA,
+            'ft_bias': network.ft_bias.astype(np.float32) / QA,
+            'l1_weights': network.l1_weights.astype(np.float32) / QB,
+            'l1_bias': network.l1_bias.astype(np.float32) / (QA * QB),
+            'out_weights': network.out_weights.astype(np.float32) / QB,
+            'out_bias': np.array([network.out_bias / (QA * QB)], dtype=np.float32)
+        }, network.scale)
+
+    def quantise(self):
+        """Round to the int16 Network format"""
+        params = self.params
+
+        def to_int(values, factor, dtype=np.int16):
+            limit = np.iinfo(dtype).max
+            return np.clip(np.round(values * factor), -limit, limit).astype(dtype)
+
+        return Network(to_int(params['ft_weights'], QA), to_int(params['ft_bias'], QA),
+                       to_int(params['l1_weights'], QB), to_int(params['l1_bias'], QA * QB, np.int32),
+                       to_int(params['out_weights'], QB), int(to_int(params['out_bias'], QA * QB, np.int32)[0]),
+                       self.scale)
+
+    def forward(self, us, them):
+        """Scores in centipawns for one-hot feature matrices of the side to move and the other side"""
+        params = self.params
+        cache = {'us': us, 'them': them}
+        cache['acc'] = np.concatenate([us @ params['ft_weights'], them @ params['ft_weights']], axis=1)
+        cache['acc'] += np.tile(params['ft_bias'], 2)
+        cache['active'] = np.clip(cache['acc'], 0, 1)
+        cache['z1'] = cache['active'] @ params['l1_weights'] + params['l1_bias']
+        cache['hidden'] = np.clip(cache['z1'], 0, 1)
+        output = cache['hidden'] @ params['out_weights'] + params['out_bias'][0]
+        return output * self.scale, cache
+
+    def backward(self, cache, grad_score):
+        """Gradients of the parameters given d(loss)/d(score in centipawns)"""
+        params = self.params
+        hidden = params['ft_bias'].shape[0]
+        grad_output = grad_score * self.scale
+        grads = {
+            'out_weights': cache['hidden'].T @ grad_output,
+            'out_bias': np.array([grad_output.sum()], dtype=np.float32)
+        }
+        grad_z1 = np.outer(grad_output, params['out_weights']) * ((cache['z1'] > 0) & (cache['z1'] < 1))
+        grads['l1_weights'] = cache['active'].T @ grad_z1
+        grads['l1_bias'] = grad_z1.sum(axis=0)
+        grad_acc = (grad_z1 @ params['l1_weights'].T) * ((cache['acc'] > 0) & (cache['acc'] < 1))
+        grads['ft_weights'] = cache['us'].T @ grad_acc[:, :hidden] + cache['them'].T @ grad_acc[:, hidden:]
+        grads['ft_bias'] = grad_acc[:, :hidden].sum(axis=0) + grad_acc[:, hidden:].sum(axis=0)
+        return grads
+
+
+def one_hot(indices):
+    """Dense (batch, FEATURES) matrix from padded feature index rows"""
+    matrix = np.zeros((len(indices), FEATURES + 1), dtype=np.float32)
+    matrix[np.arange(len(indices))[:, None], indices] = 1.0
+    return matrix[:, :FEATURES]
+
+
+def batch_inputs(data, rows):
+    """One-hot inputs and side-to-move targets of a batch"""
+    white_to_move = data['white_to_move'][rows][:, None]
+    us = one_hot(np.where(white_to_move, data['white'][rows], data['black'][rows]))
+    them = one_hot(np.where(white_to_move, data['black'][rows], data['white'][rows]))
+    sign = np.where(data['white_to_move'][rows], 1.0, -1.0).astype(np.float32)
+    score = data['score'][rows] * sign
+    result = np.where(sign > 0, data['result'][rows], 1.0 - data['result'][rows])
+    return us, them, score, result
+
+
+def loss_and_grad(model, data, rows, blend):
+    """Mean squared error of win probabilities and its gradient on the scores"""
+    us, them, score, result = batch_inputs(data, rows)
+    predicted, cache = model.forward(us, them)
+    target = blend * sigmoid(score / WDL_SCALE) + (1 - blend) * result
+    probability = sigmoid(predicted / WDL_SCALE)
+    error = probability - target
+    grad_score = 2 * error * probability * (1 - probability) / WDL_SCALE / len(rows)
+    return float(np.mean(error ** 2)), cache, grad_score.astype(np.float32)
+
+
+def train(model, data, epochs, batch_size, learning_rate, blend, validation=0.05, seed=None):
+    """Fit the model with Adam; returns (train loss, validation loss) per epoch"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(data['score']))
+    held_out = int(len(order) * validation)
+    validation_rows, training_rows = order[:held_out], order[held_out:]
+    moments = {name: (np.zeros_like(value), np.zeros_like(value)) for name, value in model.params.items()}
+    step = 0
+    history = []
+    for epoch in range(epochs):
+        rng.shuffle(training_rows)
+        losses = []
+        for start in range(0, len(training_rows), batch_size):
+            rows = training_rows[start:start + batch_size]
+            loss, cache, grad_score = loss_and_grad(model, data, rows, blend)
+            losses.append(loss)
+            step += 1
+            for name, grad in model.backward(cache, grad_score).items():
+                first, second = moments[name]
+                first *= ADAM_BETA1
+                first += (1 - ADAM_BETA1) * grad
+                second *= ADAM_BETA2
+                second += (1 - ADAM_BETA2) * grad * grad
+                corrected = first / (1 - ADAM_BETA1 ** step)
+                model.params[name] -= (learning_rate * corrected
+                                       / (np.sqrt(second / (1 - ADAM_BETA2 ** step)) + ADAM_EPSILON))
+            # Dense weights must stay inside the range int16 quantisation can represent
+            for name in ('l1_weights', 'out_weights'):
+                np.clip(model.params[name], -DENSE_WEIGHT_LIMIT, DENSE_WEIGHT_LIMIT, out=model.params[name])
+
+        validation_loss = None
+        if len(validation_rows):
+            validation_loss = loss_and_grad(model, data, validation_rows, blend)[0]
+        history.append((float(np.mean(losses)), validation_loss))
+        print(f"epoch {epoch + 1}/{epochs}: train loss {history[-1][0]:.5f}"
+              + (f", validation loss {validation_loss:.5f}" if validation_loss is not None else ""))
+    return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate self-play data and train the nnue network")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help="Write a network that scores material only")
+    convert_parser.add_argument('output')
+    convert_parser.add_argument('--hidden', type=int, default=DEFAULT_HIDDEN)
+    convert_parser.add_argument('--l1', type=int, default=DEFAULT_L1)
+
+    selfplay_parser = subparsers.add_parser('selfplay', help="Append self-play positions to a data file")
+    selfplay_parser.add_argument('output')
+    selfplay_parser.add_argument('--games', type=int, default=100)
+    selfplay_parser.add_argument('--nodes', type=int, default=2000, help="search nodes per move")
+    selfplay_parser.add_argument('--random-plies', type=int, default=8, help="random opening plies per game")
+    selfplay_parser.add_argument('--net', help="score the search with this network instead of material")
+    selfplay_parser.add_argument('--seed', type=int, default=None)
+
+    train_parser = subparsers.add_parser('train', help="Train a network on self-play data")
+    train_parser.add_argument('data', nargs='+')
+    train_parser.add_argument('--output', required=True)
+    train_parser.add_argument('--init', help="start from this network instead of random weights")
+    train_parser.add_argument('--hidden', type=int, default=DEFAULT_HIDDEN)
+    train_parser.add_argument('--l1', type=int, default=DEFAULT_L1)
+    train_parser.add_argument('--epochs', type=int, default=10)
+    train_parser.add_argument('--batch-size', type=int, default=1024)
+    train_parser.add_argument('--lr', type=float, default=1e-3)
+    train_parser.add_argument('--blend', type=float, default=0.75,
+                              help="weight of the search score against the game result in the target")
+    train_parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        material_network(args.hidden, args.l1).save(args.output)
+        print(f"Wrote material network to {args.output}")
+        return 0
+
+    if args.command == 'selfplay':
+        network = Network.load(args.net) if args.net else None
+        written = selfplay(args.output, args.games, args.nodes, args.random_plies, args.seed, network)
+        print(f"Wrote {written} positions to {args.output}")
+        return 0
+
+    data = load_data(args.data)
+    print(f"Loaded {len(data['score'])} positions")
+    if not len(data['score']):
+        return 1
+    if args.init:
+        model = FloatNetwork.from_network(Network.load(args.init))
+    else:
+        model = FloatNetwork.random(args.hidden, args.l1, args.seed)
+    train(model, data, args.epochs, args.batch_size, args.lr, args.blend, seed=args.seed)
+    model.quantise().save(args.output)
+    print(f"Wrote network to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+"""Sharded self-play data generator for evaluation training.
+
+Run from the project root:
+
+    python -m src.ai.selfplay generate data/selfplay --games 100000 --backend builtin --nodes 5000
+    python -m src.ai.selfplay info data/selfplay
+
+Games are played on a process pool, one backend from src/ai/engine_registry.py
+per worker. Sampled quiet positions are stored as fixed-size records
+(RECORD_DTYPE: a 33-byte Board snapshot plus en passant square, halfmove
+clock, search score, best move, game result and game number) in shards of SHARD_SIZE
+records. Finished shards are plain .npy files that can be memory-mapped; the
+shard being filled is an append-only .partial file.
+
+index.json is the only commit point: it is replaced atomically after each
+game's records are on disk. An interrupted run is resumed by starting the
+same command again; records and files the index does not know about are
+discarded and those games played again, so no game is stored twice. Games
+are numbered and seeded from --seed, so a resumed run plays the same games.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing.util import Finalize
+
+import chess
+import chess.engine
+import numpy as np
+
+from .builtin_engine import MATE_SCORE, MAX_PLY
+from .engine_config import detect_cores
+from .engine_registry import create_backend
+from ..core.game_io import chess_board_to_snapshot
+from ..core.move_codec import encode_chess_move
+
+# One stored position; score is in centipawns and result is 1, 0 or -1,
+# both from white's side; ep_square is NO_EP_SQUARE when there is none, and
+# game is the number of the game it was sampled from
+RECORD_DTYPE = np.dtype([
+    ('snapshot', 'u1', (33,)),
+    ('ep_square', 'u1'),
+    ('halfmove_clock', 'u1'),
+    ('score', '<i2'),
+    ('move', '<u2'),
+    ('result', 'i1'),
+    ('ply', '<u2'),
+    ('game', '<u4')
+])
+NO_EP_SQUARE = 64
+
+# Records per finished shard
+SHARD_SIZE = 1 << 20
+
+INDEX_NAME = 'index.json'
+FORMAT_VERSION = 1
+
+# Games longer than this are scored as draws
+MAX_GAME_PLIES = 400
+
+# Scores are clipped to the int16 range of the record
+SCORE_LIMIT = 32000
+
+# Backend of the current worker process, created by _init_worker
+_backend = None
+
+# Queue of a grid view watching the games (see src/ui/board_grid.py) and its board count
+_updates = None
+_watch_boards = 0
+
+
+def _init_worker(backend_name, updates=None, watch_boards=0):
+    global _backend, _updates, _watch_boards
+    _backend = create_backend(backend_name).start()
+    _updates, _watch_boards = updates, watch_boards
+    # Worker processes skip atexit handlers, but run multiprocessing finalizers
+    Finalize(None, _backend.close, exitpriority=10)
+
+
+def play_game(game, seed, nodes, sample, random_plies):
+    """Play one numbered game on this worker's backend and return its sampled records"""
+    rng = random.Random(f"{seed}:{game}")
+    board = chess.Board()
+    for _ in range(random_plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        board.push(rng.choice(moves))
+
+    if _updates is not None:
+        from ..ui.board_grid import publish
+        publish(_updates, game % _watch_boards, board)
+
+    limit = chess.engine.Limit(nodes=nodes)
+    sampled = []
+    while not board.is_game_over(claim_draw=True) and board.ply() < MAX_GAME_PLIES:
+        result = _backend.search(board, limit)
+        move = result['move']
+        if move is None:
+            break
+        # Only quiet positions with a real score; tactics are left to the search
+        score = result['score']
+        quiet = not board.is_check() and not board.is_capture(move) and not move.promotion
+        if (quiet and result['mate'] is None and score is not None and abs(score) < MATE_SCORE - MAX_PLY
+                and rng.random() < sample):
+            white_score = score if board.turn == chess.WHITE else -score
+            sampled.append((chess_board_to_snapshot(board),
+                            board.ep_square if board.ep_square is not None else NO_EP_SQUARE,
+                            min(board.halfmove_clock, 255),
+                            max(-SCORE_LIMIT, min(SCORE_LIMIT, white_score)),
+                            encode_chess_move(move),
+                            board.ply()))
+        board.push(move)
+        if _updates is not None:
+            publish(_updates, game % _watch_boards, board, move)
+
+    outcome = board.outcome(claim_draw=True)
+    winner = outcome.winner if outcome is not None else None
+    result = 0 if winner is None else (1 if winner == chess.WHITE else -1)
+    if _updates is not None:
+        publish(_updates, game % _watch_boards, board, status=outcome.result() if outcome else '1/2-1/2')
+
+    records = np.zeros(len(sampled), dtype=RECORD_DTYPE)
+    for row, (snapshot, ep_square, halfmove_clock, score, move, ply) in enumerate(sampled):
+        records[row] = (np.frombuffer(snapshot, dtype=np.uint8), ep_square, halfmove_clock, score, move,
+                        result, ply, game)
+    return game, records
+
+
+class ShardWriter:
+    """Appends games' records to shards in a directory and tracks which games are stored"""
+
+    def __init__(self, directory, settings, shard_size=SHARD_SIZE):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, INDEX_NAME)
+        if os.path.exists(path):
+            with open(path) as handle:
+                self.index = json.load(handle)
+            if self.index['settings'] != settings:
+                raise ValueError(f"{directory} was generated with different settings: {self.index['settings']}")
+        else:
+            self.index = {
+                'format': FORMAT_VERSION,
+                'record_dtype': RECORD_DTYPE.descr,
+                'shard_size': shard_size,
+                'settings': settings,
+                'shards': [],
+                'partial': {'file': self._shard_name(0, '.partial'), 'records': 0},
+                'next_game': 0,     # every game below this is stored
+                'done_ahead': []    # stored games above next_game
+            }
+        self.shard_size = self.index['shard_size']
+        self.done_ahead = set(self.index['done_ahead'])
+        self._recover()
+
+    @staticmethod
+    def _shard_name(number, suffix):
+        return f"shard-{number:05d}{suffix}"
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _recover(self):
+        """Drop whatever an interrupted run wrote after the last index update"""
+        partial = self._path(self.index['partial']['file'])
+        committed = self.index['partial']['records'] * RECORD_DTYPE.itemsize
+        with open(partial, 'ab') as handle:
+            if handle.tell() != committed:
+                print(f"Discarding {handle.tell() - committed} uncommitted bytes of {partial}")
+                handle.truncate(committed)
+        known = {shard['file'] for shard in self.index['shards']} | {self.index['partial']['file'], INDEX_NAME}
+        for name in os.listdir(self.directory):
+            if (name.startswith('shard-') and name not in known) or name.endswith('.tmp'):
+                os.remove(self._path(name))
+
+    def is_done(self, game):
+        return game < self.index['next_game'] or game in self.done_ahead
+
+    @property
+    def records(self):
+        return sum(shard['records'] for shard in self.index['shards']) + self.index['partial']['records']
+
+    def add(self, game, records):
+        """Store one game's records; it counts as stored once the index says so"""
+        partial = self.index['partial']
+        with open(self._path(partial['file']), 'ab') as handle:
+            handle.write(records.tobytes())
+            handle.flush()
+            os.fsync(handle.fileno())
+        partial['records'] += len(records)
+        self.done_ahead.add(game)
+        while self.index['next_game'] in self.done_ahead:
+            self.done_ahead.remove(self.index['next_game'])
+            self.index['next_game'] += 1
+        self.index['done_ahead'] = sorted(self.done_ahead)
+
+        if partial['records'] < self.shard_size:
+            self._save_index()
+        while self.index['partial']['records'] >= self.shard_size:
+            self._finish_shard()
+
+    def _finish_shard(self):
+        """Turn the first shard_size records of the partial file into a .npy shard
+
+        Both new files get new names, so until the index is saved the old
+        partial file is still the committed state.
+        """
+        partial = self.index['partial']
+        records = np.fromfile(self._path(partial['file']), dtype=RECORD_DTYPE, count=partial['records'])
+        number = len(self.index['shards'])
+        shard_name = self._shard_name(number, '.npy')
+        next_name = self._shard_name(number + 1, '.partial')
+        self._write_atomic(shard_name, lambda handle: np.save(handle, records[:self.shard_size]))
+        self._write_atomic(next_name, lambda handle: handle.write(records[self.shard_size:].tobytes()))
+        old_partial = partial['file']
+        self.index['shards'].append({'file': shard_name, 'records': self.shard_size})
+        self.index['partial'] = {'file': next_name, 'records': len(records) - self.shard_size}
+        self._save_index()
+        os.remove(self._path(old_partial))
+
+    def _write_atomic(self, name, write):
+        temporary = self._path(name + '.tmp')
+        with open(temporary, 'wb') as handle:
+            write(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self._path(name))
+
+    def _save_index(self):
+        self._write_atomic(INDEX_NAME, lambda handle: handle.write(json.dumps(self.index, indent=1).encode()))
+
+
+def read_shards(directory):
+    """Memory-map the records of a generated directory, one array per shard (the last may be partial)"""
+    with open(os.path.join(directory, INDEX_NAME)) as handle:
+        index = json.load(handle)
+    arrays = [np.load(os.path.join(directory, shard['file']), mmap_mode='r') for shard in index['shards']]
+    if index['partial']['records']:
+        arrays.append(np.memmap(os.path.join(directory, index['partial']['file']), dtype=RECORD_DTYPE, mode='r',
+                                shape=(index['partial']['records'],)))
+    return arrays
+
+
+def generate(directory, games, backend_name, nodes, workers, sample, random_plies, seed, shard_size=SHARD_SIZE,
+             watch=0):
+    """Play games 0..games-1 that are not stored yet and append their records
+
+    With watch > 0 the games are shown live on that many boards in a grid
+    window, drawn between game completions.
+    """
+    settings = {'backend': backend_name, 'nodes': nodes, 'sample': sample, 'random_plies': random_plies,
+                'seed': seed}
+    writer = ShardWriter(directory, settings, shard_size)
+    todo = (game for game in range(games) if not writer.is_done(game))
+    start = time.perf_counter()
+    played = 0
+    start_records = writer.records
+
+    viewer = None
+    updates = None
+    if watch:
+        import multiprocessing
+        from ..ui.board_grid import GridViewer
+        updates = multiprocessing.Queue()
+        viewer = GridViewer(updates, watch, caption="Chess AI - self-play")
+
+    def collect(in_flight):
+        """Wait for at least one game, store the finished ones and return the rest"""
+        nonlocal played, viewer
+        while True:
+            finished, in_flight = wait(in_flight, timeout=1 / 60 if viewer else None, return_when=FIRST_COMPLETED)
+            if viewer is not None:
+                viewer.run_frame()
+                if not viewer.running:
+                    viewer.close()
+                    viewer = None
+            if finished or not in_flight:
+                break
+        for future in finished:
+            writer.add(*future.result())
+            played += 1
+        return in_flight
+
+    # At most two games per worker are in flight, so memory stays bounded however many games are asked for
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backend_name, updates, watch)) as executor:
+        in_flight = set()
+        for game in todo:
+            in_flight.add(executor.submit(play_game, game, seed, nodes, sample, random_plies))
+            if len(in_flight) < 2 * workers:
+                continue
+            in_flight = collect(in_flight)
+            elapsed = time.perf_counter() - start
+            print(f"{writer.index['next_game']}/{games} games, {writer.records} positions, "
+                  f"{played / elapsed:.2f} games/s")
+        while in_flight:
+            in_flight = collect(in_flight)
+
+    if viewer is not None:
+        viewer.close()
+    return {'games': played, 'records': writer.records - start_records, 'time': time.perf_counter() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate sharded self-play training data")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help="Play games and append their positions")
+    generate_parser.add_argument('directory')
+    generate_parser.add_argument('--games', type=int, default=1000, help="total games (resumes up to this)")
+    generate_parser.add_argument('--backend', default='builtin')
+    generate_parser.add_argument('--nodes', type=int, default=5000, help="search nodes per move")
+    generate_parser.add_argument('--workers', type=int, default=None, help="game processes (default: cores)")
+    generate_parser.add_argument('--sample', type=float, default=0.25, help="share of quiet positions stored")
+    generate_parser.add_argument('--random-plies', type=int, default=8, help="random opening plies per game")
+    generate_parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help="records per shard")
+    generate_parser.add_argument('--seed', type=int, default=0)
+    generate_parser.add_argument('--watch', type=int, default=0, metavar='BOARDS',
+                                 help="show the games live on this many boards")
+
+    info_parser = subparsers.add_parser('info', help="Summarise a generated directory")
+    info_parser.add_argument('directory')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        with open(os.path.join(args.directory, INDEX_NAME)) as handle:
+            index = json.load(handle)
+        arrays = read_shards(args.directory)
+        total = sum(len(array) for array in arrays)
+        results = np.concatenate([array['result'] for array in arrays]) if arrays else np.zeros(0)
+        print(f"settings  {index['settings']}")
+        print(f"games     {index['next_game'] + len(index['done_ahead'])} stored")
+        print(f"records   {total} in {len(index['shards'])} shards + {index['partial']['records']} partial")
+        if total:
+            print(f"results   white {np.mean(results == 1):.1%}, draw {np.mean(results == 0):.1%}, "
+                  f"black {np.mean(results == -1):.1%}")
+        return 0
+
+    summary = generate(args.directory, args.games, args.backend, args.nodes, args.workers or detect_cores(),
+                       args.sample, args.random_plies, args.seed, args.shard_size, args.watch)
+    print(f"Played {summary['games']} games, stored {summary['records']} positions in {summary['time']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
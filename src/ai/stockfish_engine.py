@@ -1,8 +1,9 @@
 import chess
 import chess.engine
 import random
-import os
 from ..utils.constants import STOCKFISH_PATHS, STOCKFISH_SKILL_LEVEL
+from .chess_engine import find_engine
+from .engine_supervisor import get_shared_supervisor
 
 class StockfishEngine:
     def __init__(self):
@@ -11,16 +12,16 @@ class StockfishEngine:
         
     def _initialize_engine(self):
         """Try to initialize Stockfish engine from multiple possible paths"""
-        for path in STOCKFISH_PATHS:
+        path = find_engine("stockfish", STOCKFISH_PATHS)
+        if path:
             try:
-                if os.path.exists(path):
-                    self.engine = chess.engine.SimpleEngine.popen_uci(path)
-                    self.engine.configure({"Skill Level": STOCKFISH_SKILL_LEVEL})
-                    print(f"Successfully loaded Stockfish from: {path}")
-                    return
+                # Processes are shared with every other user of the same
+                # engine and options, and restarted by the supervisor
+                self.engine = get_shared_supervisor(path, options={"Skill Level": STOCKFISH_SKILL_LEVEL})
+                print(f"Using Stockfish from: {path}")
+                return
             except Exception as e:
                 print(f"Failed to load Stockfish from {path}: {str(e)}")
-                continue
                 
         print("Warning: Stockfish engine not found. AI moves will be random.")
         self.engine = None
@@ -32,19 +33,11 @@ class StockfishEngine:
                 result = self.engine.play(board, chess.engine.Limit(time=0.1))
                 return result.move
             except Exception as e:
+                # The supervisor replaces the engine; only this move is random
                 print(f"Error getting move from Stockfish: {str(e)}")
-                self.engine = None
                 
         # If Stockfish is not available or failed, make a random move
         legal_moves = list(board.legal_moves)
         if legal_moves:
             return random.choice(legal_moves)
         return None
-        
-    def __del__(self):
-        """Clean up the engine when the object is destroyed"""
-        if self.engine:
-            try:
-                self.engine.quit()
-            except:
-                pass 
\ No newline at end of file
@@ -1,135 +1,78 @@
-import chess
 from ..utils.constants import *
 from .piece import Pawn, Knight, Bishop, Rook, Queen, King
+from .position import Position, PIECE_CODES, PIECE_CLASSES, CASTLING_FLAGS, SNAPSHOT_SIZE
+
+# Home squares of the kings and rooks, whose moved flags decide castling
+CASTLING_SQUARES = tuple((row, col) for row in (0, 7) for col in (0, 4, 7))
 
 class Board:
+    """The game's position and move history
+
+    The pieces live in an immutable Position that every move replaces, so
+    other threads (rendering, move prefetching, analysis) can take
+    board.position once and read it without locks while the game goes on.
+    """
     def __init__(self):
-        self.pieces = []
+        self.position = Position.initial()
         self.move_history = []
-        self.initialize_board()
+        # Positions before the moves at the end of move_history, for undo
+        self.previous_positions = []
+        # Position move_history starts from
+        self.start_position = self.position
+        
+    @property
+    def pieces(self):
+        return self.position.pieces
         
     def initialize_board(self):
         """Initialize the chess board with pieces in their starting positions"""
-        # Clear existing pieces
-        self.pieces = []
-        
-        # Initialize pawns
-        for col in range(8):
-            self.pieces.append(Pawn('white', (6, col)))  # White pawns on row 6
-            self.pieces.append(Pawn('black', (1, col)))  # Black pawns on row 1
-            
-        # Initialize other pieces
-        piece_order = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
-        for col, piece_class in enumerate(piece_order):
-            self.pieces.append(piece_class('white', (7, col)))  # White pieces on row 7
-            self.pieces.append(piece_class('black', (0, col)))  # Black pieces on row 0
+        self.position = Position.initial()
+        self.start_position = self.position
             
     def get_piece_at(self, position):
         """Get the piece at the given position"""
-        for piece in self.pieces:
-            if piece.position == position:
-                return piece
-        return None
+        return self.position.get_piece_at(position)
         
     def get_valid_moves(self, piece):
         """Get valid moves for a piece"""
-        if not piece:
-            return []
-            
-        # Get basic valid moves
-        moves = piece.get_valid_moves(self)
-        
-        # Filter out moves that would put/leave the king in check
-        valid_moves = []
-        for move in moves:
-            if not self._would_be_in_check(piece, move):
-                valid_moves.append(move)
-                
-        return valid_moves
+        return self.position.get_valid_moves(piece)
         
     def _would_be_in_check(self, piece, move):
         """Check if a move would put or leave the king in check"""
-        # Save current state
-        original_position = piece.position
-        captured_piece = self.get_piece_at(move)
-        
-        # Make the move
-        if captured_piece:
-            self.pieces.remove(captured_piece)
-        piece.position = move
-        
-        # Check if king is in check
-        king = self._find_king(piece.color)
-        in_check = self._is_square_attacked(king.position, 'black' if piece.color == 'white' else 'white')
-        
-        # Restore state
-        piece.position = original_position
-        if captured_piece:
-            self.pieces.append(captured_piece)
-            
-        return in_check
+        return self.position._would_be_in_check(piece, move)
         
     def _find_king(self, color):
         """Find the king of the given color"""
-        for piece in self.pieces:
-            if isinstance(piece, King) and piece.color == color:
-                return piece
-        return None
+        return self.position._find_king(color)
         
     def _is_square_attacked(self, square, by_color):
         """Check if a square is attacked by any piece of the given color"""
-        for piece in self.pieces:
-            if piece.color == by_color:
-                if square in piece.get_valid_moves(self):
-                    return True
-        return False
+        return self.position._is_square_attacked(square, by_color)
+        
+    def is_in_check(self, color):
+        """Check if the king of the given color is attacked"""
+        return self.position.is_in_check(color)
+        
+    def has_legal_move(self, color):
+        """Check if the given color has any legal move, stopping at the first one"""
+        return self.position.has_legal_move(color)
         
     def make_move(self, from_pos, to_pos):
         """Make a move on the board"""
         try:
-            piece = self.get_piece_at(from_pos)
+            position = self.position
+            piece = position.get_piece_at(from_pos)
             if not piece:
                 print(f"No piece found at {from_pos}")  # Debug print
                 return False
                 
             # Check if move is valid
-            valid_moves = self.get_valid_moves(piece)
+            valid_moves = position.get_valid_moves(piece)
             if to_pos not in valid_moves:
                 print(f"Invalid move: {to_pos} not in valid moves {valid_moves}")  # Debug print
                 return False
                 
-            # Handle castling
-            if isinstance(piece, King):
-                # Kingside castle
-                if to_pos[1] - from_pos[1] == 2:  # Moving two squares to the right
-                    rook_from = (from_pos[0], 7)
-                    rook_to = (from_pos[0], 5)
-                    rook = self.get_piece_at(rook_from)
-                    if rook:
-                        rook.move(rook_to)
-                        print(f"Kingside castle: Moving rook from {rook_from} to {rook_to}")  # Debug print
-                
-                # Queenside castle
-                elif to_pos[1] - from_pos[1] == -2:  # Moving two squares to the left
-                    rook_from = (from_pos[0], 0)
-                    rook_to = (from_pos[0], 3)
-                    rook = self.get_piece_at(rook_from)
-                    if rook:
-                        rook.move(rook_to)
-                        print(f"Queenside castle: Moving rook from {rook_from} to {rook_to}")  # Debug print
-            
-            # Capture piece if present
-            captured_piece = self.get_piece_at(to_pos)
-            if captured_piece:
-                print(f"Capturing piece at {to_pos}")  # Debug print
-                self.pieces.remove(captured_piece)
-                
-            # Move the piece
-            print(f"Moving piece from {from_pos} to {to_pos}")  # Debug print
-            piece.move(to_pos)
-            
-            # Record the move
-            self.move_history.append((from_pos, to_pos, captured_piece))
+            self._apply_move(piece, from_pos, to_pos)
             
             return True
             
@@ -137,6 +80,50 @@ class Board:
             print(f"Error in make_move: {str(e)}")  # Debug print
             return False
         
+    def _apply_move(self, piece, from_pos, to_pos):
+        """Move a piece without validating the move"""
+        position = self.position
+        # Castling: Position.after moves the rook as well
+        if isinstance(piece, King) and abs(to_pos[1] - from_pos[1]) == 2:
+            kingside = to_pos[1] > from_pos[1]
+            rook_from = (from_pos[0], 7 if kingside else 0)
+            rook_to = (from_pos[0], 5 if kingside else 3)
+            if position.get_piece_at(rook_from):
+                side = "Kingside" if kingside else "Queenside"
+                print(f"{side} castle: Moving rook from {rook_from} to {rook_to}")  # Debug print
+            
+        captured_piece = position.get_piece_at(to_pos)
+        if captured_piece:
+            print(f"Capturing piece at {to_pos}")  # Debug print
+            
+        print(f"Moving piece from {from_pos} to {to_pos}")  # Debug print
+        # Readers holding the old position keep a consistent view; the new one is swapped in whole
+        self.position = position.after(from_pos, to_pos)
+        
+        # Record the move
+        self.previous_positions.append(position)
+        self.move_history.append((from_pos, to_pos, captured_piece))
+        
+    def apply_move(self, from_pos, to_pos):
+        """Make a trusted move (e.g. replayed from a saved game) without validation"""
+        piece = self.get_piece_at(from_pos)
+        if not piece:
+            return False
+        self._apply_move(piece, from_pos, to_pos)
+        return True
+        
+    def snapshot(self, turn='white'):
+        """Encode the position as 33 bytes: 64 piece nibbles plus a flags byte"""
+        return self.position.snapshot(turn)
+        
+    def restore_snapshot(self, data):
+        """Restore a position encoded by snapshot() and return the side to move"""
+        self.position = Position.from_snapshot(data)
+        self.start_position = self.position
+        self.move_history = []
+        self.previous_positions = []
+        return 'white' if data[32] & 0x01 else 'black'
+        
     def create_move(self, piece, target):
         """Create a move from a piece to a target position"""
         if target in self.get_valid_moves(piece):
@@ -149,18 +136,40 @@ class Board:
             return False
             
         from_pos, to_pos, captured_piece = self.move_history.pop()
-        piece = self.get_piece_at(to_pos)
-        
-        # Restore piece position
-        piece.position = from_pos
-        piece.has_moved = False
-        
-        # Restore captured piece if any
-        if captured_piece:
-            self.pieces.append(captured_piece)
+        if self.previous_positions:
+            self.position = self.previous_positions.pop()
+        else:
+            # History added from outside (see GameTree.board_at) has no positions
+            # to go back to; the pieces' moved flags come from the earlier moves
+            if captured_piece:
+                captured_piece = captured_piece.__class__(captured_piece.color, to_pos)
+                captured_piece.has_moved = self._had_moved(to_pos)
+            position = self.position.taken_back(from_pos, to_pos, captured_piece, self._had_moved(from_pos))
+            # Kings and rooks rebuilt from a snapshot only know the castling rights
+            # of that later position, e.g. a rook counts as moved once its king has
+            changes = {}
+            for square in CASTLING_SQUARES:
+                piece = position.get_piece_at(square)
+                if isinstance(piece, (King, Rook)) and piece.has_moved != self._had_moved(square):
+                    changes[square] = piece.__class__(piece.color, square)
+                    changes[square].has_moved = not piece.has_moved
+            self.position = position.replace(changes) if changes else position
             
         return True
         
+    def _had_moved(self, square):
+        """Whether the piece on a square after the moves in move_history has moved"""
+        for from_pos, to_pos, _ in reversed(self.move_history):
+            if to_pos == square:
+                return True
+            # The rook of a castling move lands next to the king's square
+            if (from_pos[1] == 4 and abs(to_pos[1] - 4) == 2 and
+                    square == (from_pos[0], 5 if to_pos[1] == 6 else 3) and
+                    isinstance(self.start_position.get_piece_at((from_pos[0], 4)), King)):
+                return True
+        piece = self.start_position.get_piece_at(square)
+        return piece.has_moved if piece else True
+        
     def get_fen(self):
         """Get the FEN representation of the board"""
         fen = []
@@ -193,45 +202,16 @@ class Board:
         print(f"Generated FEN: {fen_str}")  # Debug print
         return fen_str
         
-    def is_checkmate(self):
-        """Check if the current position is checkmate"""
-        # Find the current player's king
-        king = self._find_king(self.current_player)
-        if not king:
-            return False
-            
-        # Check if king is in check
-        if not self._is_square_attacked(king.position, 'black' if self.current_player == 'white' else 'white'):
-            return False
-            
-        # Check if any move can get out of check
-        for piece in self.pieces:
-            if piece.color == self.current_player:
-                if self.get_valid_moves(piece):
-                    return False
-                    
-        return True
+    def is_checkmate(self, color):
+        """Check if the given color is checkmated"""
+        return self.is_in_check(color) and not self.has_legal_move(color)
         
-    def is_stalemate(self):
-        """Check if the current position is stalemate"""
-        # Find the current player's king
-        king = self._find_king(self.current_player)
-        if not king:
-            return False
-            
-        # Check if king is in check
-        if self._is_square_attacked(king.position, 'black' if self.current_player == 'white' else 'white'):
-            return False
-            
-        # Check if any move is possible
-        for piece in self.pieces:
-            if piece.color == self.current_player:
-                if self.get_valid_moves(piece):
-                    return False
-                    
-        return True
+    def is_stalemate(self, color):
+        """Check if the given color is stalemated"""
+        return not self.is_in_check(color) and not self.has_legal_move(color)
         
     def reset(self):
         """Reset the board to its initial state"""
         self.initialize_board()
-        self.move_history = [] 
\ No newline at end of file
+        self.move_history = []
+        self.previous_positions = [] 
\ No newline at end of file
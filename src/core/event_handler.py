@@ -2,22 +2,41 @@ import pygame
 from ..utils.constants import *
 
 class EventHandler:
+    # Keys that move through the game
+    NAVIGATION_KEYS = {
+        pygame.K_LEFT: 'back',
+        pygame.K_RIGHT: 'forward',
+        pygame.K_HOME: 'start',
+        pygame.K_END: 'end'
+    }
+    
     def __init__(self, game_controller):
         self.game_controller = game_controller
+        self.ply_digits = ""  # typed ply number, jumped to on Enter
+        self.event_log = None  # list that receives every event when recording input
         
     def handle_events(self):
         """Handle all game events"""
         for event in pygame.event.get():
+            if self.event_log is not None:
+                self.event_log.append(event)
+                
             if event.type == pygame.QUIT:
                 self.game_controller.running = False
                 
+            elif event.type == pygame.VIDEORESIZE:
+                self.game_controller.handle_resize()
+                
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left mouse button
                     # Check if click is on the board
-                    if event.pos[0] < BOARD_SIZE and event.pos[1] < BOARD_SIZE:
+                    board_size = self.game_controller.ui_manager.board_size
+                    if event.pos[0] < board_size and event.pos[1] < board_size:
                         self.game_controller.handle_piece_selection(event.pos)
                     else:
                         self.game_controller.handle_ui_click(event.pos)
+                elif event.button == 3:  # Right mouse button
+                    self.game_controller.clear_premoves()
                         
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:  # Left mouse button
@@ -26,4 +45,17 @@ class EventHandler:
                         
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    self.game_controller.running = False 
\ No newline at end of file
+                    self.game_controller.running = False
+                elif event.key == pygame.K_o:
+                    self.game_controller.toggle_opening_panel()
+                elif event.key == pygame.K_s:
+                    self.game_controller.save_game()
+                elif event.key == pygame.K_l:
+                    self.game_controller.load_game()
+                elif event.key in self.NAVIGATION_KEYS:
+                    self.game_controller.navigate(self.NAVIGATION_KEYS[event.key])
+                elif pygame.K_0 <= event.key <= pygame.K_9:
+                    self.ply_digits += chr(event.key)
+                elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER) and self.ply_digits:
+                    self.game_controller.navigate(int(self.ply_digits))
+                    self.ply_digits = "" 
\ No newline at end of file
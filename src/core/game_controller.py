@@ -1,22 +1,49 @@
 import pygame
-import chess
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .board import Board
+from .game_status import GameStatus
+from .game_tree import GameTree
 from ..ai.chess_engine import ChessEngine
 from ..ui.ui_manager import UIManager
+from ..ui.opening_panel import OpeningPanel
 from ..core.event_handler import EventHandler
+from .zobrist import hash_board
+from .game_io import GameRecorder, save_pgn, load_pgn, load_binary
 from ..utils.constants import *
 
 class GameController:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    def __init__(self, engine=None):
+        # Start the engine first so its launch and warm-up overlap with
+        # window creation and the human's first move; callers such as the
+        # benchmarks may pass their own object with get_best_move/cleanup
+        if engine is not None:
+            self.engine = engine
+        elif AI_BACKENDS == ['stockfish']:
+            self.engine = ChessEngine(background=True)
+        else:
+            from ..ai.engine_race import RacingEngine
+            self.engine = RacingEngine(AI_BACKENDS, AI_RACE_POLICY, background=True)
+        
+        # Only initialise the pygame modules we use (pygame.init() also
+        # brings up audio and joysticks, which is slow on some systems)
+        self._enable_hidpi()
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("Chess AI")
+        self.clock = pygame.time.Clock()
         
         self.board = Board()
-        self.engine = ChessEngine()
         self.ui_manager = UIManager(self.screen)
         self.event_handler = EventHandler(self)
+        self.opening_panel = OpeningPanel(self.screen, self.ui_manager.font)
+        self.game_index = None
+        self.opening_stats = []
+        self.opening_lookup_ms = None
+        self.opening_stats_key = None
         
         self.selected_piece = None
         self.valid_moves = []
@@ -26,35 +53,90 @@ class GameController:
         self.dragging = False
         self.drag_start = None
         
+        # AI moves are searched on a background thread so the human can
+        # queue premoves while the engine thinks
+        self.ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-move")
+        self.ai_future = None
+        self.ai_generation = 0
+        self.ai_generation_requested = 0
+        self.ai_failures = 0
+        self.ai_retry_at = 0.0
+        self.premoves = []
+        self.premove_from = None
+        
+        # Record every move so the game survives a crash or restart
+        self.start_snapshot = None
+        self.recorder = GameRecorder(AUTOSAVE_PATH)
+        self._resume_autosave()
+        
+        # Move tree for navigation and variations; reviewing is set while an
+        # earlier ply is shown, and keeps the AI from moving there
+        self.tree = GameTree.from_board(self.board, self.start_snapshot)
+        self.reviewing = False
+        
+        # Tree node whose moves the autosave holds; moves made elsewhere in
+        # the tree re-record the line from where the two paths part
+        self.recorded_node = self.tree.current
+        
+        # End-of-game detection, updated after every move
+        self.status = GameStatus()
+        self.game_state = self._restore_status()
+        
     def run(self):
         """Main game loop"""
         try:
             while self.running:
-                # Handle events
-                self.event_handler.handle_events()
-                
-                # Update game state
-                self._update()
-                
-                # Render
-                self._render()
-                
-                # Update display
-                pygame.display.flip()
+                self.run_frame()
                 
                 # Cap the frame rate
-                pygame.time.Clock().tick(60)
+                self.clock.tick(60)
                 
         except Exception as e:
             print(f"Error in game loop: {str(e)}")
         finally:
             self.cleanup()
             
+    def run_frame(self):
+        """Run a single frame of the game loop"""
+        # Handle events
+        self.event_handler.handle_events()
+        
+        # Update game state
+        self._update()
+        
+        # Render
+        self._render()
+        
+        # Update display
+        pygame.display.flip()
+        
+    def _enable_hidpi(self):
+        """Ask the OS for a real-pixel window instead of a bitmap-scaled one"""
+        if sys.platform == 'win32':
+            try:
+                import ctypes
+                ctypes.windll.user32.SetProcessDPIAware()
+            except Exception as e:
+                print(f"Could not enable HiDPI: {str(e)}")
+                
+    def handle_resize(self):
+        """Rescale the board after the window was resized"""
+        try:
+            self.screen = pygame.display.get_surface()
+            self.ui_manager.resize(self.screen)
+            self.opening_panel.screen = self.screen
+        except Exception as e:
+            print(f"Error resizing: {str(e)}")
+            
     def cleanup(self):
         """Clean up resources"""
         try:
+            if hasattr(self, 'ai_executor'):
+                self.ai_executor.shutdown(wait=False, cancel_futures=True)
             if hasattr(self, 'engine'):
                 self.engine.cleanup()
+            if hasattr(self, 'recorder'):
+                self.recorder.close()
             pygame.quit()
         except Exception as e:
             print(f"Error during cleanup: {str(e)}")
@@ -68,24 +150,61 @@ class GameController:
             if self.game_state != GAME_STATES['PLAYING']:
                 return
                 
-            # Make AI move if it's black's turn
-            if self.current_player == 'black':
+            # Apply the AI move once the background search has finished
+            if self.ai_future is not None and self.ai_future.done():
+                future, generation = self.ai_future, self.ai_generation_requested
+                self.ai_future = None
+                if generation == self.ai_generation:
+                    self._apply_ai_move(future.result())
+                    
+                    # No move was made: back off instead of asking every frame
+                    if self.current_player == 'black':
+                        self.ai_failures += 1
+                        delay = min(AI_RETRY_MAX, AI_RETRY_DELAY * 2 ** (self.ai_failures - 1))
+                        self.ai_retry_at = time.monotonic() + delay
+                        print(f"No AI move, retrying in {delay:.1f}s")  # Debug print
+                    else:
+                        self.ai_failures = 0
+                        
+                    # Premoves are played in the same frame the AI move lands
+                    if self.current_player == 'white':
+                        self._apply_premove()
+                        
+            # Start the AI search if it's black's turn
+            if (self.current_player == 'black' and self.ai_future is None and not self.reviewing
+                    and time.monotonic() >= self.ai_retry_at):
                 print("Black's turn - making AI move")  # Debug print
-                self._make_ai_move()
+                self._request_ai_move()
                 
         except Exception as e:
             print(f"Error in update: {str(e)}")
             self.running = False
             
-    def _make_ai_move(self):
-        """Make a move using the chess engine"""
+    def _request_ai_move(self):
+        """Start searching for the AI move on a background thread"""
+        import chess
+        
+        # Convert our board to chess.Board; the engine thread only ever
+        # sees this copy, never the live Board
+        chess_board = chess.Board(self.board.get_fen())
+        print(f"Current FEN: {chess_board.fen()}")  # Debug print
+        self.ai_generation_requested = self.ai_generation
+        self.ai_future = self.ai_executor.submit(self.engine.get_best_move, chess_board)
+        
+    def _cancel_ai_move(self):
+        """Forget any AI search in progress (after undo, reset or load)"""
+        self.ai_generation += 1
+        self.ai_future = None
+        # A new position gets a fresh attempt
+        self.ai_failures = 0
+        self.ai_retry_at = 0.0
+        self.clear_premoves()
+        
+    def _apply_ai_move(self, move):
+        """Make a move returned by the chess engine"""
         try:
-            # Convert our board to chess.Board
-            chess_board = chess.Board(self.board.get_fen())
-            print(f"Current FEN: {chess_board.fen()}")  # Debug print
+            import chess
             
-            # Get move from engine
-            move = self.engine.get_best_move(chess_board)
             if move:
                 # Convert chess move to our format
                 # Note: chess.square_rank returns 0-7 from bottom to top
@@ -120,8 +239,16 @@ class GameController:
                 
                 # Make the move
                 if self.board.make_move(from_pos, to_pos):
-                    self.current_player = 'white'
+                    self._after_move(from_pos, to_pos)
                     print("AI move successful")  # Debug print
+                    if self.premove_from is not None and not self.premoves:
+                        # A premove that was only half entered becomes a selection
+                        piece = self.board.get_piece_at(self.premove_from)
+                        if piece and piece.color == 'white':
+                            self.selected_piece = piece
+                            self.valid_moves = self.board.get_valid_moves(piece)
+                        self.premove_from = None
+                        self.dragging = False
                 else:
                     print("AI move failed")  # Debug print
             else:
@@ -131,6 +258,82 @@ class GameController:
             print(f"Error making AI move: {str(e)}")
             self.running = False
                 
+    def _after_move(self, from_pos, to_pos):
+        """Record a move just made on the board and check whether it ended the game"""
+        node = self.tree.add_move(self.board)
+        self.reviewing = False
+        self._record_line(node)
+        self.current_player = 'black' if self.current_player == 'white' else 'white'
+        self.game_state = self.status.push(self.board)
+        if self.game_state != GAME_STATES['PLAYING']:
+            print(f"Game over: {self.status.describe()}")
+            self._cancel_ai_move()
+            
+    def _record_line(self, node):
+        """Make the autosave hold the moves leading to a tree node"""
+        path = self.tree.path(node)
+        recorded = self.tree.path(self.recorded_node)
+        common = 0
+        while common < min(len(path), len(recorded)) and path[common] is recorded[common]:
+            common += 1
+        # Moves past the shared part belong to another line (undone or left by navigation)
+        self.recorder.truncate(common)
+        for step in path[self.recorder.move_count:]:
+            self.recorder.append(*step.move)
+        self.recorded_node = node
+            
+    def _premove_squares(self):
+        """Squares holding white pieces once the queued premoves are played"""
+        squares = set()
+        for row in range(8):
+            for col in range(8):
+                piece = self.board.get_piece_at((row, col))
+                if piece and piece.color == 'white':
+                    squares.add((row, col))
+        for from_pos, to_pos in self.premoves:
+            squares.discard(from_pos)
+            squares.add(to_pos)
+        return squares
+        
+    def _queue_premove(self, square):
+        """Pick a piece or a target square for a premove
+
+        Premoves are not validated when queued, only when they are played.
+        """
+        if self.premove_from is None:
+            if square in self._premove_squares():
+                self.premove_from = square
+                self.dragging = True
+            return
+        if square != self.premove_from:
+            self.premoves.append((self.premove_from, square))
+            print(f"Premove queued: {self.premove_from} -> {square}")  # Debug print
+        self.premove_from = None
+        self.dragging = False
+        
+    def _apply_premove(self):
+        """Play the first queued premove, dropping the queue if it is illegal"""
+        if not self.premoves:
+            return
+        from_pos, to_pos = self.premoves.pop(0)
+        piece = self.board.get_piece_at(from_pos)
+        if (piece and piece.color == 'white' and to_pos in self.board.get_valid_moves(piece)
+                and self.board.make_move(from_pos, to_pos)):
+            self._after_move(from_pos, to_pos)
+            print(f"Premove played: {from_pos} -> {to_pos}")  # Debug print
+        else:
+            print(f"Premove {from_pos} -> {to_pos} is illegal, clearing premoves")  # Debug print
+            self.clear_premoves()
+            
+    def clear_premoves(self):
+        """Cancel all queued premoves and the current selection"""
+        self.premoves = []
+        self.premove_from = None
+        self.selected_piece = None
+        self.valid_moves = []
+        self.dragging = False
+        self.drag_start = None
+        
     def _render(self):
         """Render the game"""
         try:
@@ -147,9 +350,25 @@ class GameController:
             if self.selected_piece:
                 self.ui_manager.render_valid_moves(self.valid_moves)
                 
+            # Highlight queued premoves
+            if self.premoves or self.premove_from is not None:
+                self.ui_manager.render_premoves(self.premoves, self.premove_from)
+                
             # Render UI elements
             self.ui_manager.render_ui()
             
+            # Show which ply is on the board
+            self.ui_manager.render_ply_counter(self.tree.current.ply, self.tree.line_end().ply)
+            
+            # Announce the end of the game
+            if self.game_state != GAME_STATES['PLAYING']:
+                self.ui_manager.render_game_over(self.status.describe())
+            
+            # Render opening statistics if the panel is open
+            if self.opening_panel.visible:
+                self._update_opening_stats()
+                self.opening_panel.render(self.opening_stats, self.opening_lookup_ms)
+                
             # Render dragged piece if dragging
             if self.dragging and self.selected_piece:
                 mouse_pos = pygame.mouse.get_pos()
@@ -162,13 +381,20 @@ class GameController:
     def handle_piece_selection(self, pos):
         """Handle piece selection"""
         try:
-            if self.game_state != GAME_STATES['PLAYING'] or self.current_player != 'white':
+            if self.game_state != GAME_STATES['PLAYING']:
                 return
                 
             # Convert screen position to board coordinates
-            row = pos[1] // SQUARE_SIZE
-            col = pos[0] // SQUARE_SIZE
+            row = pos[1] // self.ui_manager.square_size
+            col = pos[0] // self.ui_manager.square_size
             
+            # While the AI is thinking, clicks queue premoves instead; it
+            # does not think while an earlier ply is being reviewed
+            if self.current_player != 'white':
+                if not self.reviewing:
+                    self._queue_premove((row, col))
+                return
+                
             # Get piece at position
             piece = self.board.get_piece_at((row, col))
             
@@ -183,8 +409,9 @@ class GameController:
                     
                 # If clicking a valid move, make the move
                 if (row, col) in self.valid_moves:
-                    if self.board.make_move(self.selected_piece.position, (row, col)):
-                        self.current_player = 'black'
+                    from_pos = self.selected_piece.position
+                    if self.board.make_move(from_pos, (row, col)):
+                        self._after_move(from_pos, (row, col))
                         
                 # Deselect the piece
                 self.selected_piece = None
@@ -204,17 +431,26 @@ class GameController:
     def handle_piece_drop(self, pos):
         """Handle piece drop after dragging"""
         try:
+            # Convert screen position to board coordinates
+            row = pos[1] // self.ui_manager.square_size
+            col = pos[0] // self.ui_manager.square_size
+            
+            # Dropping a premove piece on another square queues the premove;
+            # dropping it back on its own square leaves it selected
+            if self.premove_from is not None:
+                self.dragging = False
+                if (row, col) != self.premove_from:
+                    self._queue_premove((row, col))
+                return
+                
             if not self.dragging or not self.selected_piece:
                 return
                 
-            # Convert screen position to board coordinates
-            row = pos[1] // SQUARE_SIZE
-            col = pos[0] // SQUARE_SIZE
-            
             # Check if the drop position is a valid move
             if (row, col) in self.valid_moves:
-                if self.board.make_move(self.selected_piece.position, (row, col)):
-                    self.current_player = 'black'
+                from_pos = self.selected_piece.position
+                if self.board.make_move(from_pos, (row, col)):
+                    self._after_move(from_pos, (row, col))
                     
             # Reset selection state
             self.selected_piece = None
@@ -239,28 +475,142 @@ class GameController:
     def reset_game(self):
         """Reset the game to its initial state"""
         try:
+            self._cancel_ai_move()
+            self.recorder.archive(ARCHIVE_DIR)
             self.board.reset()
+            self.start_snapshot = None
+            self.recorder.start()
             self.selected_piece = None
             self.valid_moves = []
             self.current_player = 'white'
-            self.game_state = GAME_STATES['PLAYING']
+            self.tree = GameTree()
+            self.recorded_node = self.tree.current
+            self.reviewing = False
+            self.game_state = self.status.reset(self.board, 'white')
             self.dragging = False
             self.drag_start = None
         except Exception as e:
             print(f"Error in reset game: {str(e)}")
             
     def undo_move(self):
-        """Undo the last move"""
+        """Take back moves until it is the player's turn again"""
         try:
-            if self.current_player == 'black':
-                self.board.undo_move()  # Undo AI move
-                self.current_player = 'white'
-            if self.current_player == 'white':
-                self.board.undo_move()  # Undo player move
-                self.current_player = 'black'
+            self.tree.back()
+            while self.tree.turn_at(self.tree.current) != 'white' and self.tree.current.parent is not None:
+                self.tree.back()
+            self._show_current_node()
+            # The taken-back moves stay in the tree but leave the recorded game
+            self.recorder.truncate(self.tree.current.ply)
+            self.recorded_node = self.tree.current
         except Exception as e:
             print(f"Error in undo move: {str(e)}")
             
+    def navigate(self, target):
+        """Show another ply: 'back', 'forward', 'start', 'end' or a ply number"""
+        try:
+            if target == 'back':
+                self.tree.back()
+            elif target == 'forward':
+                self.tree.forward()
+            elif target == 'start':
+                self.tree.goto_ply(0)
+            elif target == 'end':
+                self.tree.goto_ply(self.tree.line_end().ply)
+            else:
+                self.tree.goto_ply(int(target))
+            self._show_current_node()
+        except Exception as e:
+            print(f"Error navigating to {target}: {str(e)}")
+            
+    def _show_current_node(self):
+        """Put the position of the tree's current node on the board"""
+        self._cancel_ai_move()
+        self.board, self.current_player = self.tree.board_at()
+        self.reviewing = bool(self.tree.current.children)
+        self.game_state = self._restore_status()
+        
+    def _restore_status(self):
+        """Bring the end-of-game detection to the tree's current node"""
+        node = self.tree.current
+        return self.status.restore(self.board, self.current_player, self.tree.keys(node), node.halfmove_clock)
+        
+    def _resume_autosave(self):
+        """Resume the game recorded in the autosave file, or start a new recording"""
+        try:
+            if os.path.exists(AUTOSAVE_PATH):
+                self.board, self.current_player, self.start_snapshot = load_binary(AUTOSAVE_PATH)
+                self.recorder.resume()
+                print(f"Resumed game with {len(self.board.move_history)} moves from {AUTOSAVE_PATH}")
+                return
+        except Exception as e:
+            print(f"Could not resume autosave: {str(e)}")
+        self.board = Board()
+        self.current_player = 'white'
+        self.start_snapshot = None
+        self.recorder.start()
+            
+    def save_game(self, path=None):
+        """Save the current game as PGN"""
+        try:
+            os.makedirs(SAVE_DIR, exist_ok=True)
+            path = path or os.path.join(SAVE_DIR, time.strftime('game-%Y%m%d-%H%M%S.pgn'))
+            headers = {'White': 'Human', 'Black': 'Stockfish', 'Result': self.status.result}
+            save_pgn(self.board, path, self.start_snapshot, headers)
+            print(f"Game saved to {path}")
+        except Exception as e:
+            print(f"Error saving game: {str(e)}")
+            
+    def load_game(self, path=None):
+        """Load a game from a PGN or binary game file, by default the last one saved"""
+        try:
+            if path is None:
+                names = os.listdir(SAVE_DIR) if os.path.isdir(SAVE_DIR) else []
+                saves = [os.path.join(SAVE_DIR, name) for name in names if name.endswith('.pgn')]
+                if not saves:
+                    print(f"No saved games in {SAVE_DIR}")
+                    return
+                path = max(saves, key=os.path.getmtime)
+            loader = load_pgn if path.endswith('.pgn') else load_binary
+            self.board, self.current_player, self.start_snapshot = loader(path)
+            self._cancel_ai_move()
+            self.selected_piece = None
+            self.valid_moves = []
+            self.dragging = False
+            self.drag_start = None
+            self.tree = GameTree.from_board(self.board, self.start_snapshot)
+            self.reviewing = False
+            self.game_state = self._restore_status()
+            self.recorded_node = self.tree.current
+            
+            # Continue recording from the loaded position
+            self.recorder.archive(ARCHIVE_DIR)
+            self.recorder.start(self.start_snapshot)
+            for from_pos, to_pos, _ in self.board.move_history:
+                self.recorder.append(from_pos, to_pos)
+            print(f"Game loaded from {path}")
+        except Exception as e:
+            print(f"Error loading game from {path}: {str(e)}")
+            
+    def toggle_opening_panel(self):
+        """Show or hide database statistics for the current position"""
+        try:
+            if self.game_index is None:
+                from ..db.game_index import GameIndex
+                self.game_index = GameIndex(GAME_INDEX_DIR)
+            self.opening_panel.toggle()
+        except Exception as e:
+            print(f"Could not open game index at {GAME_INDEX_DIR}: {str(e)}")
+            
+    def _update_opening_stats(self):
+        """Look up the current position in the game index when it changes"""
+        key = hash_board(self.board, self.current_player)
+        if key == self.opening_stats_key:
+            return
+        start_time = time.perf_counter()
+        self.opening_stats = self.game_index.move_stats(key)
+        self.opening_lookup_ms = (time.perf_counter() - start_time) * 1000
+        self.opening_stats_key = key
+            
     def show_settings(self):
         """Show settings menu"""
         # TODO: Implement settings menu
@@ -0,0 +1,221 @@
+import os
+import struct
+import time
+
+from .board import Board, SNAPSHOT_SIZE, CASTLING_FLAGS
+from .move_codec import encode_move, decode_move, position_to_square, square_to_position
+
+# Binary game format (.cgm):
+#   header  magic "CHGM", format version, reserved flags byte,
+#           33-byte snapshot of the starting position (see Board.snapshot)
+#   body    one little-endian 16-bit encoded move per ply (see move_codec)
+# Moves are appended one at a time while playing, so a crash loses at most
+# the move being written; a trailing odd byte is ignored on load.
+MAGIC = b'CHGM'
+FORMAT_VERSION = 1
+HEADER = struct.Struct(f'<4sBB{SNAPSHOT_SIZE}s')
+MOVE = struct.Struct('<H')
+
+# Snapshot piece codes match python-chess piece types (chess.PAWN == 1 ...
+# chess.KING == 6), so python-chess is only imported for PGN conversion
+CHESS_CASTLING_SQUARES = {
+    'white_kingside': 7,    # chess.H1
+    'white_queenside': 0,   # chess.A1
+    'black_kingside': 63,   # chess.H8
+    'black_queenside': 56   # chess.A8
+}
+
+
+def initial_snapshot():
+    """Get the snapshot of the standard starting position"""
+    return Board().snapshot('white')
+
+
+def snapshot_to_chess_board(snapshot):
+    """Convert a Board snapshot into a python-chess board"""
+    import chess
+    chess_board = chess.Board(None)
+    for index in range(64):
+        code = (snapshot[index // 2] >> (0 if index % 2 else 4)) & 0x0F
+        if code:
+            color = chess.BLACK if code & 8 else chess.WHITE
+            square = position_to_square((index // 8, index % 8))
+            chess_board.set_piece_at(square, chess.Piece(code & 7, color))
+    flags = snapshot[32]
+    chess_board.turn = chess.WHITE if flags & 0x01 else chess.BLACK
+    chess_board.castling_rights = 0
+    for right, square in CHESS_CASTLING_SQUARES.items():
+        if flags & CASTLING_FLAGS[right]:
+            chess_board.castling_rights |= chess.BB_SQUARES[square]
+    return chess_board
+
+
+def chess_board_to_snapshot(chess_board):
+    """Convert a python-chess board into a Board snapshot"""
+    import chess
+    squares = [0] * 64
+    for square, piece in chess_board.piece_map().items():
+        row, col = square_to_position(square)
+        squares[row * 8 + col] = piece.piece_type | (0 if piece.color else 8)
+    flags = 0x01 if chess_board.turn == chess.WHITE else 0
+    for right, square in CHESS_CASTLING_SQUARES.items():
+        if chess_board.castling_rights & chess.BB_SQUARES[square]:
+            flags |= CASTLING_FLAGS[right]
+    return bytes((squares[i] << 4) | squares[i + 1] for i in range(0, 64, 2)) + bytes([flags])
+
+
+def board_moves(board):
+    """Get the (from_pos, to_pos) pairs played on a Board"""
+    return [(from_pos, to_pos) for from_pos, to_pos, _ in board.move_history]
+
+
+def _to_chess_move(chess_board, from_pos, to_pos):
+    """Convert a Board move to a chess.Move in the given position"""
+    import chess
+    move = chess.Move(position_to_square(from_pos), position_to_square(to_pos))
+    if chess_board.piece_type_at(move.from_square) == chess.PAWN and chess.square_rank(move.to_square) in (0, 7):
+        move.promotion = chess.QUEEN
+    return move
+
+
+def _replay(snapshot, moves):
+    """Build a Board from a starting snapshot and a list of (from_pos, to_pos)"""
+    board = Board()
+    turn = board.restore_snapshot(snapshot)
+    for from_pos, to_pos in moves:
+        if not board.apply_move(from_pos, to_pos):
+            raise ValueError(f"No piece to move at {from_pos}")
+        turn = 'black' if turn == 'white' else 'white'
+    return board, turn
+
+
+def save_pgn(board, path, start_snapshot=None, headers=None):
+    """Save the game played on a Board as PGN"""
+    import chess.pgn
+    chess_board = snapshot_to_chess_board(start_snapshot or initial_snapshot())
+    for from_pos, to_pos in board_moves(board):
+        chess_board.push(_to_chess_move(chess_board, from_pos, to_pos))
+
+    game = chess.pgn.Game.from_board(chess_board)
+    game.headers['Date'] = time.strftime('%Y.%m.%d')
+    for name, value in (headers or {}).items():
+        game.headers[name] = value
+    with open(path, 'w') as handle:
+        print(game, file=handle, end='\n\n')
+
+
+def load_pgn(path):
+    """Load the first game of a PGN file into a Board, returning (board, turn, start snapshot)"""
+    import chess.pgn
+    with open(path) as handle:
+        game = chess.pgn.read_game(handle)
+    if game is None:
+        raise ValueError(f"No game found in {path}")
+
+    start_snapshot = chess_board_to_snapshot(game.board())
+    moves = [(square_to_position(move.from_square), square_to_position(move.to_square))
+             for move in game.mainline_moves()]
+    board, turn = _replay(start_snapshot, moves)
+    return board, turn, start_snapshot
+
+
+def save_binary(board, path, start_snapshot=None):
+    """Save the game played on a Board in the compact binary format"""
+    moves = board_moves(board)
+    with open(path, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, start_snapshot or initial_snapshot()))
+        handle.write(b''.join(MOVE.pack(encode_move(from_pos, to_pos)) for from_pos, to_pos in moves))
+
+
+def read_binary(path):
+    """Read a binary game, returning (start snapshot, list of (from_pos, to_pos))"""
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"Truncated game file: {path}")
+    magic, version, _, start_snapshot = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} game file: {path}")
+
+    moves = []
+    for offset in range(HEADER.size, len(data) - 1, MOVE.size):
+        from_pos, to_pos, _ = decode_move(MOVE.unpack_from(data, offset)[0])
+        moves.append((from_pos, to_pos))
+    return start_snapshot, moves
+
+
+def load_binary(path):
+    """Load a binary game into a Board, returning (board, turn, start snapshot)"""
+    start_snapshot, moves = read_binary(path)
+    board, turn = _replay(start_snapshot, moves)
+    return board, turn, start_snapshot
+
+
+class GameRecorder:
+    def __init__(self, path, sync=False):
+        self.path = path
+        self.sync = sync
+        self.handle = None
+        self.move_count = 0
+
+    def start(self, start_snapshot=None):
+        """Start recording a new game, replacing any existing file"""
+        self.close()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.handle = open(self.path, 'wb')
+        self.handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, start_snapshot or initial_snapshot()))
+        self.move_count = 0
+        self._flush()
+
+    def resume(self):
+        """Continue recording an existing file, dropping any partially written move"""
+        self.close()
+        _, moves = read_binary(self.path)
+        self.handle = open(self.path, 'r+b')
+        self.move_count = len(moves)
+        self.handle.truncate(HEADER.size + self.move_count * MOVE.size)
+        self.handle.seek(0, os.SEEK_END)
+
+    def append(self, from_pos, to_pos):
+        """Append a single move"""
+        if not self.handle:
+            return
+        self.handle.write(MOVE.pack(encode_move(from_pos, to_pos)))
+        self.move_count += 1
+        self._flush()
+
+    def truncate(self, move_count):
+        """Drop moves past move_count (used after undo)"""
+        if not self.handle or move_count >= self.move_count:
+            return
+        self.move_count = move_count
+        self.handle.truncate(HEADER.size + move_count * MOVE.size)
+        self.handle.seek(0, os.SEEK_END)
+        self._flush()
+
+    def archive(self, archive_dir):
+        """Move the recorded game into an archive directory if it has any moves"""
+        has_moves = self.move_count > 0
+        self.close()
+        if not has_moves or not os.path.exists(self.path):
+            return None
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, time.strftime('game-%Y%m%d-%H%M%S.cgm'))
+        suffix = 1
+        while os.path.exists(archive_path):
+            archive_path = os.path.join(archive_dir, time.strftime(f'game-%Y%m%d-%H%M%S-{suffix}.cgm'))
+            suffix += 1
+        os.replace(self.path, archive_path)
+        return archive_path
+
+    def _flush(self):
+        """Push written moves to the OS (and to disk when sync is enabled)"""
+        self.handle.flush()
+        if self.sync:
+            os.fsync(self.handle.fileno())
+
+    def close(self):
+        """Close the game file"""
+        if self.handle:
+            self.handle.close()
+            self.handle = None
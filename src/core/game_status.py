@@ -0,0 +1,156 @@
+from collections import Counter
+from .piece import Pawn, Knight, Bishop, Rook, Queen, King
+from .zobrist import (PIECE_TYPES, CASTLING_INDEXES, WHITE_TO_MOVE_INDEX, random_array, piece_key,
+                      castling_rights, hash_board)
+from ..utils.constants import GAME_STATES
+
+# Plies without a capture or pawn move that end the game (the 50-move rule)
+FIFTY_MOVE_PLIES = 100
+
+# Occurrences of the same position that end the game
+REPETITION_LIMIT = 3
+
+# Material signature: piece counts indexed by (piece type - 1) * 2 + color,
+# with white = 0 and black = 1
+SIGNATURE_SIZE = 12
+
+
+def signature_index(piece):
+    return (PIECE_TYPES[type(piece)] - 1) * 2 + (1 if piece.color == 'black' else 0)
+
+
+def material_signature(board):
+    """Count the pieces of each type and color on a Board"""
+    counts = [0] * SIGNATURE_SIZE
+    for piece in board.pieces:
+        counts[signature_index(piece)] += 1
+    return tuple(counts)
+
+
+class GameStatus:
+    """Detects the end of a game from state updated once per move
+
+    Keeps an incremental Zobrist key with a repetition table, the halfmove
+    clock and a material signature, so the only search needed after a move
+    is whether the side to move has any legal move at all.
+    """
+
+    def __init__(self):
+        self.turn = 'white'
+        self.key = 0
+        self.rights = ()
+        self.halfmove_clock = 0
+        self.signature = (0,) * SIGNATURE_SIZE
+        self.repetitions = Counter()
+        self.state = GAME_STATES['PLAYING']
+        self.reason = None
+
+    def reset(self, board, turn='white'):
+        """Start tracking from a position with no known history"""
+        self.turn = turn
+        self.key = hash_board(board, turn)
+        self.rights = tuple(castling_rights(board))
+        self.halfmove_clock = 0
+        self.signature = material_signature(board)
+        self.repetitions = Counter({self.key: 1})
+        return self.evaluate(board)
+
+    def restore(self, board, turn, keys, halfmove_clock):
+        """Start tracking from a position whose history is known as a list of
+        position keys (see GameTree.keys), without replaying it"""
+        self.turn = turn
+        self.key = keys[-1]
+        self.rights = tuple(castling_rights(board))
+        self.halfmove_clock = halfmove_clock
+        self.signature = material_signature(board)
+        self.repetitions = Counter(keys)
+        return self.evaluate(board)
+
+    def push(self, board):
+        """Update for the move just made on the board and return the game state"""
+        from_pos, to_pos, captured_piece = board.move_history[-1]
+        piece = board.get_piece_at(to_pos)
+
+        keys = random_array()
+        key = self.key ^ piece_key(piece, from_pos) ^ piece_key(piece, to_pos) ^ keys[WHITE_TO_MOVE_INDEX]
+        if captured_piece:
+            key ^= piece_key(captured_piece, to_pos)
+            counts = list(self.signature)
+            counts[signature_index(captured_piece)] -= 1
+            self.signature = tuple(counts)
+
+        # The rook's half of a castling move
+        if isinstance(piece, King) and abs(to_pos[1] - from_pos[1]) == 2:
+            if to_pos[1] == 6:
+                rook_from, rook_to = (to_pos[0], 7), (to_pos[0], 5)
+            else:
+                rook_from, rook_to = (to_pos[0], 0), (to_pos[0], 3)
+            rook = board.get_piece_at(rook_to)
+            if rook:
+                key ^= piece_key(rook, rook_from) ^ piece_key(rook, rook_to)
+
+        rights = tuple(castling_rights(board))
+        for right in set(rights) ^ set(self.rights):
+            key ^= keys[CASTLING_INDEXES[right]]
+        self.rights = rights
+
+        self.halfmove_clock = 0 if isinstance(piece, Pawn) or captured_piece else self.halfmove_clock + 1
+        self.key = key
+        self.repetitions[key] += 1
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        return self.evaluate(board)
+
+    def evaluate(self, board):
+        """Work out the game state of the current position"""
+        if not board.has_legal_move(self.turn):
+            if board.is_in_check(self.turn):
+                self.state, self.reason = GAME_STATES['CHECKMATE'], 'checkmate'
+            else:
+                self.state, self.reason = GAME_STATES['STALEMATE'], 'stalemate'
+        elif self.halfmove_clock >= FIFTY_MOVE_PLIES:
+            self.state, self.reason = GAME_STATES['DRAW'], 'fifty-move rule'
+        elif self.repetitions[self.key] >= REPETITION_LIMIT:
+            self.state, self.reason = GAME_STATES['DRAW'], 'threefold repetition'
+        elif self.insufficient_material(board):
+            self.state, self.reason = GAME_STATES['DRAW'], 'insufficient material'
+        else:
+            self.state, self.reason = GAME_STATES['PLAYING'], None
+        return self.state
+
+    def insufficient_material(self, board):
+        """Check if neither side can possibly mate"""
+        counts = self.signature
+        for piece_class in (Pawn, Rook, Queen):
+            index = (PIECE_TYPES[piece_class] - 1) * 2
+            if counts[index] or counts[index + 1]:
+                return False
+        knight = (PIECE_TYPES[Knight] - 1) * 2
+        bishop = (PIECE_TYPES[Bishop] - 1) * 2
+        knights = counts[knight] + counts[knight + 1]
+        bishops = counts[bishop] + counts[bishop + 1]
+        if knights + bishops <= 1:
+            return True
+        if knights:
+            return False
+        # Only bishops left: a draw if they all stand on the same square color
+        return len({sum(piece.position) % 2 for piece in board.pieces if isinstance(piece, Bishop)}) == 1
+
+    @property
+    def result(self):
+        """PGN result string of the game"""
+        if self.state == GAME_STATES['CHECKMATE']:
+            return '0-1' if self.turn == 'white' else '1-0'
+        if self.state in (GAME_STATES['STALEMATE'], GAME_STATES['DRAW']):
+            return '1/2-1/2'
+        return '*'
+
+    def describe(self):
+        """Short human-readable description of a finished game"""
+        if self.state == GAME_STATES['CHECKMATE']:
+            winner = 'Black' if self.turn == 'white' else 'White'
+            return f"Checkmate - {winner} wins"
+        if self.state == GAME_STATES['STALEMATE']:
+            return "Stalemate - draw"
+        if self.state == GAME_STATES['DRAW']:
+            return f"Draw by {self.reason}"
+        return None
@@ -0,0 +1,160 @@
+from .board import Board, PIECE_CODES, PIECE_CLASSES
+from .piece import Pawn
+from .position import Position
+from .zobrist import hash_board
+
+# Plies between positions stored as snapshots; reaching any ply replays at
+# most this many moves from the nearest one
+SNAPSHOT_INTERVAL = 16
+
+
+class MoveNode:
+    """One ply in the game tree; the moves leading to it are shared with its parent"""
+    __slots__ = ('move', 'captured', 'parent', 'children', 'selected', 'ply', 'snapshot', 'key',
+                 'halfmove_clock')
+
+    def __init__(self, move=None, captured=0, parent=None, snapshot=None, key=0, halfmove_clock=0):
+        self.move = move            # (from_pos, to_pos), None for the root
+        self.captured = captured    # snapshot piece code of the captured piece, 0 if none
+        self.parent = parent
+        self.children = []          # first child is the main line, the rest are variations
+        self.selected = 0           # child followed by forward()
+        self.ply = parent.ply + 1 if parent else 0
+        self.snapshot = snapshot
+        self.key = key                          # Zobrist hash of the position after the move
+        self.halfmove_clock = halfmove_clock    # plies since the last capture or pawn move
+
+
+class GameTree:
+    """Move tree with variations and fast navigation to any ply
+
+    Every SNAPSHOT_INTERVAL plies the position is stored as a 33-byte
+    snapshot (see Board.snapshot); a position is rebuilt from the nearest
+    snapshot above it plus a short replay.
+    """
+
+    def __init__(self, start_snapshot=None):
+        start_snapshot = start_snapshot or Board().snapshot('white')
+        self.start_turn = 'white' if start_snapshot[32] & 0x01 else 'black'
+        board = Board()
+        board.restore_snapshot(start_snapshot)
+        self.root = MoveNode(snapshot=start_snapshot, key=hash_board(board, self.start_turn))
+        self.current = self.root
+
+    @classmethod
+    def from_board(cls, board, start_snapshot=None):
+        """Build a tree holding the moves already played on a Board"""
+        tree = cls(start_snapshot)
+        scratch = Board()
+        scratch.restore_snapshot(tree.root.snapshot)
+        for from_pos, to_pos, _ in board.move_history:
+            scratch.apply_move(from_pos, to_pos)
+            tree.add_move(scratch)
+        return tree
+
+    def turn_at(self, node):
+        if node.ply % 2 == 0:
+            return self.start_turn
+        return 'black' if self.start_turn == 'white' else 'white'
+
+    def add_move(self, board):
+        """Record the move just made on the board and make it the current node
+
+        A move already in the tree is followed rather than added again; a
+        new move where one exists starts a variation.
+        """
+        from_pos, to_pos, captured_piece = board.move_history[-1]
+        parent = self.current
+        for index, child in enumerate(parent.children):
+            if child.move == (from_pos, to_pos):
+                parent.selected = index
+                self.current = child
+                return child
+
+        captured = 0
+        if captured_piece:
+            captured = PIECE_CODES[type(captured_piece)] | (8 if captured_piece.color == 'black' else 0)
+        node = MoveNode((from_pos, to_pos), captured, parent)
+        node.key = hash_board(board, self.turn_at(node))
+        if not captured_piece and not isinstance(board.get_piece_at(to_pos), Pawn):
+            node.halfmove_clock = parent.halfmove_clock + 1
+        if node.ply % SNAPSHOT_INTERVAL == 0:
+            node.snapshot = board.snapshot(self.turn_at(node))
+        parent.children.append(node)
+        parent.selected = len(parent.children) - 1
+        self.current = node
+        return node
+
+    def back(self):
+        if self.current.parent is not None:
+            self.current = self.current.parent
+        return self.current
+
+    def forward(self):
+        if self.current.children:
+            self.current = self.current.children[self.current.selected]
+        return self.current
+
+    def line_end(self, node=None):
+        """Last node of the line through a node, following the selected children"""
+        node = node or self.current
+        while node.children:
+            node = node.children[node.selected]
+        return node
+
+    def goto_ply(self, ply):
+        """Move to a ply of the current line (clamped to its ends)"""
+        node = self.current
+        while node.ply > ply and node.parent is not None:
+            node = node.parent
+        while node.ply < ply and node.children:
+            node = node.children[node.selected]
+        self.current = node
+        return node
+
+    def path(self, node=None):
+        """Nodes from the first move to a node"""
+        node = node or self.current
+        nodes = []
+        while node.parent is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+    def keys(self, node=None):
+        """Zobrist keys of every position from the start to a node"""
+        return [self.root.key] + [step.key for step in self.path(node)]
+
+    def line_moves(self, node=None):
+        """(from_pos, to_pos) of the moves after a node along the selected line"""
+        node = node or self.current
+        moves = []
+        while node.children:
+            node = node.children[node.selected]
+            moves.append(node.move)
+        return moves
+
+    def board_at(self, node=None):
+        """Build a Board at a node; returns (board, side to move)"""
+        node = node or self.current
+        replay = []
+        anchor = node
+        while anchor.snapshot is None:
+            replay.append(anchor)
+            anchor = anchor.parent
+
+        board = Board()
+        board.restore_snapshot(anchor.snapshot)
+        # History before the snapshot comes from the tree, so undo and saving still see every move
+        if anchor is not self.root:
+            board.start_position = Position.from_snapshot(self.root.snapshot)
+        for step in self.path(anchor):
+            captured_piece = None
+            if step.captured:
+                color = 'black' if step.captured & 8 else 'white'
+                captured_piece = PIECE_CLASSES[step.captured & 7](color, step.move[1])
+            board.move_history.append((step.move[0], step.move[1], captured_piece))
+        for step in reversed(replay):
+            board.apply_move(*step.move)
+        return board, self.turn_at(node)
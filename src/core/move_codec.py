@@ -0,0 +1,53 @@
+# 16-bit move layout:
+#   bits 0-5   destination square (a1 = 0, h8 = 63)
+#   bits 6-11  origin square
+#   bits 12-14 promotion piece (0 = none, 1 = knight ... 4 = queen)
+#   bit  15    reserved (always 0), so 0xFFFF never encodes a real move
+NULL_MOVE = 0
+RESERVED_BIT = 0x8000
+
+# Keyed by python-chess piece types (chess.KNIGHT == 2 ... chess.QUEEN == 5)
+# so this module can be imported without loading python-chess
+PROMOTION_CODES = {
+    None: 0,
+    2: 1,
+    3: 2,
+    4: 3,
+    5: 4
+}
+PROMOTION_PIECES = {code: piece for piece, code in PROMOTION_CODES.items()}
+
+
+def position_to_square(position):
+    """Convert a Board (row, col) position to a python-chess square index"""
+    return (7 - position[0]) * 8 + position[1]
+
+
+def square_to_position(square):
+    """Convert a python-chess square index to a Board (row, col) position"""
+    return (7 - (square >> 3), square & 7)
+
+
+def encode_move(from_pos, to_pos, promotion=None):
+    """Encode a Board move as a 16-bit integer"""
+    return (PROMOTION_CODES[promotion] << 12) | (position_to_square(from_pos) << 6) | position_to_square(to_pos)
+
+
+def decode_move(code):
+    """Decode a 16-bit integer into (from_pos, to_pos, promotion)"""
+    return (
+        square_to_position((code >> 6) & 0x3F),
+        square_to_position(code & 0x3F),
+        PROMOTION_PIECES.get((code >> 12) & 0x7)
+    )
+
+
+def encode_chess_move(move):
+    """Encode a chess.Move as a 16-bit integer"""
+    return (PROMOTION_CODES[move.promotion] << 12) | (move.from_square << 6) | move.to_square
+
+
+def decode_chess_move(code):
+    """Decode a 16-bit integer into a chess.Move"""
+    import chess
+    return chess.Move((code >> 6) & 0x3F, code & 0x3F, PROMOTION_PIECES.get((code >> 12) & 0x7))
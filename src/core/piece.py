@@ -16,6 +16,12 @@ class Piece:
         self.position = new_position
         self.has_moved = True
         
+    def moved_to(self, new_position):
+        """A moved copy of the piece on a new position (pieces in a Position are never changed)"""
+        piece = self.__class__(self.color, new_position)
+        piece.has_moved = True
+        return piece
+        
     def _is_valid_position(self, pos):
         """Check if a position is within the board bounds"""
         return 0 <= pos[0] < 8 and 0 <= pos[1] < 8
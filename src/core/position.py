@@ -0,0 +1,227 @@
+from .piece import Pawn, Knight, Bishop, Rook, Queen, King
+from .zobrist import castling_rights
+
+# Piece codes used by compact snapshots (black pieces have bit 3 set)
+PIECE_CODES = {Pawn: 1, Knight: 2, Bishop: 3, Rook: 4, Queen: 5, King: 6}
+PIECE_CLASSES = {code: piece_class for piece_class, code in PIECE_CODES.items()}
+CASTLING_FLAGS = {
+    'white_kingside': 0x02,
+    'white_queenside': 0x04,
+    'black_kingside': 0x08,
+    'black_queenside': 0x10
+}
+SNAPSHOT_SIZE = 33
+
+# (row, col) steps of the pieces, used to look for attackers from the attacked square
+KNIGHT_STEPS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_STEPS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+STRAIGHT_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONAL_STEPS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+EMPTY_ROW = (None,) * 8
+
+# Index of each color's king square in Position.kings
+KING_INDEX = {'white': 0, 'black': 1}
+
+
+class Position:
+    """Immutable placement of the pieces that can be shared between threads and processes
+
+    The squares are a tuple of eight row tuples. A move builds new tuples
+    only for the rows it changes and shares the other rows, and every piece
+    it does not move, with the position it came from; the moved piece is
+    replaced by a moved copy, so pieces in a position never change either.
+    Positions pickle as their 33-byte snapshot.
+    """
+    __slots__ = ('rows', 'kings', '_pieces')
+
+    def __init__(self, rows, kings):
+        self.rows = rows
+        self.kings = kings      # (white, black) king positions (None without a king), see KING_INDEX
+        self._pieces = None
+
+    @classmethod
+    def from_pieces(cls, pieces):
+        rows = [[None] * 8 for _ in range(8)]
+        kings = [None, None]
+        for piece in pieces:
+            rows[piece.position[0]][piece.position[1]] = piece
+            if isinstance(piece, King):
+                kings[KING_INDEX[piece.color]] = piece.position
+        return cls(tuple(tuple(row) for row in rows), tuple(kings))
+
+    @classmethod
+    def initial(cls):
+        """The standard starting position"""
+        pieces = []
+        piece_order = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
+        for col, piece_class in enumerate(piece_order):
+            pieces.append(Pawn('white', (6, col)))
+            pieces.append(Pawn('black', (1, col)))
+            pieces.append(piece_class('white', (7, col)))
+            pieces.append(piece_class('black', (0, col)))
+        return cls.from_pieces(pieces)
+
+    @classmethod
+    def from_snapshot(cls, data):
+        """Decode a snapshot (see snapshot()); has_moved follows from the ranks and castling flags"""
+        flags = data[32]
+        pieces = []
+        for index in range(64):
+            code = (data[index // 2] >> (0 if index % 2 else 4)) & 0x0F
+            if not code:
+                continue
+            color = 'black' if code & 8 else 'white'
+            piece = PIECE_CLASSES[code & 7](color, (index // 8, index % 8))
+            if isinstance(piece, Pawn):
+                piece.has_moved = piece.position[0] != (6 if color == 'white' else 1)
+            elif isinstance(piece, King):
+                piece.has_moved = not (flags & CASTLING_FLAGS[f"{color}_kingside"] or
+                                       flags & CASTLING_FLAGS[f"{color}_queenside"])
+            elif isinstance(piece, Rook):
+                home_row = 7 if color == 'white' else 0
+                side = {7: 'kingside', 0: 'queenside'}.get(piece.position[1]) if piece.position[0] == home_row else None
+                piece.has_moved = not (side and flags & CASTLING_FLAGS[f"{color}_{side}"])
+            pieces.append(piece)
+        return cls.from_pieces(pieces)
+
+    def snapshot(self, turn='white'):
+        """Encode the position as 33 bytes: 64 piece nibbles plus a flags byte"""
+        squares = [0] * 64
+        for piece in self.pieces:
+            code = PIECE_CODES[type(piece)] | (8 if piece.color == 'black' else 0)
+            squares[piece.position[0] * 8 + piece.position[1]] = code
+        flags = 0x01 if turn == 'white' else 0
+        for right in castling_rights(self):
+            flags |= CASTLING_FLAGS[right]
+        return bytes((squares[i] << 4) | squares[i + 1] for i in range(0, 64, 2)) + bytes([flags])
+
+    def __reduce__(self):
+        return (Position.from_snapshot, (self.snapshot(),))
+
+    @property
+    def pieces(self):
+        """All pieces as a tuple, built on first use"""
+        if self._pieces is None:
+            self._pieces = tuple(piece for row in self.rows for piece in row if piece)
+        return self._pieces
+
+    def get_piece_at(self, position):
+        """Get the piece at the given position"""
+        row, col = position
+        if 0 <= row < 8 and 0 <= col < 8:
+            return self.rows[row][col]
+        return None
+
+    def replace(self, changes):
+        """A new position with the pieces (or None) of a {position: piece} dict put on their squares"""
+        rows = list(self.rows)
+        for row in {position[0] for position in changes}:
+            cells = list(rows[row])
+            for position, piece in changes.items():
+                if position[0] == row:
+                    cells[position[1]] = piece
+            rows[row] = tuple(cells) if any(cells) else EMPTY_ROW
+        kings = self.kings
+        for position, piece in changes.items():
+            if isinstance(piece, King):
+                kings = (position, kings[1]) if piece.color == 'white' else (kings[0], position)
+        return Position(tuple(rows), kings)
+
+    def after(self, from_pos, to_pos):
+        """The position after a move, without validating it (castling moves the rook too)"""
+        piece = self.get_piece_at(from_pos)
+        changes = {from_pos: None, to_pos: piece.moved_to(to_pos)}
+        if isinstance(piece, King) and abs(to_pos[1] - from_pos[1]) == 2:
+            kingside = to_pos[1] > from_pos[1]
+            rook_from = (from_pos[0], 7 if kingside else 0)
+            rook_to = (from_pos[0], 5 if kingside else 3)
+            rook = self.get_piece_at(rook_from)
+            if rook:
+                changes[rook_from] = None
+                changes[rook_to] = rook.moved_to(rook_to)
+        return self.replace(changes)
+
+    def taken_back(self, from_pos, to_pos, captured_piece, had_moved=False):
+        """The position before a move known only from a move history entry
+
+        Used when the earlier position is not at hand (history added from
+        outside, e.g. by GameTree.board_at). had_moved is whether the piece
+        had moved before this move; the caller works it out from the
+        earlier history (see Board.undo_move). The rook of a castling move
+        had not moved.
+        """
+        piece = self.get_piece_at(to_pos)
+        restored = piece.__class__(piece.color, from_pos)
+        restored.has_moved = had_moved
+        changes = {to_pos: captured_piece, from_pos: restored}
+        if isinstance(piece, King) and abs(to_pos[1] - from_pos[1]) == 2:
+            kingside = to_pos[1] > from_pos[1]
+            rook_from = (from_pos[0], 5 if kingside else 3)
+            rook_to = (from_pos[0], 7 if kingside else 0)
+            rook = self.get_piece_at(rook_from)
+            if isinstance(rook, Rook):
+                changes[rook_from] = None
+                changes[rook_to] = Rook(rook.color, rook_to)
+        return self.replace(changes)
+
+    def get_valid_moves(self, piece):
+        """Get the moves of a piece that do not put or leave its king in check"""
+        if not piece:
+            return []
+        return [move for move in piece.get_valid_moves(self) if not self._would_be_in_check(piece, move)]
+
+    def _would_be_in_check(self, piece, move):
+        """Check if a move would put or leave the king in check"""
+        # The position is only used to look for attacks, so the piece itself stands in for its moved copy
+        after = self.replace({piece.position: None, move: piece})
+        king = after.kings[KING_INDEX[piece.color]]
+        return bool(king) and after._is_square_attacked(king, 'black' if piece.color == 'white' else 'white')
+
+    def _find_king(self, color):
+        """Find the king of the given color"""
+        king = self.kings[KING_INDEX[color]]
+        return self.get_piece_at(king) if king else None
+
+    def _is_square_attacked(self, square, by_color):
+        """Check if a square is attacked by any piece of the given color"""
+        row, col = square
+        # Pawns capture towards the other side: a white pawn attacks from the row below
+        pawn_row = row + (1 if by_color == 'white' else -1)
+        for d_col in (-1, 1):
+            piece = self.get_piece_at((pawn_row, col + d_col))
+            if isinstance(piece, Pawn) and piece.color == by_color:
+                return True
+        for steps, piece_class in ((KNIGHT_STEPS, Knight), (KING_STEPS, King)):
+            for d_row, d_col in steps:
+                piece = self.get_piece_at((row + d_row, col + d_col))
+                if isinstance(piece, piece_class) and piece.color == by_color:
+                    return True
+        # Sliding pieces: the first piece along each line
+        for steps, piece_classes in ((STRAIGHT_STEPS, (Rook, Queen)), (DIAGONAL_STEPS, (Bishop, Queen))):
+            for d_row, d_col in steps:
+                current_row, current_col = row + d_row, col + d_col
+                while 0 <= current_row < 8 and 0 <= current_col < 8:
+                    piece = self.rows[current_row][current_col]
+                    if piece:
+                        if isinstance(piece, piece_classes) and piece.color == by_color:
+                            return True
+                        break
+                    current_row += d_row
+                    current_col += d_col
+        return False
+
+    def is_in_check(self, color):
+        """Check if the king of the given color is attacked"""
+        king = self.kings[KING_INDEX[color]]
+        return bool(king) and self._is_square_attacked(king, 'black' if color == 'white' else 'white')
+
+    def has_legal_move(self, color):
+        """Check if the given color has any legal move, stopping at the first one"""
+        for piece in self.pieces:
+            if piece.color != color:
+                continue
+            for move in piece.get_valid_moves(self):
+                if not self._would_be_in_check(piece, move):
+                    return True
+        return False
@@ -0,0 +1,76 @@
+from .move_codec import position_to_square
+from .piece import Pawn, Knight, Bishop, Rook, Queen, King
+
+# Keys are the standard Polyglot ones, so a hash computed from our Board
+# matches chess.polyglot.zobrist_hash() for the same python-chess position.
+# They are loaded from python-chess on first use to keep it off the startup path.
+_random_array = None
+
+# python-chess piece types (chess.PAWN == 1 ... chess.KING == 6)
+PIECE_TYPES = {
+    Pawn: 1,
+    Knight: 2,
+    Bishop: 3,
+    Rook: 4,
+    Queen: 5,
+    King: 6
+}
+
+CASTLING_INDEXES = {
+    'white_kingside': 768,
+    'white_queenside': 769,
+    'black_kingside': 770,
+    'black_queenside': 771
+}
+WHITE_TO_MOVE_INDEX = 780
+
+
+def random_array():
+    """Get the Polyglot random array"""
+    global _random_array
+    if _random_array is None:
+        import chess.polyglot
+        _random_array = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+    return _random_array
+
+
+def piece_key(piece, position=None):
+    """Get the Zobrist key of a piece standing on a square"""
+    kind = (PIECE_TYPES[type(piece)] - 1) * 2 + (1 if piece.color == 'white' else 0)
+    return random_array()[64 * kind + position_to_square(position or piece.position)]
+
+
+def castling_rights(board):
+    """Get the castling rights of a Board derived from has_moved flags"""
+    rights = []
+    for color, row in (('white', 7), ('black', 0)):
+        king = board.get_piece_at((row, 4))
+        if not isinstance(king, King) or king.color != color or king.has_moved:
+            continue
+        for side, col in (('kingside', 7), ('queenside', 0)):
+            rook = board.get_piece_at((row, col))
+            if isinstance(rook, Rook) and rook.color == color and not rook.has_moved:
+                rights.append(f"{color}_{side}")
+    return rights
+
+
+def hash_board(board, turn=None):
+    """Compute the Polyglot Zobrist hash of a Board position"""
+    if turn is None:
+        turn = 'white' if len(board.move_history) % 2 == 0 else 'black'
+
+    keys = random_array()
+    key = 0
+    for piece in board.pieces:
+        key ^= piece_key(piece)
+    for right in castling_rights(board):
+        key ^= keys[CASTLING_INDEXES[right]]
+    if turn == 'white':
+        key ^= keys[WHITE_TO_MOVE_INDEX]
+    return key
+
+
+def hash_chess_board(chess_board):
+    """Compute the Polyglot Zobrist hash of a python-chess board"""
+    import chess.polyglot
+    return chess.polyglot.zobrist_hash(chess_board)
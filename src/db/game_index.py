@@ -0,0 +1,318 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from multiprocessing import Pool
+
+import chess
+import chess.pgn
+import numpy as np
+
+from ..core.move_codec import encode_chess_move, decode_chess_move, NULL_MOVE
+from ..core.zobrist import hash_chess_board
+from ..utils.constants import GAME_INDEX_DIR
+
+# Index layout (all files inside the index directory):
+#   keys.npy     sorted uint64 position hashes
+#   entries.npy  one record per key: game id (byte offset of the game in
+#                the PGN file), ply, 16-bit encoded next move, result
+#   meta.json    source PGN path and counts
+ENTRY_DTYPE = np.dtype([
+    ('game', '<u8'),
+    ('ply', '<u2'),
+    ('move', '<u2'),
+    ('result', 'i1')
+])
+
+RESULT_CODES = {
+    '1-0': 1,
+    '1/2-1/2': 0,
+    '0-1': -1,
+    '*': -2
+}
+
+# Number of 16-bit move codes (see move_codec) and of result codes, for
+# counting moves per result with bincount
+MOVE_CODES = 1 << 16
+RESULT_SLOTS = 4
+
+# Records buffered per worker before a sorted run is spilled to disk
+RUN_SIZE = 1_000_000
+
+# Records held in memory at once while merging runs into the final index
+MERGE_SIZE = 4_000_000
+
+
+class _PositionVisitor(chess.pgn.BaseVisitor):
+    """PGN visitor that collects (hash, ply, next move) for the mainline"""
+
+    def begin_game(self):
+        self.records = []
+        self.result_code = RESULT_CODES['*']
+        self.board = None
+        self.failed = False
+
+    def visit_header(self, tagname, tagvalue):
+        if tagname == 'Result':
+            self.result_code = RESULT_CODES.get(tagvalue, RESULT_CODES['*'])
+
+    def visit_board(self, board):
+        self.board = board
+
+    def visit_move(self, board, move):
+        if not self.failed:
+            self.records.append((hash_chess_board(board), encode_chess_move(move)))
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def handle_error(self, error):
+        self.failed = True
+
+    def end_game(self):
+        # Record the final position too, so games that end there are found
+        if self.board is not None and not self.failed:
+            self.records.append((hash_chess_board(self.board), NULL_MOVE))
+
+    def result(self):
+        return self.records, self.result_code
+
+
+def split_pgn(path, chunks):
+    """Split a PGN file into byte ranges that start on game boundaries"""
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as handle:
+        for i in range(1, chunks):
+            handle.seek(size * i // chunks)
+            handle.readline()
+            while True:
+                offset = handle.tell()
+                line = handle.readline()
+                if not line or line.startswith(b'[Event '):
+                    break
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+    boundaries.append(size)
+    return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)
+            if boundaries[i + 1] > boundaries[i]]
+
+
+def _iter_games(path, start, end):
+    """Yield (byte offset, PGN text) for every game starting in [start, end)"""
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        offset = start
+        lines = []
+        in_moves = False
+        while True:
+            position = handle.tell()
+            line = handle.readline()
+            if line.startswith(b'[') and in_moves or not line:
+                if lines:
+                    yield offset, b''.join(lines).decode('utf-8', 'replace')
+                if not line or position >= end:
+                    return
+                offset = position
+                lines = []
+                in_moves = False
+            elif not line.startswith(b'[') and (line.strip() or lines):
+                # The blank line after the headers ends them even if no move text follows
+                in_moves = True
+            lines.append(line)
+
+
+def _spill_run(run_dir, name, buffers):
+    """Sort buffered records by key and write them as a run"""
+    keys, games, plies, moves, results = buffers
+    keys = np.frombuffer(keys, dtype='<u8')
+    order = np.argsort(keys, kind='stable')
+    entries = np.empty(len(keys), dtype=ENTRY_DTYPE)
+    entries['game'] = np.frombuffer(games, dtype='<u8')[order]
+    entries['ply'] = np.frombuffer(plies, dtype='<u2')[order]
+    entries['move'] = np.frombuffer(moves, dtype='<u2')[order]
+    entries['result'] = np.frombuffer(results, dtype='i1')[order]
+    key_path = os.path.join(run_dir, f"{name}.keys.npy")
+    entry_path = os.path.join(run_dir, f"{name}.entries.npy")
+    np.save(key_path, keys[order])
+    np.save(entry_path, entries)
+    return key_path, entry_path
+
+
+def _import_chunk(task):
+    """Worker: replay every game of a PGN byte range and spill sorted runs"""
+    path, start, end, chunk_id, run_dir, run_size = task
+    runs = []
+    games = 0
+
+    def new_buffers():
+        return array('Q'), array('Q'), array('H'), array('H'), array('b')
+
+    buffers = new_buffers()
+    for offset, text in _iter_games(path, start, end):
+        records, result_code = chess.pgn.read_game(io.StringIO(text), Visitor=_PositionVisitor)
+        if not records:
+            continue
+        games += 1
+        keys, game_ids, plies, moves, results = buffers
+        for ply, (key, move) in enumerate(records):
+            keys.append(key)
+            game_ids.append(offset)
+            plies.append(min(ply, 0xFFFF))
+            moves.append(move)
+            results.append(result_code)
+        if len(keys) >= run_size:
+            runs.append(_spill_run(run_dir, f"chunk{chunk_id}_{len(runs)}", buffers))
+            buffers = new_buffers()
+    if len(buffers[0]):
+        runs.append(_spill_run(run_dir, f"chunk{chunk_id}_{len(runs)}", buffers))
+    return runs, games
+
+
+def _merge_runs(runs, out_dir, merge_size):
+    """Merge sorted runs into the final index in key-range partitions"""
+    run_keys = [np.load(key_path, mmap_mode='r') for key_path, _ in runs]
+    run_entries = [np.load(entry_path, mmap_mode='r') for _, entry_path in runs]
+    total = sum(len(keys) for keys in run_keys)
+
+    keys_out = np.lib.format.open_memmap(os.path.join(out_dir, 'keys.npy'), mode='w+', dtype='<u8', shape=(total,))
+    entries_out = np.lib.format.open_memmap(os.path.join(out_dir, 'entries.npy'), mode='w+',
+                                            dtype=ENTRY_DTYPE, shape=(total,))
+
+    # Zobrist keys are uniformly distributed, so equal key ranges give
+    # partitions of roughly equal size.
+    partitions = -(-total // merge_size)
+    bounds = [int(i * (1 << 64) // partitions) for i in range(partitions)] + [None]
+    cursor = [0] * len(runs)
+    written = 0
+    for i in range(partitions):
+        key_parts = []
+        entry_parts = []
+        for r, keys in enumerate(run_keys):
+            stop = len(keys) if bounds[i + 1] is None else int(np.searchsorted(keys, np.uint64(bounds[i + 1])))
+            key_parts.append(keys[cursor[r]:stop])
+            entry_parts.append(run_entries[r][cursor[r]:stop])
+            cursor[r] = stop
+        keys = np.concatenate(key_parts)
+        order = np.argsort(keys, kind='stable')
+        keys_out[written:written + len(keys)] = keys[order]
+        entries_out[written:written + len(keys)] = np.concatenate(entry_parts)[order]
+        written += len(keys)
+
+    keys_out.flush()
+    entries_out.flush()
+    return total
+
+
+def build_index(pgn_path, out_dir=GAME_INDEX_DIR, workers=None, run_size=RUN_SIZE, merge_size=MERGE_SIZE):
+    """Import a PGN collection and write a memory-mapped position index"""
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+    run_dir = tempfile.mkdtemp(prefix='runs-', dir=out_dir)
+    start_time = time.time()
+    try:
+        chunks = split_pgn(pgn_path, workers * 4)
+        tasks = [(pgn_path, start, end, i, run_dir, run_size) for i, (start, end) in enumerate(chunks)]
+        runs = []
+        games = 0
+        with Pool(workers) as pool:
+            for chunk_runs, chunk_games in pool.imap_unordered(_import_chunk, tasks):
+                runs.extend(chunk_runs)
+                games += chunk_games
+        print(f"Imported {games} games in {time.time() - start_time:.1f}s, merging {len(runs)} runs")
+
+        positions = _merge_runs(runs, out_dir, merge_size)
+        with open(os.path.join(out_dir, 'meta.json'), 'w') as handle:
+            json.dump({
+                'pgn': os.path.abspath(pgn_path),
+                'games': games,
+                'positions': positions
+            }, handle, indent=2)
+        print(f"Indexed {positions} positions in {time.time() - start_time:.1f}s")
+        return positions
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+class GameIndex:
+    def __init__(self, index_dir=GAME_INDEX_DIR):
+        self.index_dir = index_dir
+        self.keys = np.load(os.path.join(index_dir, 'keys.npy'), mmap_mode='r')
+        self.entries = np.load(os.path.join(index_dir, 'entries.npy'), mmap_mode='r')
+        with open(os.path.join(index_dir, 'meta.json')) as handle:
+            self.meta = json.load(handle)
+
+    def lookup(self, key):
+        """Get the index entries of every game that reached a position"""
+        key = np.uint64(key)
+        start = int(np.searchsorted(self.keys, key, side='left'))
+        end = int(np.searchsorted(self.keys, key, side='right'))
+        return self.entries[start:end]
+
+    def games(self, key):
+        """Get (game id, ply) pairs for every game that reached a position"""
+        entries = self.lookup(key)
+        return list(zip(entries['game'].tolist(), entries['ply'].tolist()))
+
+    def move_stats(self, key):
+        """Get per-move statistics for a position, most played first"""
+        entries = self.lookup(key)
+        # One bincount over (move code, result) pairs, without sorting: a
+        # popular position has millions of entries
+        pairs = entries['move'].astype(np.int32) * RESULT_SLOTS + (entries['result'] - RESULT_CODES['*'])
+        counts = np.bincount(pairs, minlength=MOVE_CODES * RESULT_SLOTS).reshape(MOVE_CODES, RESULT_SLOTS)
+        counts[NULL_MOVE] = 0
+        games = counts.sum(axis=1)
+        played = np.flatnonzero(games)
+        white, draws, black = (RESULT_CODES[code] - RESULT_CODES['*'] for code in ('1-0', '1/2-1/2', '0-1'))
+        return [{'move': decode_chess_move(int(move)), 'games': int(games[move]), 'white': int(counts[move, white]),
+                 'draws': int(counts[move, draws]), 'black': int(counts[move, black])}
+                for move in played[np.argsort(-games[played], kind='stable')]]
+
+    def read_game(self, game_id):
+        """Read a game from the source PGN by its id"""
+        for _, text in _iter_games(self.meta['pgn'], game_id, game_id + 1):
+            return chess.pgn.read_game(io.StringIO(text))
+        return None
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the position index of a PGN collection")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="Import a PGN file")
+    import_parser.add_argument('pgn')
+    import_parser.add_argument('--out', default=GAME_INDEX_DIR)
+    import_parser.add_argument('--workers', type=int, default=None)
+    import_parser.add_argument('--run-size', type=int, default=RUN_SIZE)
+    import_parser.add_argument('--merge-size', type=int, default=MERGE_SIZE)
+
+    lookup_parser = subparsers.add_parser('lookup', help="Show move statistics for a FEN")
+    lookup_parser.add_argument('fen', nargs='?', default=chess.STARTING_FEN)
+    lookup_parser.add_argument('--index', default=GAME_INDEX_DIR)
+
+    args = parser.parse_args(argv)
+    if args.command == 'import':
+        build_index(args.pgn, args.out, args.workers, args.run_size, args.merge_size)
+    else:
+        board = chess.Board(args.fen)
+        index = GameIndex(args.index)
+        start_time = time.perf_counter()
+        stats = index.move_stats(hash_chess_board(board))
+        elapsed = (time.perf_counter() - start_time) * 1000
+        for entry in stats:
+            print(f"{board.san(entry['move']):8} {entry['games']:8} "
+                  f"+{entry['white']} ={entry['draws']} -{entry['black']}")
+        print(f"{len(stats)} moves found in {elapsed:.2f}ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
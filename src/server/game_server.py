@@ -0,0 +1,509 @@
+"""Headless multi-game server: many human-vs-AI games on one host.
+
+Clients connect over TCP and exchange one JSON object per line:
+
+    {"id": 1, "op": "new", "color": "white"}
+    {"id": 2, "op": "move", "game": 7, "move": "e2e4"}
+    {"id": 3, "op": "state", "game": 7}
+    {"id": 4, "op": "close", "game": 7}
+    {"id": 5, "op": "stats"}
+
+Every response echoes the request id and carries "ok"; failed requests
+have "error" instead. A move is answered once the AI has replied, with the
+reply in "reply"; if the AI fails to reply, the move is taken back and the
+request fails, so the client can send it (or another) again. Games belong
+to the connection that created them and end when it disconnects. Pawn
+moves to the last rank are refused until the board supports promotion.
+
+AI moves from all games share one bounded pool of UCI engines. Requests
+are queued per client and served round-robin, so a client with many games
+cannot starve the others; when the queues are full new requests are
+refused with "busy" instead of piling up.
+
+    python -m src.server.game_server --engine fake --engines 4 --port 8765
+
+--watch BOARDS shows the games live in a grid window (src/ui/board_grid.py).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import queue
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import chess
+import chess.engine
+
+from ..ai.chess_engine import find_engine, STOCKFISH_CANDIDATES
+from ..ai.engine_supervisor import EngineSupervisor
+from ..ai.fake_engine import FAKE_ENGINE_COMMAND
+from ..core.board import Board
+from ..core.piece import Pawn
+from ..core.game_io import snapshot_to_chess_board
+from ..core.game_status import GameStatus
+from ..core.move_codec import square_to_position, encode_move
+from ..utils.constants import GAME_STATES, ENGINE_INSTANCES, ENGINE_START_TIMEOUT
+from ..utils.stats import percentiles
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# AI requests queued server-wide, and per client, before new ones are refused
+MAX_PENDING = 1024
+MAX_PENDING_PER_CLIENT = 64
+
+# Requests a connection may have in flight before the server stops reading
+# from it, pushing back on the client through TCP
+MAX_IN_FLIGHT = 256
+
+# Longest request line accepted, in bytes
+MAX_LINE = 64 * 1024
+
+# Seconds the engine gets per AI move
+DEFAULT_MOVETIME = 0.1
+
+# AI latencies kept for the percentiles reported by "stats"
+LATENCY_WINDOW = 10000
+
+
+class RequestError(Exception):
+    """A request that cannot be served; the message is sent to the client"""
+
+
+class ServerBusy(RequestError):
+    """The AI queues are full"""
+
+    def __init__(self):
+        super().__init__("busy")
+
+
+class GameSession:
+    """One game between a client and the AI"""
+
+    def __init__(self, game_id, client_id, human='white'):
+        self.game_id = game_id
+        self.client_id = client_id
+        self.human = human
+        self.board = Board()
+        self.turn = 'white'
+        self.status = GameStatus()
+        self.status.reset(self.board, self.turn)
+        # (position key, halfmove clock) after every ply, to take moves back
+        self.history = [(self.status.key, self.status.halfmove_clock)]
+        self.thinking = False
+
+    @property
+    def playing(self):
+        return self.status.state == GAME_STATES['PLAYING']
+
+    def chess_board(self):
+        """The position as a python-chess board, with the right side to move"""
+        return snapshot_to_chess_board(self.board.snapshot(self.turn))
+
+    def play(self, from_pos, to_pos):
+        """Make a move for the side to move; False if it is not legal"""
+        piece = self.board.get_piece_at(from_pos)
+        if not piece or piece.color != self.turn or to_pos not in self.board.get_valid_moves(piece):
+            return False
+        # Board would leave the pawn on the last rank
+        if isinstance(piece, Pawn) and to_pos[0] in (0, 7):
+            raise RequestError("promotion is not supported yet")
+        self.board.make_move(from_pos, to_pos)
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        self.status.push(self.board)
+        self.history.append((self.status.key, self.status.halfmove_clock))
+        return True
+
+    def take_back(self):
+        """Undo the last move, e.g. a human move the AI could not answer"""
+        self.board.undo_move()
+        self.history.pop()
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        self.status.restore(self.board, self.turn, [key for key, _ in self.history], self.history[-1][1])
+
+    def describe(self):
+        return {
+            'game': self.game_id,
+            'fen': self.chess_board().fen(),
+            'turn': self.turn,
+            'state': self.status.state,
+            'result': self.status.result,
+            'moves': len(self.board.move_history)
+        }
+
+
+class FairScheduler:
+    """AI requests queued per client and handed out round-robin"""
+
+    def __init__(self, max_pending=MAX_PENDING, max_per_client=MAX_PENDING_PER_CLIENT):
+        self.max_pending = max_pending
+        self.max_per_client = max_per_client
+        self.queues = {}
+        self.order = deque()
+        self.pending = 0
+        self.available = asyncio.Semaphore(0)
+
+    def check(self, client_id):
+        """Raise ServerBusy if a request from this client would be refused"""
+        queue = self.queues.get(client_id)
+        if self.pending >= self.max_pending or (queue and len(queue) >= self.max_per_client):
+            raise ServerBusy()
+
+    def submit(self, client_id, job):
+        self.check(client_id)
+        queue = self.queues.get(client_id)
+        if queue is None:
+            queue = self.queues[client_id] = deque()
+            self.order.append(client_id)
+        queue.append(job)
+        self.pending += 1
+        self.available.release()
+
+    async def next(self):
+        """Wait for the next request, taking one client's turn at a time"""
+        while True:
+            await self.available.acquire()
+            if not self.order:
+                # Its request was dropped with a disconnected client
+                continue
+            client_id = self.order.popleft()
+            queue = self.queues[client_id]
+            job = queue.popleft()
+            if queue:
+                self.order.append(client_id)
+            else:
+                del self.queues[client_id]
+            self.pending -= 1
+            return job
+
+    def drop(self, client_id):
+        """Forget the queued requests of a disconnected client"""
+        queue = self.queues.pop(client_id, None)
+        if queue:
+            self.order.remove(client_id)
+            self.pending -= len(queue)
+            for _, future, _ in queue:
+                future.cancel()
+
+
+class GameServer:
+    """asyncio TCP server hosting game sessions on a shared engine pool"""
+
+    def __init__(self, engine_command, engines=ENGINE_INSTANCES, movetime=DEFAULT_MOVETIME,
+                 max_pending=MAX_PENDING, max_per_client=MAX_PENDING_PER_CLIENT):
+        self.supervisor = EngineSupervisor(engine_command, size=engines)
+        self.engines = engines
+        self.limit = chess.engine.Limit(time=movetime)
+        self.max_pending = max_pending
+        self.max_per_client = max_per_client
+        self.scheduler = None
+        self.executor = ThreadPoolExecutor(max_workers=engines, thread_name_prefix="server-engine")
+        self.sessions = {}
+        self.game_ids = itertools.count(1)
+        self.client_ids = itertools.count(1)
+        self.workers = []
+        self.server = None
+        self.started = None
+        self.updates = None         # queue of a grid view watching the games, see watch()
+        self.watch_boards = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.queue_waits = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {
+            'connections': 0,
+            'games': 0,
+            'moves': 0,
+            'ai_moves': 0,
+            'busy': 0,
+            'errors': 0
+        }
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: self.supervisor.start(wait=True, timeout=ENGINE_START_TIMEOUT))
+        self.scheduler = FairScheduler(self.max_pending, self.max_per_client)
+        self.workers = [asyncio.create_task(self._engine_worker()) for _ in range(self.engines)]
+        self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        self.started = time.perf_counter()
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        for worker in self.workers:
+            worker.cancel()
+        self.supervisor.close()
+        self.executor.shutdown(wait=False)
+
+    async def _engine_worker(self):
+        """Take AI requests in scheduler order and run them on the pool"""
+        loop = asyncio.get_running_loop()
+        while True:
+            session, future, queued = await self.scheduler.next()
+            if future.cancelled():
+                continue
+            self.queue_waits.append(time.perf_counter() - queued)
+            try:
+                result = await loop.run_in_executor(self.executor, self.supervisor.play,
+                                                    session.chess_board(), self.limit)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.latencies.append(time.perf_counter() - queued)
+            if not future.done():
+                future.set_result(result.move)
+
+    async def handle_client(self, reader, writer):
+        client_id = next(self.client_ids)
+        self.stats['connections'] += 1
+        in_flight = set()
+        try:
+            while True:
+                # Stop reading while too many requests are in flight
+                if len(in_flight) >= MAX_IN_FLIGHT:
+                    await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._send(writer, {'ok': False, 'error': "request too long"})
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._dispatch(client_id, line, writer))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+        finally:
+            for task in in_flight:
+                task.cancel()
+            self.scheduler.drop(client_id)
+            for game_id in [game_id for game_id, session in self.sessions.items() if session.client_id == client_id]:
+                del self.sessions[game_id]
+            writer.close()
+
+    async def _dispatch(self, client_id, line, writer):
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise RequestError("invalid JSON")
+            if not isinstance(request, dict):
+                raise RequestError("request must be an object")
+            request_id = request.get('id')
+            response = await self.handle_request(client_id, request)
+            response['ok'] = True
+        except ServerBusy:
+            self.stats['busy'] += 1
+            response = {'ok': False, 'error': "busy"}
+        except RequestError as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Error handling request: {str(e)}", file=sys.stderr)
+            response = {'ok': False, 'error': "internal error"}
+        response['id'] = request_id
+        await self._send(writer, response)
+
+    async def _send(self, writer, response):
+        try:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def handle_request(self, client_id, request):
+        op = request.get('op')
+        if op == 'new':
+            return await self._new_game(client_id, request.get('color', 'white'))
+        if op == 'move':
+            return await self._move(self._session(client_id, request), request.get('move'))
+        if op == 'state':
+            return self._session(client_id, request).describe()
+        if op == 'close':
+            session = self._session(client_id, request)
+            del self.sessions[session.game_id]
+            return {'game': session.game_id}
+        if op == 'stats':
+            return self.get_stats()
+        raise RequestError(f"unknown op '{op}'")
+
+    def _session(self, client_id, request):
+        session = self.sessions.get(request.get('game'))
+        if session is None or session.client_id != client_id:
+            raise RequestError("no such game")
+        return session
+
+    async def _new_game(self, client_id, color):
+        if color not in ('white', 'black'):
+            raise RequestError("color must be 'white' or 'black'")
+        if color == 'black':
+            self.scheduler.check(client_id)
+        session = GameSession(next(self.game_ids), client_id, color)
+        self.sessions[session.game_id] = session
+        self.stats['games'] += 1
+        self._publish(session)
+        response = {}
+        if color == 'black':
+            try:
+                response['reply'] = await self._ai_move(session)
+            except Exception:
+                # A game the AI cannot open would wait for it forever
+                del self.sessions[session.game_id]
+                raise
+        response.update(session.describe())
+        return response
+
+    async def _move(self, session, uci):
+        if not session.playing:
+            raise RequestError(f"game is over ({session.status.reason})")
+        if session.thinking or session.turn != session.human:
+            raise RequestError("not your turn")
+        try:
+            move = chess.Move.from_uci(uci)
+        except (TypeError, ValueError):
+            raise RequestError("move must be in UCI notation, e.g. e2e4")
+        if move.promotion:
+            raise RequestError("promotion is not supported yet")
+        # Refuse before touching the board, so a busy server leaves the game unchanged
+        self.scheduler.check(session.client_id)
+        from_pos, to_pos = square_to_position(move.from_square), square_to_position(move.to_square)
+        if not session.play(from_pos, to_pos):
+            raise RequestError(f"illegal move {uci}")
+        self.stats['moves'] += 1
+        self._publish(session, from_pos, to_pos)
+
+        response = {'move': uci}
+        if session.playing:
+            try:
+                response['reply'] = await self._ai_move(session)
+            except Exception:
+                # Without a reply it would stay the AI's turn for good; the client can play again
+                self._take_back(session)
+                raise
+        response.update(session.describe())
+        return response
+
+    async def _ai_move(self, session):
+        """Queue an AI request for a session and play the reply"""
+        future = asyncio.get_running_loop().create_future()
+        session.thinking = True
+        try:
+            self.scheduler.submit(session.client_id, (session, future, time.perf_counter()))
+            try:
+                move = await future
+            except Exception as e:
+                raise RequestError(f"engine failed ({str(e)})")
+        finally:
+            session.thinking = False
+        if move is None:
+            raise RequestError("engine returned no move")
+        if move.promotion:
+            raise RequestError(f"engine move {move.uci()} is a promotion, which is not supported yet")
+        from_pos, to_pos = square_to_position(move.from_square), square_to_position(move.to_square)
+        if not session.play(from_pos, to_pos):
+            raise RequestError(f"engine move {move.uci()} is not supported by the board")
+        self.stats['ai_moves'] += 1
+        self._publish(session, from_pos, to_pos)
+        return move.uci()
+
+    def _take_back(self, session):
+        """Undo a session's last move and show the position before it"""
+        session.take_back()
+        self._publish(session)
+
+    def _publish(self, session, from_pos=None, to_pos=None):
+        """Send a session's position to the grid view, if one is watching"""
+        if self.updates is not None:
+            move = encode_move(from_pos, to_pos) if from_pos is not None else None
+            status = None if session.playing else session.status.result
+            self.updates.put((session.game_id % self.watch_boards, session.board.snapshot(session.turn), move, status))
+
+    async def watch(self, boards):
+        """Show the games in a grid window until it is closed"""
+        from ..ui.board_grid import GridViewer
+        viewer = GridViewer(queue.Queue(), boards, caption="Chess AI - server games")
+        self.updates, self.watch_boards = viewer.updates, boards
+        try:
+            while viewer.running:
+                viewer.run_frame()
+                await asyncio.sleep(1 / 60)
+        finally:
+            self.updates = None
+            viewer.close()
+
+    def get_stats(self):
+        uptime = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            'sessions': len(self.sessions),
+            'pending': self.scheduler.pending if self.scheduler else 0,
+            'uptime': uptime,
+            'ai_moves_per_second': self.stats['ai_moves'] / uptime if uptime else 0.0,
+            'ai_latency': percentiles(list(self.latencies)),
+            'queue_wait': percentiles(list(self.queue_waits)),
+            'engine': dict(self.supervisor.stats),
+            **self.stats
+        }
+
+
+def engine_command(name):
+    """Command line for an engine name ('stockfish', 'fake') or executable path"""
+    if name == 'fake':
+        return FAKE_ENGINE_COMMAND
+    if name == 'stockfish':
+        path = find_engine('stockfish', STOCKFISH_CANDIDATES)
+        if not path:
+            raise SystemExit("No Stockfish executable found")
+        return path
+    return name
+
+
+async def serve(args):
+    server = GameServer(engine_command(args.engine), args.engines, args.movetime, args.max_pending,
+                        args.max_pending_per_client)
+    await server.start(args.host, args.port)
+    print(f"Serving games on {args.host}:{args.port} with {args.engines} engines", file=sys.stderr, flush=True)
+    watcher = asyncio.create_task(server.watch(args.watch)) if args.watch else None
+    try:
+        await server.serve_forever()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve human-vs-AI games over TCP (JSON lines)")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--engine', default='stockfish', help="'stockfish', 'fake' or an engine executable")
+    parser.add_argument('--engines', type=int, default=ENGINE_INSTANCES, help="size of the engine pool")
+    parser.add_argument('--movetime', type=float, default=DEFAULT_MOVETIME, help="seconds per AI move")
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING)
+    parser.add_argument('--max-pending-per-client', type=int, default=MAX_PENDING_PER_CLIENT)
+    parser.add_argument('--quiet', action='store_true', help="hide the board's per-move debug output")
+    parser.add_argument('--watch', type=int, default=0, metavar='BOARDS', help="show games live on this many boards")
+    args = parser.parse_args(argv)
+
+    if args.quiet:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
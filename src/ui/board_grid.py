@@ -0,0 +1,268 @@
+"""Grid view for watching many games at once.
+
+Run from the project root to watch random games (a load test of the view):
+
+    python -m src.ui.board_grid --boards 64 --moves-per-second 600
+
+Games elsewhere (self-play workers, the game server) publish positions to a
+queue with publish(); the grid drains it every frame, keeps only the newest
+position per board, and redraws just the boards that changed. All boards
+share one sprite atlas and one pre-rendered empty board at the grid's square
+size, and only the changed tiles are pushed to the display.
+"""
+import argparse
+import math
+import queue
+import random
+import sys
+import threading
+import time
+
+import pygame
+
+from .sprite_atlas import SpriteAtlas, PIECE_NAMES
+from ..core.move_codec import decode_move
+from ..utils.constants import LIGHT_SQUARE, DARK_SQUARE, LAST_MOVE
+from ..utils.stats import percentiles
+
+# Pixels between and around the boards
+GRID_MARGIN = 4
+
+# Height of the label strip under each board
+LABEL_HEIGHT = 14
+
+# Most queue messages handled per frame, so a burst cannot stall the view
+MAX_UPDATES_PER_FRAME = 4096
+
+# Default window size of the grid view
+GRID_WINDOW_SIZE = (1280, 960)
+
+BACKGROUND = (40, 40, 40)
+LABEL_COLOR = (220, 220, 220)
+
+
+def publish(updates, board_id, chess_board, move=None, status=None):
+    """Send a python-chess position to a grid view's queue
+
+    move is the chess.Move that led to the position (highlighted) and
+    status a short text shown under the board, e.g. a result.
+    """
+    from ..core.game_io import chess_board_to_snapshot
+    from ..core.move_codec import encode_chess_move
+    updates.put((board_id, chess_board_to_snapshot(chess_board),
+                 encode_chess_move(move) if move is not None else None, status))
+
+
+class BoardGrid:
+    """Draws many positions in a grid, redrawing only the boards that changed"""
+
+    def __init__(self, screen, count):
+        self.screen = screen
+        self.count = count
+        self.snapshots = [None] * count
+        self.moves = [None] * count
+        self.statuses = [None] * count
+        self.dirty = set(range(count))
+        self.font = pygame.font.Font(None, LABEL_HEIGHT + 2)
+        self.labels = {}    # rendered label text, reused while a board's status is unchanged
+        self.square_size = None
+        self.layout()
+
+    def layout(self):
+        """Fit the grid to the screen and build the shared surfaces at the new square size"""
+        width, height = self.screen.get_size()
+        self.columns = math.ceil(math.sqrt(self.count * width / height))
+        rows = math.ceil(self.count / self.columns)
+        tile = min((width - GRID_MARGIN) // self.columns - GRID_MARGIN,
+                   (height - GRID_MARGIN) // rows - GRID_MARGIN - LABEL_HEIGHT)
+        square_size = max(1, tile // 8)
+        board_size = 8 * square_size
+        self.tiles = [pygame.Rect(GRID_MARGIN + (index % self.columns) * (board_size + GRID_MARGIN),
+                                  GRID_MARGIN + (index // self.columns) * (board_size + GRID_MARGIN + LABEL_HEIGHT),
+                                  board_size, board_size + LABEL_HEIGHT)
+                      for index in range(self.count)]
+
+        if square_size != self.square_size:
+            self.square_size = square_size
+            self.atlas = SpriteAtlas(square_size)
+            # Sprites indexed by snapshot piece code (piece type, plus 8 for black)
+            self.sprites = [None] * 16
+            for index, name in enumerate(PIECE_NAMES):
+                self.sprites[(index % 6 + 1) | (8 if index >= 6 else 0)] = self.atlas[name]
+            self.empty_board = pygame.Surface((board_size, board_size)).convert()
+            for row in range(8):
+                for col in range(8):
+                    color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
+                    self.empty_board.fill(color, (col * square_size, row * square_size, square_size, square_size))
+            self.highlight = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
+            self.highlight.fill(LAST_MOVE)
+
+        self.screen.fill(BACKGROUND)
+        self.dirty = set(range(self.count))
+        return [self.screen.get_rect()]
+
+    def resize(self, screen):
+        self.screen = screen
+        return self.layout()
+
+    def update(self, board_id, snapshot, move=None, status=None):
+        """Record a board's new position; it is redrawn on the next render"""
+        if not 0 <= board_id < self.count:
+            return
+        if (snapshot, move, status) != (self.snapshots[board_id], self.moves[board_id], self.statuses[board_id]):
+            self.snapshots[board_id] = snapshot
+            self.moves[board_id] = move
+            self.statuses[board_id] = status
+            self.dirty.add(board_id)
+
+    def poll(self, updates, limit=MAX_UPDATES_PER_FRAME):
+        """Apply the messages waiting in a queue; returns how many were read"""
+        read = 0
+        while read < limit:
+            try:
+                message = updates.get_nowait()
+            except queue.Empty:
+                break
+            self.update(*message)
+            read += 1
+        return read
+
+    def render(self):
+        """Draw the boards that changed; returns the screen rects to update"""
+        rects = []
+        for board_id in sorted(self.dirty):
+            rects.append(self._draw_tile(board_id))
+        self.dirty.clear()
+        return rects
+
+    def _draw_tile(self, board_id):
+        tile = self.tiles[board_id]
+        size = self.square_size
+        self.screen.blit(self.empty_board, tile.topleft)
+
+        move = self.moves[board_id]
+        if move is not None:
+            for row, col in decode_move(move)[:2]:
+                self.screen.blit(self.highlight, (tile.x + col * size, tile.y + row * size))
+
+        snapshot = self.snapshots[board_id]
+        if snapshot is not None:
+            sprites = self.sprites
+            blits = []
+            for index in range(32):
+                byte = snapshot[index]
+                if byte:
+                    row, col = divmod(2 * index, 8)
+                    if byte >> 4:
+                        blits.append((sprites[byte >> 4], (tile.x + col * size, tile.y + row * size)))
+                    if byte & 0x0F:
+                        blits.append((sprites[byte & 0x0F], (tile.x + (col + 1) * size, tile.y + row * size)))
+            self.screen.blits(blits, doreturn=False)
+
+        label_rect = pygame.Rect(tile.x, tile.bottom - LABEL_HEIGHT, tile.width, LABEL_HEIGHT)
+        self.screen.fill(BACKGROUND, label_rect)
+        label = f"{board_id}" + (f"  {self.statuses[board_id]}" if self.statuses[board_id] else "")
+        if label not in self.labels:
+            self.labels[label] = self.font.render(label, True, LABEL_COLOR)
+        self.screen.blit(self.labels[label], label_rect.topleft)
+        return tile
+
+
+class GridViewer:
+    """Window showing a BoardGrid fed from a queue"""
+
+    def __init__(self, updates, count, size=GRID_WINDOW_SIZE, caption="Chess AI - games"):
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+        pygame.display.set_caption(caption)
+        self.updates = updates
+        self.grid = BoardGrid(self.screen, count)
+        self.clock = pygame.time.Clock()
+        self.running = True
+        self.frame_times = []
+        self.pending_rects = [self.screen.get_rect()]
+
+    def run_frame(self):
+        """Handle window events, apply queued positions and draw the boards that changed"""
+        start = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.running = False
+            elif event.type == pygame.VIDEORESIZE:
+                self.screen = pygame.display.get_surface()
+                self.pending_rects += self.grid.resize(self.screen)
+        self.grid.poll(self.updates)
+        rects = self.pending_rects + self.grid.render()
+        self.pending_rects = []
+        if rects:
+            pygame.display.update(rects)
+        self.frame_times.append(time.perf_counter() - start)
+
+    def run(self, duration=None):
+        """Show the grid until the window is closed (or for duration seconds)"""
+        deadline = time.perf_counter() + duration if duration else None
+        while self.running and (deadline is None or time.perf_counter() < deadline):
+            self.run_frame()
+            self.clock.tick(60)
+
+    def close(self):
+        pygame.quit()
+
+
+def random_games(updates, count, moves_per_second, stop):
+    """Feed random games on count boards into a queue until stop is set"""
+    import chess
+    boards = [chess.Board() for _ in range(count)]
+    for board_id, board in enumerate(boards):
+        publish(updates, board_id, board)
+    interval = 1.0 / moves_per_second
+    next_move = time.perf_counter()
+    while not stop.is_set():
+        board_id = random.randrange(count)
+        board = boards[board_id]
+        if board.is_game_over() or board.ply() > 200:
+            board.reset()
+            publish(updates, board_id, board)
+        else:
+            move = random.choice(list(board.legal_moves))
+            board.push(move)
+            outcome = board.outcome()
+            publish(updates, board_id, board, move, outcome.result() if outcome else None)
+        next_move += interval
+        delay = next_move - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch many random games in a grid")
+    parser.add_argument('--boards', type=int, default=64)
+    parser.add_argument('--moves-per-second', type=float, default=600.0, help="moves over all boards")
+    parser.add_argument('--duration', type=float, default=None, help="close after this many seconds")
+    args = parser.parse_args(argv)
+
+    updates = queue.Queue()
+    stop = threading.Event()
+    feeder = threading.Thread(target=random_games, args=(updates, args.boards, args.moves_per_second, stop),
+                              name="grid-feeder", daemon=True)
+    viewer = GridViewer(updates, args.boards)
+    feeder.start()
+    try:
+        viewer.run(args.duration)
+    finally:
+        stop.set()
+        viewer.close()
+
+    frame_ms = [value * 1000 for value in viewer.frame_times[1:]]
+    if frame_ms:
+        stats = percentiles(frame_ms)
+        print(f"{len(frame_ms)} frames, work per frame p50 {stats['p50']:.2f}ms  p90 {stats['p90']:.2f}ms  "
+              f"p99 {stats['p99']:.2f}ms  max {max(frame_ms):.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
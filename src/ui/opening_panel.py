@@ -0,0 +1,45 @@
+import pygame
+from ..utils.constants import *
+
+class OpeningPanel:
+    def __init__(self, screen, font):
+        self.screen = screen
+        self.font = font
+        self.visible = False
+        self.max_rows = 12
+        self.rect = pygame.Rect(0, 10, 240, 30 + 20 * self.max_rows)
+        self.background = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.background.fill((0, 0, 0, 170))
+
+    def toggle(self):
+        """Show or hide the panel"""
+        self.visible = not self.visible
+
+    def render(self, stats, lookup_ms=None):
+        """Render move statistics for the current position"""
+        if not self.visible:
+            return
+        try:
+            self.rect.right = self.screen.get_width() - 10
+            self.screen.blit(self.background, self.rect.topleft)
+            total = sum(entry['games'] for entry in stats)
+            title = f"Database: {total} games"
+            if lookup_ms is not None:
+                title += f" ({lookup_ms:.1f}ms)"
+            self._draw_text(title, 0)
+
+            if not stats:
+                self._draw_text("Position not in database", 1)
+            for row, entry in enumerate(stats[:self.max_rows], start=1):
+                games = entry['games']
+                line = (f"{entry['move'].uci():6} {games:6}  "
+                        f"{100 * entry['white'] // games}/{100 * entry['draws'] // games}/"
+                        f"{100 * entry['black'] // games}")
+                self._draw_text(line, row)
+        except Exception as e:
+            print(f"Error rendering opening panel: {str(e)}")
+
+    def _draw_text(self, text, row):
+        """Draw a line of text inside the panel"""
+        surface = self.font.render(text, True, (255, 255, 255))
+        self.screen.blit(surface, (self.rect.x + 8, self.rect.y + 8 + row * 20))
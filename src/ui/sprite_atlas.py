@@ -0,0 +1,99 @@
+import os
+import pygame
+from ..utils.constants import ASSETS_DIR, CACHE_DIR
+
+PIECE_NAMES = [
+    f"{color}_{kind}"
+    for color in ('white', 'black')
+    for kind in ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+]
+
+# Available source resolutions: (pixel size, directory, file name pattern)
+SOURCE_SETS = [
+    (80, os.path.join(ASSETS_DIR, 'images', 'imgs-80px'), '{color}-{kind}.png'),
+    (128, os.path.join(ASSETS_DIR, 'images', 'imgs-128px'), '{color}_{kind}.png')
+]
+
+ATLAS_CACHE_DIR = os.path.join(CACHE_DIR, 'sprites')
+
+
+def choose_source(square_size):
+    """Pick the smallest source set at least as large as the square, else the largest"""
+    for source in sorted(SOURCE_SETS):
+        if source[0] >= square_size:
+            return source
+    return max(SOURCE_SETS)
+
+
+class SpriteAtlas:
+    """All piece sprites scaled to one square size and packed into a single surface"""
+
+    def __init__(self, square_size, placeholder_colors=None):
+        self.square_size = square_size
+        self.placeholder_colors = placeholder_colors or {'white': (255, 255, 255), 'black': (0, 0, 0)}
+        self.surface = None
+        self.sprites = {}
+        self.build()
+
+    def build(self):
+        """Load the atlas from the disk cache or build it from the source images"""
+        source_size, source_dir, pattern = choose_source(self.square_size)
+        paths = [os.path.join(source_dir, pattern.format(color=name.split('_')[0], kind=name.split('_')[1]))
+                 for name in PIECE_NAMES]
+        cache_path = self._cache_path(source_size, paths)
+
+        atlas = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                atlas = pygame.image.load(cache_path)
+            except pygame.error as e:
+                print(f"Warning: Could not load cached atlas {cache_path}: {str(e)}")
+
+        if atlas is None:
+            atlas = self._render_atlas(paths)
+            if cache_path:
+                try:
+                    os.makedirs(ATLAS_CACHE_DIR, exist_ok=True)
+                    pygame.image.save(atlas, cache_path)
+                except (OSError, pygame.error) as e:
+                    print(f"Warning: Could not cache atlas to {cache_path}: {str(e)}")
+
+        # Match the display's pixel format once so every blit is a straight copy
+        self.surface = atlas.convert_alpha() if pygame.display.get_surface() else atlas
+        self.sprites = {
+            name: self.surface.subsurface((index * self.square_size, 0, self.square_size, self.square_size))
+            for index, name in enumerate(PIECE_NAMES)
+        }
+
+    def _cache_path(self, source_size, paths):
+        """Get the cache file name, keyed by size and source modification times"""
+        try:
+            stamp = max(int(os.path.getmtime(path)) for path in paths)
+        except OSError:
+            # Missing source images: don't cache placeholders
+            return None
+        return os.path.join(ATLAS_CACHE_DIR, f"atlas-{self.square_size}-from{source_size}-{stamp}.png")
+
+    def _render_atlas(self, paths):
+        """Scale every source image to the square size and pack them side by side"""
+        size = self.square_size
+        atlas = pygame.Surface((size * len(PIECE_NAMES), size), pygame.SRCALPHA)
+        for index, (name, path) in enumerate(zip(PIECE_NAMES, paths)):
+            try:
+                image = pygame.image.load(path)
+                if pygame.display.get_surface():
+                    image = image.convert_alpha()
+                if image.get_size() != (size, size):
+                    image = pygame.transform.smoothscale(image, (size, size))
+            except (OSError, pygame.error):
+                print(f"Warning: Could not load image: {path}")
+                image = pygame.Surface((size, size), pygame.SRCALPHA)
+                pygame.draw.circle(image, self.placeholder_colors[name.split('_')[0]], (size // 2, size // 2), size // 3)
+            atlas.blit(image, (index * size, 0))
+        return atlas
+
+    def __getitem__(self, name):
+        return self.sprites[name]
+
+    def __contains__(self, name):
+        return name in self.sprites
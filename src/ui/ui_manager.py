@@ -1,6 +1,6 @@
 import pygame
-import os
 from ..utils.constants import *
+from .sprite_atlas import SpriteAtlas
 
 class UIManager:
     def __init__(self, screen):
@@ -13,6 +13,7 @@ class UIManager:
             'highlight': HIGHLIGHT,
             'valid_move': VALID_MOVE,
             'last_move': LAST_MOVE,
+            'premove': PREMOVE,
             'white_piece': (255, 255, 255),
             'black_piece': (0, 0, 0),
             'button': BUTTON_COLOR,
@@ -24,56 +25,47 @@ class UIManager:
         
         # UI elements
         self.buttons = {
-            'new_game': {
-                'rect': pygame.Rect(10, BOARD_SIZE + 10, 100, 30),
-                'text': 'New Game'
-            },
-            'undo': {
-                'rect': pygame.Rect(120, BOARD_SIZE + 10, 100, 30),
-                'text': 'Undo'
-            },
-            'settings': {
-                'rect': pygame.Rect(230, BOARD_SIZE + 10, 100, 30),
-                'text': 'Settings'
-            }
+            'new_game': {'text': 'New Game'},
+            'undo': {'text': 'Undo'},
+            'settings': {'text': 'Settings'}
         }
         
         # Initialize assets
         self.assets = {}
+        self.atlas = None
+        self.square_size = None
+        self.set_square_size(SQUARE_SIZE)
+        
+    @property
+    def board_size(self):
+        """Size of the board in pixels at the current square size"""
+        return 8 * self.square_size
+        
+    def set_square_size(self, square_size):
+        """Lay out the board and buttons for a new square size and rebuild the sprites"""
+        square_size = max(MIN_SQUARE_SIZE, square_size)
+        if square_size == self.square_size:
+            return
+        self.square_size = square_size
+        for index, button in enumerate(self.buttons.values()):
+            button['rect'] = pygame.Rect(10 + 110 * index, self.board_size + 10, 100, 30)
         self.load_assets()
         
+    def resize(self, screen):
+        """Fit the board to a resized window"""
+        self.screen = screen
+        width, height = screen.get_size()
+        self.set_square_size(min(width, height - UI_PANEL_HEIGHT) // 8)
+        
     def load_assets(self):
         """Load game assets"""
-        # Load piece images
-        piece_dir = os.path.join('assets', 'images', 'imgs-80px')
-        piece_mapping = {
-            'white_pawn': 'white-pawn.png',
-            'white_knight': 'white-knight.png',
-            'white_bishop': 'white-bishop.png',
-            'white_rook': 'white-rook.png',
-            'white_queen': 'white-queen.png',
-            'white_king': 'white-king.png',
-            'black_pawn': 'black-pawn.png',
-            'black_knight': 'black-knight.png',
-            'black_bishop': 'black-bishop.png',
-            'black_rook': 'black-rook.png',
-            'black_queen': 'black-queen.png',
-            'black_king': 'black-king.png'
-        }
-        
-        for asset_name, filename in piece_mapping.items():
-            path = os.path.join(piece_dir, filename)
-            try:
-                image = pygame.image.load(path)
-                self.assets[asset_name] = image
-            except:
-                print(f"Warning: Could not load image: {path}")
-                # Create a placeholder surface
-                surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-                color = self.colors['white_piece'] if 'white' in asset_name else self.colors['black_piece']
-                pygame.draw.circle(surface, color, 
-                                (SQUARE_SIZE//2, SQUARE_SIZE//2), SQUARE_SIZE//3)
-                self.assets[asset_name] = surface
+        # Piece sprites come from a single atlas at the current square size,
+        # so nothing is rescaled while rendering
+        self.atlas = SpriteAtlas(self.square_size, {
+            'white': self.colors['white_piece'],
+            'black': self.colors['black_piece']
+        })
+        self.assets = dict(self.atlas.sprites)
                     
     def render_board(self, board):
         """Render the chess board"""
@@ -81,8 +73,8 @@ class UIManager:
             for row in range(8):
                 for col in range(8):
                     # Calculate screen position
-                    pos_x = col * SQUARE_SIZE
-                    pos_y = row * SQUARE_SIZE
+                    pos_x = col * self.square_size
+                    pos_y = row * self.square_size
                     
                     # Determine square color
                     color = self.colors['light_square'] if (row + col) % 2 == 0 else self.colors['dark_square']
@@ -91,7 +83,7 @@ class UIManager:
                     pygame.draw.rect(
                         self.screen,
                         color,
-                        (pos_x, pos_y, SQUARE_SIZE, SQUARE_SIZE)
+                        (pos_x, pos_y, self.square_size, self.square_size)
                     )
         except Exception as e:
             print(f"Error rendering board: {str(e)}")
@@ -108,8 +100,8 @@ class UIManager:
                 piece_key = f"{piece.color}_{piece.__class__.__name__.lower()}"
                 if piece_key in self.assets:
                     # Calculate screen position
-                    pos_x = piece.position[1] * SQUARE_SIZE
-                    pos_y = piece.position[0] * SQUARE_SIZE
+                    pos_x = piece.position[1] * self.square_size
+                    pos_y = piece.position[0] * self.square_size
                     
                     # Draw the piece
                     self.screen.blit(self.assets[piece_key], (pos_x, pos_y))
@@ -121,19 +113,53 @@ class UIManager:
         try:
             for move in valid_moves:
                 # Calculate screen position
-                pos_x = move[1] * SQUARE_SIZE
-                pos_y = move[0] * SQUARE_SIZE
+                pos_x = move[1] * self.square_size
+                pos_y = move[0] * self.square_size
                 
                 # Draw a circle to indicate valid move
                 pygame.draw.circle(
                     self.screen,
                     self.colors['valid_move'],
-                    (pos_x + SQUARE_SIZE // 2, pos_y + SQUARE_SIZE // 2),
-                    SQUARE_SIZE // 4
+                    (pos_x + self.square_size // 2, pos_y + self.square_size // 2),
+                    self.square_size // 4
                 )
         except Exception as e:
             print(f"Error rendering valid moves: {str(e)}")
             
+    def render_premoves(self, premoves, pending=None):
+        """Highlight the squares of queued premoves and a half-entered one"""
+        try:
+            squares = [square for premove in premoves for square in premove]
+            if pending is not None:
+                squares.append(pending)
+            overlay = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
+            overlay.fill(self.colors['premove'])
+            for row, col in squares:
+                self.screen.blit(overlay, (col * self.square_size, row * self.square_size))
+        except Exception as e:
+            print(f"Error rendering premoves: {str(e)}")
+            
+    def render_ply_counter(self, ply, last_ply):
+        """Show the ply on the board and the length of the line in the UI panel"""
+        try:
+            text = self.font.render(f"Ply {ply}/{last_ply}", True, self.colors['text'])
+            rect = text.get_rect(midright=(self.board_size - 10, self.board_size + UI_PANEL_HEIGHT // 2))
+            self.screen.blit(text, rect)
+        except Exception as e:
+            print(f"Error rendering ply counter: {str(e)}")
+            
+    def render_game_over(self, message):
+        """Show a banner across the middle of the board when the game has ended"""
+        try:
+            banner = pygame.Surface((self.board_size, self.square_size), pygame.SRCALPHA)
+            banner.fill((0, 0, 0, 160))
+            banner_y = (self.board_size - self.square_size) // 2
+            self.screen.blit(banner, (0, banner_y))
+            text = self.font.render(message, True, (255, 255, 255))
+            self.screen.blit(text, text.get_rect(center=(self.board_size // 2, banner_y + self.square_size // 2)))
+        except Exception as e:
+            print(f"Error rendering game over: {str(e)}")
+            
     def render_dragged_piece(self, piece, mouse_pos):
         """Render the piece being dragged"""
         try:
@@ -1,12 +1,14 @@
 import os
 
-# Window dimensions
-WINDOW_WIDTH = 640
-WINDOW_HEIGHT = 640
-BOARD_SIZE = 800 # 8 squares * 80px per square
-
-# Square size
+# Square size (default; the window can be resized and the board rescales)
 SQUARE_SIZE = 80
+MIN_SQUARE_SIZE = 24
+
+# Window dimensions
+BOARD_SIZE = 8 * SQUARE_SIZE
+UI_PANEL_HEIGHT = 50  # Button bar below the board
+WINDOW_WIDTH = BOARD_SIZE
+WINDOW_HEIGHT = BOARD_SIZE + UI_PANEL_HEIGHT
 
 # Colors
 LIGHT_SQUARE = (240, 217, 181)
@@ -14,6 +16,7 @@ DARK_SQUARE = (181, 136, 99)
 HIGHLIGHT = (247, 247, 105, 128)
 VALID_MOVE = (106, 190, 48, 128)
 LAST_MOVE = (247, 247, 105, 128)
+PREMOVE = (90, 140, 220, 128)
 BUTTON_COLOR = (200, 200, 200)
 BUTTON_TEXT_COLOR = (0, 0, 0)
 
@@ -21,7 +24,18 @@ BUTTON_TEXT_COLOR = (0, 0, 0)
 INITIAL_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
 # Get the project root directory
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ASSETS_DIR = os.path.join(PROJECT_ROOT, "assets")
+
+# Cache for discovered engine paths, sprite atlases and tuning results
+CACHE_DIR = os.environ.get("CHESS_AI_CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache"))
+
+# Number of engine processes expected to run at once on this host; Threads
+# and Hash are divided between them (see src/ai/engine_config.py)
+ENGINE_INSTANCES = int(os.environ.get("CHESS_AI_ENGINE_INSTANCES", "1"))
+
+# Seconds to wait for the background engine start before the first AI move
+ENGINE_START_TIMEOUT = 10.0
 
 # Stockfish paths (try different possible locations)
 STOCKFISH_PATHS = [
@@ -47,6 +61,30 @@ LCO_PATHS = [
 
 STOCKFISH_SKILL_LEVEL = 10
 
+# AI backends raced against each other for every move (see src/ai/engine_race.py);
+# any of: stockfish, lc0, builtin, nnue, fake. With only stockfish the single-engine
+# ChessEngine is used.
+AI_BACKENDS = [name.strip() for name in os.environ.get("CHESS_AI_BACKENDS", "stockfish").split(",") if name.strip()]
+AI_RACE_POLICY = os.environ.get("CHESS_AI_RACE_POLICY", "deepest")
+
+# Seconds to wait before asking again when no backend returned a move,
+# doubling after every further failure up to the maximum
+AI_RETRY_DELAY = 1.0
+AI_RETRY_MAX = 30.0
+
+# Saved games: the current game is appended to AUTOSAVE_PATH move by move
+# and moved to ARCHIVE_DIR when a new game starts
+SAVE_DIR = os.environ.get("CHESS_AI_SAVE_DIR", os.path.join(PROJECT_ROOT, "saves"))
+AUTOSAVE_PATH = os.path.join(SAVE_DIR, "autosave.cgm")
+ARCHIVE_DIR = os.path.join(SAVE_DIR, "archive")
+
+# Quantised evaluation network of the nnue backend (see src/ai/nnue.py and
+# src/ai/nnue_train.py)
+NNUE_PATH = os.environ.get("CHESS_AI_NNUE", os.path.join(PROJECT_ROOT, "data", "nnue.npz"))
+
+# Position index built from a PGN collection (see src/db/game_index.py)
+GAME_INDEX_DIR = os.path.join(PROJECT_ROOT, "data", "game_index")
+
 # Piece values
 PIECE_VALUES = {
     'pawn': 1,
@@ -71,6 +109,7 @@ GAME_STATES = {
     'PLAYING': 'playing',
     'CHECKMATE': 'checkmate',
     'STALEMATE': 'stalemate',
+    'DRAW': 'draw',
     'PAUSED': 'paused'
 }
 
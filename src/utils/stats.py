@@ -0,0 +1,7 @@
+def percentiles(values, points=(50, 90, 99)):
+    """Percentiles of a list of numbers (nearest rank), keyed like 'p50'"""
+    if not values:
+        return {f"p{point}": None for point in points}
+    ordered = sorted(values)
+    return {f"p{point}": ordered[min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))]
+            for point in points}
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Must be set before pygame or the game modules are imported: no window, and
+# saves and caches in throwaway directories
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('CHESS_AI_CACHE_DIR', tempfile.mkdtemp())
+os.environ.setdefault('CHESS_AI_SAVE_DIR', tempfile.mkdtemp())
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
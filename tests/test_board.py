@@ -0,0 +1,47 @@
+import random
+
+from src.core.board import Board
+from src.core.game_tree import GameTree, SNAPSHOT_INTERVAL
+from src.core.piece import Pawn
+
+
+def state(board):
+    """What the moved flags decide: castling rights (in the snapshot) and pawn double steps"""
+    pawns = sorted((piece.position, piece.has_moved) for piece in board.pieces if isinstance(piece, Pawn))
+    return board.snapshot(), pawns
+
+
+def random_game(seed, plies):
+    rng = random.Random(seed)
+    board = Board()
+    states = [state(board)]
+    turn = 'white'
+    for _ in range(plies):
+        moves = [(piece.position, move) for piece in board.pieces if piece.color == turn
+                 for move in board.get_valid_moves(piece)]
+        if not moves:
+            break
+        assert board.make_move(*rng.choice(moves))
+        states.append(state(board))
+        turn = 'black' if turn == 'white' else 'white'
+    return board, states
+
+
+def test_undo_past_the_snapshot_restores_moved_flags():
+    for seed in range(20):
+        board, states = random_game(seed, 4 * SNAPSHOT_INTERVAL)
+        # Moves before the nearest snapshot are taken back without the earlier positions
+        board, _ = GameTree.from_board(board).board_at()
+        for expected in reversed(states[:-1]):
+            assert board.undo_move()
+            assert state(board) == expected
+
+
+def test_a_move_leaves_earlier_king_squares_alone():
+    board = Board()
+    before = board.position
+    board.make_move((6, 4), (4, 4))
+    board.make_move((1, 4), (3, 4))
+    board.make_move((7, 4), (6, 4))
+    assert before.kings == ((7, 4), (0, 4))
+    assert board.position.kings == ((6, 4), (0, 4))
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import chess
+import chess.engine
+import pytest
+
+from src.ai import engine_supervisor
+from src.ai.engine_supervisor import EngineSupervisor, EngineTimeout
+from src.ai.fake_engine import fake_engine_command
+
+LIMIT = chess.engine.Limit(time=0.01)
+
+
+class RecordingEvent(threading.Event):
+    """Closed-event stand-in that records the restart backoff delays waited on"""
+
+    def __init__(self):
+        super().__init__()
+        self.delays = []
+
+    def wait(self, timeout=None):
+        if timeout is not None and timeout != engine_supervisor.HEALTH_INTERVAL:
+            self.delays.append(timeout)
+        return super().wait(timeout)
+
+
+def supervise(*args):
+    supervisor = EngineSupervisor(fake_engine_command(*args))
+    supervisor._closed = RecordingEvent()
+    return supervisor
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(engine_supervisor, 'BACKOFF_START', 0.05)
+    monkeypatch.setattr(engine_supervisor, 'BACKOFF_MAX', 0.2)
+
+
+def test_crash_after_n_replaces_the_engine(fast_backoff):
+    supervisor = supervise('--crash-after', 3).start(wait=True)
+    try:
+        for _ in range(2):
+            assert supervisor.play(chess.Board(), LIMIT).move
+        with pytest.raises(chess.engine.EngineTerminatedError):
+            supervisor.play(chess.Board(), LIMIT)
+        wait_for(lambda: supervisor.stats['started'] == 2)
+        # The replacement answers again
+        assert supervisor.play(chess.Board(), LIMIT).move
+        assert supervisor.stats['crashes'] == 1
+        assert supervisor.stats['timeouts'] == 0
+        assert supervisor.stats['failed_starts'] == 0
+        assert supervisor._closed.delays == []
+    finally:
+        supervisor.close()
+
+
+def test_hang_past_the_deadline_times_out(fast_backoff):
+    supervisor = supervise('--hang-after', 2).start(wait=True)
+    try:
+        assert supervisor.play(chess.Board(), LIMIT).move
+        started = time.monotonic()
+        with pytest.raises(EngineTimeout):
+            supervisor.play(chess.Board(), LIMIT, deadline=0.5)
+        assert time.monotonic() - started < engine_supervisor.START_TIMEOUT
+        wait_for(lambda: supervisor.stats['started'] == 2)
+        assert supervisor.play(chess.Board(), LIMIT).move
+        assert supervisor.stats['timeouts'] == 1
+        assert supervisor.stats['crashes'] == 0
+        assert supervisor._closed.delays == []
+    finally:
+        supervisor.close()
+
+
+def test_crash_on_start_backs_off(fast_backoff):
+    supervisor = supervise('--crash-on-start').start()
+    try:
+        wait_for(lambda: len(supervisor._closed.delays) >= 4)
+        assert not supervisor.ready.is_set()
+        assert supervisor.stats['started'] == 0
+        assert supervisor.stats['failed_starts'] >= 4
+        # Doubling from BACKOFF_START, capped at BACKOFF_MAX
+        assert supervisor._closed.delays[:4] == [0.05, 0.1, 0.2, 0.2]
+        with pytest.raises(engine_supervisor.EngineUnavailable):
+            supervisor.acquire(timeout=0.1)
+    finally:
+        supervisor.close()
+
+
+def test_deadline_includes_waiting_for_an_engine(fast_backoff):
+    supervisor = supervise('--think', 1.0).start(wait=True)
+    try:
+        busy = threading.Thread(target=supervisor.play, args=(chess.Board(), LIMIT))
+        busy.start()
+        time.sleep(0.1)
+        # ~0.9s waiting for the busy engine leaves too little of the deadline for a 1s search
+        started = time.monotonic()
+        with pytest.raises(EngineTimeout):
+            supervisor.play(chess.Board(), LIMIT, deadline=1.5)
+        assert time.monotonic() - started < 1.8
+        busy.join()
+    finally:
+        supervisor.close()
@@ -0,0 +1,109 @@
+import os
+
+import pygame
+import pytest
+
+from src.core.game_controller import GameController
+from src.core.game_io import load_binary, board_moves
+from src.utils.constants import AUTOSAVE_PATH
+
+
+class IdleEngine:
+    """Engine stand-in; the tests make both sides' moves themselves"""
+
+    def get_best_move(self, board):
+        return None
+
+    def cleanup(self):
+        pass
+
+
+@pytest.fixture
+def game():
+    if os.path.exists(AUTOSAVE_PATH):
+        os.remove(AUTOSAVE_PATH)
+    game = GameController(engine=IdleEngine())
+    yield game
+    game.ai_executor.shutdown(wait=False)
+    game.recorder.close()
+    pygame.quit()
+
+
+def play(game, *moves):
+    for from_pos, to_pos in moves:
+        assert game.board.make_move(from_pos, to_pos)
+        game._after_move(from_pos, to_pos)
+
+
+E4, E5, NF3, NC6, BC4 = ((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 6), (5, 5)), ((0, 1), (2, 2)), ((7, 5), (4, 2))
+
+
+def test_move_after_undo_and_navigation_records_the_whole_line(game):
+    play(game, E4, E5, NF3, NC6)
+    game.undo_move()
+    game.undo_move()
+    assert game.tree.current.ply == 0
+    game.navigate('end')
+    play(game, BC4)
+
+    board, turn, _ = load_binary(AUTOSAVE_PATH)
+    assert board_moves(board) == [E4, E5, NF3, NC6, BC4]
+    assert turn == 'black'
+    assert board.snapshot(turn) == game.board.snapshot(game.current_player)
+
+
+def test_move_in_a_variation_replaces_the_recorded_line(game):
+    play(game, E4, E5, NF3, NC6)
+    game.navigate(2)
+    play(game, BC4)
+
+    board, _, _ = load_binary(AUTOSAVE_PATH)
+    assert board_moves(board) == [E4, E5, BC4]
+
+
+def click(game, square):
+    size = game.ui_manager.square_size
+    return (square[1] * size + size // 2, square[0] * size + size // 2)
+
+
+def test_no_premoves_while_reviewing(game):
+    play(game, E4, E5)
+    game.navigate('back')
+    assert game.reviewing and game.current_player == 'black'
+    game.handle_piece_selection(click(game, NF3[0]))
+    game.handle_piece_selection(click(game, NF3[1]))
+    assert game.premoves == [] and game.premove_from is None
+
+
+def test_no_ai_move_backs_off(game):
+    play(game, E4)
+    game._update()
+    first = game.ai_future
+    assert first is not None
+    first.result(timeout=5)
+    game._update()
+    # The empty result is not asked for again straight away
+    assert game.ai_future is None
+    assert game.ai_failures == 1 and game.ai_retry_at > 0
+    game._update()
+    assert game.ai_future is None
+
+    game.ai_retry_at = 0.0
+    game._update()
+    game.ai_future.result(timeout=5)
+    game._update()
+    assert game.ai_failures == 2
+
+    # Taking the move back gives the next position a fresh attempt
+    game.undo_move()
+    assert game.ai_failures == 0 and game.ai_retry_at == 0.0
+
+
+def test_load_key_restores_the_last_saved_game(game):
+    play(game, E4, E5)
+    game.save_game()
+    play(game, NF3, NC6)
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_l))
+    game.event_handler.handle_events()
+    assert board_moves(game.board) == [E4, E5]
+    assert game.current_player == 'white'
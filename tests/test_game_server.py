@@ -0,0 +1,65 @@
+import asyncio
+import queue
+
+import chess
+import pytest
+
+from src.core.game_io import chess_board_to_snapshot
+from src.server.game_server import GameServer, GameSession, FairScheduler, RequestError
+from src.ai.fake_engine import FAKE_ENGINE_COMMAND
+
+# White pawn on h7 whose only move is the capture on g8
+PROMOTION_FEN = "6nk/7P/8/8/8/8/8/K7 w - - 0 1"
+
+
+def session_at(fen):
+    session = GameSession(1, 1)
+    session.turn = session.board.restore_snapshot(chess_board_to_snapshot(chess.Board(fen)))
+    session.status.reset(session.board, session.turn)
+    session.history = [(session.status.key, session.status.halfmove_clock)]
+    return session
+
+
+def watched_server(session, reply):
+    """A server whose engine answers every request with reply, publishing to a queue"""
+    server = GameServer(FAKE_ENGINE_COMMAND)
+    server.scheduler = FairScheduler()
+    server.sessions[session.game_id] = session
+    server.updates, server.watch_boards = queue.Queue(), 1
+
+    def submit(client_id, job):
+        job[1].set_result(chess.Move.from_uci(reply))
+    server.scheduler.submit = submit
+    return server
+
+
+@pytest.mark.parametrize('uci', ['h7g8', 'h7g8q'])
+def test_pawn_moves_to_the_last_rank_are_refused(uci):
+    session = session_at(PROMOTION_FEN)
+    server = watched_server(session, 'h8h7')
+    try:
+        with pytest.raises(RequestError, match="promotion is not supported yet"):
+            asyncio.run(server._move(session, uci))
+        assert session.chess_board().fen() == chess.Board(PROMOTION_FEN).fen()
+        assert session.board.move_history == []
+    finally:
+        server.close()
+
+
+def test_promotion_reply_takes_the_move_back():
+    fen = "k7/8/8/8/8/8/1p6/7K w - - 0 1"
+    session = session_at(fen)
+    server = watched_server(session, 'b2b1q')
+    try:
+        with pytest.raises(RequestError, match="b2b1q"):
+            asyncio.run(server._move(session, 'h1g1'))
+        assert session.chess_board().fen() == chess.Board(fen).fen()
+        assert session.turn == 'white'
+        # The watch grid is sent the position from before the taken-back move
+        updates = []
+        while not server.updates.empty():
+            updates.append(server.updates.get())
+        assert updates[-1][1] == session.board.snapshot('white')
+        assert updates[-1][2] is None
+    finally:
+        server.close()